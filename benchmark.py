@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+"""
+Universal TV Series Renamer - Benchmark
+Misura le prestazioni del rinominatore su librerie sintetiche, usando un
+server HTTP locale che imita le API di TMDB e TVMaze.
+
+Copyright (C) 2024 Andres Zanzani
+Licenza: GPL-3.0
+"""
+
+import os
+import sys
+import json
+import hashlib
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from pathlib import Path
+from typing import Optional, Dict, List, Tuple
+from dataclasses import dataclass
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import tvrenamer3
+from tvrenamer3 import (
+    Config, EpisodeInfo, FileUtils, Language, PersistentCache, RenamePlanner, SeriesExtractor,
+    SeriesInfo, TVSeriesRenamer, VideoFile
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# ============================================================================
+# CATALOGO SINTETICO
+# ============================================================================
+
+ADJECTIVES = [
+    'Silent', 'Broken', 'Crimson', 'Hidden', 'Last', 'Northern', 'Golden', 'Savage',
+    'Quiet', 'Electric', 'Frozen', 'Iron', 'Lost', 'Midnight', 'Scarlet', 'Wild'
+]
+NOUNS = [
+    'Harbor', 'Empire', 'Frontier', 'Kingdom', 'Signal', 'Orchard', 'Protocol', 'Station',
+    'Dynasty', 'Tide', 'Republic', 'Garden', 'Circuit', 'Lighthouse', 'Witness', 'Valley'
+]
+RELEASES = [
+    '1080p.WEB-DL.x264-NTb', '720p.HDTV.x264-LOL', '2160p.WEBRip.x265-GRP',
+    '1080p.BluRay.x264-DEMAND', '720p.WEB-DL.HEVC-PSA'
+]
+
+@dataclass
+class SyntheticShow:
+    """Serie del catalogo sintetico"""
+    id: int
+    name: str
+    year: int
+    seasons: Dict[int, int]  # stagione -> numero di episodi
+    ended: bool
+
+    def episode_title(self, season: int, episode: int) -> str:
+        return f"Chapter {season}.{episode}"
+
+@dataclass
+class SyntheticLibrary:
+    """Libreria generata su disco"""
+    root: Path
+    shows: List[SyntheticShow]
+    files: int
+    duplicates: int
+    gaps: int
+
+class LibraryGenerator:
+    """Genera librerie sintetiche con nomi in stile release, duplicati e buchi"""
+
+    def __init__(self, seed: int = 42, duplicate_rate: float = 0.03, gap_rate: float = 0.05):
+        self.random = random.Random(seed)
+        self.duplicate_rate = duplicate_rate
+        self.gap_rate = gap_rate
+
+    def generate(self, root: Path, file_count: int) -> SyntheticLibrary:
+        """Crea almeno file_count file video vuoti, una cartella per serie"""
+        shows: List[SyntheticShow] = []
+        files = duplicates = gaps = 0
+
+        while files < file_count:
+            show = self._new_show(len(shows) + 1)
+            shows.append(show)
+            show_dir = root / self._directory_name(show)
+
+            for season, episodes in show.seasons.items():
+                season_dir = show_dir / f"Season {season:02d}"
+                season_dir.mkdir(parents=True, exist_ok=True)
+
+                for episode in range(1, episodes + 1):
+                    if files >= file_count:
+                        break
+                    if self.random.random() < self.gap_rate:
+                        gaps += 1
+                        continue
+
+                    (season_dir / self._file_name(show, season, episode)).touch()
+                    files += 1
+
+                    if self.random.random() < self.duplicate_rate and files < file_count:
+                        (season_dir / self._file_name(show, season, episode)).touch()
+                        files += 1
+                        duplicates += 1
+
+        return SyntheticLibrary(root=root, shows=shows, files=files, duplicates=duplicates, gaps=gaps)
+
+    def _new_show(self, show_id: int) -> SyntheticShow:
+        # Il numero progressivo rende unico il nome anche con molte serie
+        name = f"{self.random.choice(ADJECTIVES)} {self.random.choice(NOUNS)}"
+        if show_id > len(ADJECTIVES) * len(NOUNS) // 4:
+            name += f" {show_id}"
+        season_count = self.random.randint(1, 8)
+        seasons = {s: self.random.randint(6, 24) for s in range(1, season_count + 1)}
+        return SyntheticShow(
+            id=1000 + show_id,
+            name=name,
+            year=self.random.randint(1995, 2024),
+            seasons=seasons,
+            ended=self.random.random() < 0.6
+        )
+
+    def _directory_name(self, show: SyntheticShow) -> str:
+        style = show.id % 3
+        if style == 0:
+            return f"{show.name} ({show.year})"
+        if style == 1:
+            return f"{show.name.replace(' ', '.')}.COMPLETE"
+        return show.name
+
+    def _file_name(self, show: SyntheticShow, season: int, episode: int) -> str:
+        release = self.random.choice(RELEASES)
+        dotted = show.name.replace(' ', '.')
+        if self.random.random() < 0.8:
+            return f"{dotted}.S{season:02d}E{episode:02d}.{release}.mkv"
+        return f"{show.name} - {season}x{episode:02d} - {release}.mp4"
+
+# ============================================================================
+# SERVER API SIMULATO
+# ============================================================================
+
+class MockAPIServer:
+    """Server HTTP locale che imita gli endpoint TMDB e TVMaze usati dai provider"""
+
+    def __init__(self, shows: List[SyntheticShow], latency: float = 0.0,
+                 error_rate: float = 0.0, retry_after: int = 1, seed: int = 42):
+        self.shows = {show.id: show for show in shows}
+        self.by_name = {self._normalize(show.name): show for show in shows}
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.throttled = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                mock._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def snapshot(self) -> Tuple[int, int]:
+        """Restituisce (chiamate totali, risposte 429) fino a questo momento"""
+        with self._lock:
+            return sum(self.calls.values()), self.throttled
+
+    @staticmethod
+    def _normalize(name: str) -> str:
+        return ''.join(ch for ch in name.lower() if ch.isalnum())
+
+    def _handle(self, request: BaseHTTPRequestHandler):
+        url = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            throttle = self.error_rate and self.random.random() < self.error_rate
+            if throttle:
+                self.throttled += 1
+
+        if throttle:
+            self._send(request, 429, {'status_message': 'Too Many Requests'},
+                       {'Retry-After': str(self.retry_after)})
+            return
+
+        route, payload = self._route(parts, params)
+        with self._lock:
+            self.calls[route] += 1
+
+        if payload is None:
+            self._send(request, 404, {'status_message': 'Not Found'})
+            return
+
+        # ETag sul contenuto, come i provider reali: 304 se il client ha già la versione corrente
+        etag = '"%s"' % hashlib.md5(json.dumps(payload).encode('utf-8')).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.not_modified += 1
+            request.send_response(304)
+            request.send_header('ETag', etag)
+            request.end_headers()
+        else:
+            self._send(request, 200, payload, {'ETag': etag})
+
+    def _route(self, parts: List[str], params: Dict[str, str]) -> Tuple[str, Optional[object]]:
+        """Associa il percorso al modello di URL e costruisce la risposta"""
+        if parts[:1] == ['3']:
+            parts = parts[1:]
+            if parts == ['search', 'tv']:
+                return '/3/search/tv', self._tmdb_search(params.get('query', ''))
+            if len(parts) == 2 and parts[0] == 'tv':
+                return '/3/tv/{id}', self._tmdb_show(parts[1], params.get('append_to_response', ''))
+            if len(parts) == 4 and parts[0] == 'tv' and parts[2] == 'season':
+                return '/3/tv/{id}/season/{s}', self._tmdb_season(parts[1], parts[3])
+            if len(parts) == 6 and parts[0] == 'tv' and parts[4] == 'episode':
+                return '/3/tv/{id}/season/{s}/episode/{e}', self._tmdb_episode(parts[1], parts[3], parts[5])
+        else:
+            if parts == ['search', 'shows']:
+                return '/search/shows', self._tvmaze_search(params.get('q', ''))
+            if len(parts) == 2 and parts[0] == 'shows':
+                return '/shows/{id}', self._tvmaze_show(parts[1], params.get('embed') == 'episodes')
+            if len(parts) == 3 and parts[0] == 'shows' and parts[2] == 'episodebynumber':
+                return '/shows/{id}/episodebynumber', self._tvmaze_episode(
+                    parts[1], params.get('season', '0'), params.get('number', '0'))
+        return '/'.join(parts), None
+
+    def _find(self, show_id: str) -> Optional[SyntheticShow]:
+        try:
+            return self.shows.get(int(show_id))
+        except ValueError:
+            return None
+
+    def _search(self, query: str) -> List[SyntheticShow]:
+        key = self._normalize(query)
+        show = self.by_name.get(key)
+        if show:
+            return [show]
+        return [s for name, s in self.by_name.items() if key and key in name][:5]
+
+    def _season_episodes(self, show: SyntheticShow, season: int) -> Optional[List[int]]:
+        count = show.seasons.get(season)
+        return list(range(1, count + 1)) if count else None
+
+    # --- TMDB ---
+
+    def _tmdb_search(self, query: str):
+        return {'results': [{
+            'id': show.id, 'name': show.name, 'first_air_date': f"{show.year}-01-01",
+            'overview': f"Synthetic show {show.name}", 'vote_average': 7.5
+        } for show in self._search(query)]}
+
+    def _tmdb_season_payload(self, show: SyntheticShow, season: int):
+        episodes = self._season_episodes(show, season)
+        if episodes is None:
+            return None
+        return {'season_number': season, 'episodes': [
+            {'episode_number': e, 'name': show.episode_title(season, e)} for e in episodes
+        ]}
+
+    def _tmdb_show(self, show_id: str, append: str):
+        show = self._find(show_id)
+        if not show:
+            return None
+        payload = {
+            'id': show.id, 'name': show.name,
+            'status': 'Ended' if show.ended else 'Returning Series',
+            'number_of_episodes': sum(show.seasons.values()),
+            'seasons': [{'season_number': s, 'episode_count': n} for s, n in show.seasons.items()]
+        }
+        for item in filter(None, append.split(',')):
+            if item.startswith('season/'):
+                season_payload = self._tmdb_season_payload(show, int(item.split('/')[1]))
+                if season_payload is not None:
+                    payload[item] = season_payload
+        return payload
+
+    def _tmdb_season(self, show_id: str, season: str):
+        show = self._find(show_id)
+        return self._tmdb_season_payload(show, int(season)) if show else None
+
+    def _tmdb_episode(self, show_id: str, season: str, episode: str):
+        show = self._find(show_id)
+        episodes = self._season_episodes(show, int(season)) if show else None
+        if not episodes or int(episode) not in episodes:
+            return None
+        return {'episode_number': int(episode), 'name': show.episode_title(int(season), int(episode))}
+
+    # --- TVMaze ---
+
+    def _tvmaze_search(self, query: str):
+        return [{'score': 1.0, 'show': {
+            'id': show.id, 'name': show.name, 'premiered': f"{show.year}-01-01",
+            'summary': f"<p>Synthetic show {show.name}</p>", 'rating': {'average': 7.9},
+            'status': 'Ended' if show.ended else 'Running'
+        }} for show in self._search(query)]
+
+    def _tvmaze_show(self, show_id: str, embed_episodes: bool):
+        show = self._find(show_id)
+        if not show:
+            return None
+        payload = {'id': show.id, 'name': show.name, 'status': 'Ended' if show.ended else 'Running'}
+        if embed_episodes:
+            payload['_embedded'] = {'episodes': [
+                {'season': s, 'number': e, 'name': show.episode_title(s, e)}
+                for s, count in show.seasons.items() for e in range(1, count + 1)
+            ]}
+        return payload
+
+    def _tvmaze_episode(self, show_id: str, season: str, number: str):
+        show = self._find(show_id)
+        episodes = self._season_episodes(show, int(season)) if show else None
+        if not episodes or int(number) not in episodes:
+            return None
+        return {'season': int(season), 'number': int(number),
+                'name': show.episode_title(int(season), int(number))}
+
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, payload, headers: Optional[Dict] = None):
+        body = json.dumps(payload).encode('utf-8')
+        request.send_response(status)
+        request.send_header('Content-Type', 'application/json')
+        request.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            request.send_header(key, value)
+        request.end_headers()
+        request.wfile.write(body)
+
+# ============================================================================
+# ESECUZIONE BENCHMARK
+# ============================================================================
+
+def peak_rss_mb() -> Optional[float]:
+    """Picco di memoria residente del processo in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux riporta KB, macOS byte
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+def expire_cache(cache):
+    """Fa scadere tutte le voci della cache lasciando valori e validatori HTTP"""
+    if isinstance(cache, PersistentCache):
+        with cache._lock:
+            cache._conn.execute('UPDATE cache SET expires = 0')
+    else:
+        for key in cache._expires:
+            cache._expires[key] = 0
+
+class StageTimer:
+    """Cronometra le fasi e le chiamate API effettuate in ciascuna"""
+
+    def __init__(self, server: MockAPIServer, file_count: int):
+        self.server = server
+        self.file_count = file_count
+        self.stages: Dict[str, Dict] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        calls_before, throttled_before = self.server.snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            calls_after, throttled_after = self.server.snapshot()
+            self.stages[name] = {
+                'seconds': round(elapsed, 4),
+                'files_per_second': round(self.file_count / elapsed, 1) if elapsed > 0 else None,
+                'api_calls': calls_after - calls_before,
+                'throttled_429': throttled_after - throttled_before
+            }
+            print(f"  {name:<12} {elapsed:8.3f}s  {calls_after - calls_before:6d} chiamate API",
+                  file=sys.stderr)
+
+def run_benchmark(args: argparse.Namespace) -> Dict:
+    """Genera la libreria, avvia il server simulato e misura ogni fase"""
+    workdir = Path(tempfile.mkdtemp(prefix='tvrenamer_bench_'))
+    server = None
+
+    try:
+        print(f"📁 Generazione di {args.files} file in {workdir}...", file=sys.stderr)
+        library = LibraryGenerator(seed=args.seed).generate(workdir / 'library', args.files)
+
+        server = MockAPIServer(library.shows, latency=args.latency / 1000.0,
+                               error_rate=args.error_rate, retry_after=args.retry_after,
+                               seed=args.seed)
+        server.start()
+
+        config = Config(
+            tmdb_api_key='benchmark' if args.provider == 'tmdb' else None,
+            language=Language.ENGLISH,
+            interface_language=Language.ENGLISH,
+            recursive=True,
+            dry_run=False,
+            cache_dir=str(workdir / 'cache'),
+            use_cache=args.persistent_cache,
+            workers=args.workers,
+            tmdb_base_url=f"{server.base_url}/3",
+            tvmaze_base_url=server.base_url
+        )
+        source = 'TMDB' if args.provider == 'tmdb' else 'TVMaze'
+
+        # L'output del rinominatore non fa parte della misura
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            renamer = TVSeriesRenamer(config)
+
+        timer = StageTimer(server, library.files)
+        print("⏱️  Fasi:", file=sys.stderr)
+
+        with timer.stage('scan'):
+            files = FileUtils.find_video_files(library.root, recursive=True,
+                                               workers=args.scan_workers)
+
+        with timer.stage('extraction'):
+            folders: Dict[Path, List[Path]] = {}
+            for path in files:
+                folder = library.root / path.path.relative_to(library.root).parts[0]
+                folders.setdefault(folder, []).append(path)
+            units = [(folder, SeriesExtractor.extract_from_files(folder_files, folder.name), folder_files)
+                     for folder, folder_files in folders.items()]
+
+        with timer.stage('search'):
+            resolved: List[Tuple[Path, SeriesInfo, List[Path]]] = []
+            for folder, series_name, folder_files in units:
+                results = [r for r in renamer.api_manager.search_series(series_name) if r.source == source]
+                if results:
+                    resolved.append((folder, results[0], folder_files))
+
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            with timer.stage('resolution'):
+                planned = [(folder, renamer._prepare_rename_operations(series, folder_files))
+                           for folder, series, folder_files in resolved]
+
+            with timer.stage('rename'):
+                renamed = errors = 0
+                for folder, operations in planned:
+                    if operations:
+                        success, failed = renamer._execute_renames(operations, folder)
+                        renamed += success
+                        errors += failed
+
+            if args.refresh:
+                # Tutte le voci scadono: ogni risorsa viene rivalidata con richieste condizionali
+                expire_cache(renamer.cache)
+                with timer.stage('refresh'):
+                    for folder, series, folder_files in resolved:
+                        renamer.api_manager.search_series(series.name)
+                        renamer._prepare_rename_operations(series, folder_files)
+
+        total_calls, throttled = server.snapshot()
+        return {
+            'files': library.files,
+            'series': len(library.shows),
+            'series_resolved': len(resolved),
+            'duplicates': library.duplicates,
+            'gaps': library.gaps,
+            'provider': source,
+            'workers': args.workers,
+            'latency_ms': args.latency,
+            'error_rate_429': args.error_rate,
+            'renamed': renamed,
+            'rename_errors': errors,
+            'stages': timer.stages,
+            'total_seconds': round(sum(stage['seconds'] for stage in timer.stages.values()), 4),
+            'api_calls': {
+                'total': total_calls,
+                'throttled_429': throttled,
+                'not_modified_304': server.not_modified,
+                'by_endpoint': dict(sorted(server.calls.items()))
+            },
+            'revalidation': {
+                'not_modified': renamer.http_client.not_modified,
+                'bytes_saved': renamer.http_client.bytes_saved
+            },
+            'peak_rss_mb': peak_rss_mb(),
+            'python': sys.version.split()[0],
+            'renamer_version': tvrenamer3.__doc__.strip().splitlines()[0]
+        }
+    finally:
+        if server:
+            server.stop()
+        if args.keep:
+            print(f"📁 Libreria conservata in: {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+# ============================================================================
+# BENCHMARK DI MEMORIA
+# ============================================================================
+
+class CatalogAPI:
+    """Risponde dal catalogo sintetico senza rete: isola la memoria del modello dati"""
+
+    def __init__(self, shows: List[SyntheticShow]):
+        self.shows = {str(show.id): show for show in shows}
+
+    def preload_episodes(self, series: SeriesInfo, seasons):
+        pass
+
+    def get_episode_info(self, series: SeriesInfo, season: int, episode: int) -> Optional[EpisodeInfo]:
+        show = self.shows[series.id]
+        if episode > show.seasons.get(season, 0):
+            return None
+        return EpisodeInfo(title=show.episode_title(season, episode), season=season, episode=episode)
+
+    def close(self):
+        pass
+
+def run_memory_benchmark(args: argparse.Namespace) -> Dict:
+    """Elenco file e piano di rinomina per N voci sintetiche (senza disco né rete), con picco di memoria"""
+    generator = LibraryGenerator(seed=args.seed)
+    root = os.path.join(tempfile.gettempdir(), 'tvrenamer_memory_library')
+    baseline = peak_rss_mb()
+
+    config = Config(language=Language.ENGLISH, interface_language=Language.ENGLISH,
+                    dry_run=True, use_cache=False, use_state=False, workers=1)
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        renamer = TVSeriesRenamer(config)
+
+    # Elenco completo come lo restituirebbe la scansione: una stringa di cartella per stagione
+    start = time.perf_counter()
+    shows: List[SyntheticShow] = []
+    library: List[Tuple[SyntheticShow, List[VideoFile]]] = []
+    entries = 0
+    while entries < args.memory:
+        show = generator._new_show(len(shows) + 1)
+        shows.append(show)
+        show_dir = os.path.join(root, generator._directory_name(show))
+        files = []
+        for season, episodes in show.seasons.items():
+            season_dir = os.path.join(show_dir, f"Season {season:02d}")
+            for episode in range(1, min(episodes, args.memory - entries) + 1):
+                files.append(VideoFile(season_dir, generator._file_name(show, season, episode)))
+            entries += min(episodes, args.memory - entries)
+        library.append((show, files))
+    listed = time.perf_counter() - start
+    after_listing = peak_rss_mb()
+
+    # Piano stagione per stagione, come in elaborazione reale
+    renamer.api_manager = CatalogAPI(shows)
+    operations = 0
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        for show, files in library:
+            series = SeriesInfo(id=str(show.id), name=show.name, year=str(show.year),
+                                overview='', source='TVMaze')
+            for _, _, season_operations in renamer._iter_season_operations(series, files):
+                RenamePlanner.plan(season_operations)
+                operations += len(season_operations)
+    planned = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    report = {
+        'entries': entries,
+        'series': len(shows),
+        'operations': operations,
+        'listing_seconds': round(listed, 2),
+        'planning_seconds': round(planned, 2),
+        'baseline_rss_mb': baseline,
+        'listing_rss_mb': after_listing,
+        'peak_rss_mb': peak,
+        'bytes_per_entry': round((peak - baseline) * 1024 * 1024 / entries) if peak and entries else None,
+        'max_rss_mb': args.max_rss_mb,
+        'python': sys.version.split()[0]
+    }
+    if args.max_rss_mb and peak is not None:
+        report['within_bound'] = peak <= args.max_rss_mb
+    return report
+
+def create_argument_parser() -> argparse.ArgumentParser:
+    """Crea il parser per gli argomenti della linea di comando"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark di Universal TV Series Renamer su librerie sintetiche",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Esempi di utilizzo:
+  %(prog)s --files 1000
+  %(prog)s --files 100000 --latency 50 --error-rate 0.02 --output bench.json
+  %(prog)s --files 5000 --persistent-cache --refresh
+  %(prog)s --memory 1000000 --max-rss-mb 400
+        """
+    )
+    parser.add_argument('--files', type=int, default=1000, help='Numero di file da generare (default: 1000)')
+    parser.add_argument('--provider', choices=['tmdb', 'tvmaze'], default='tvmaze',
+                        help='Provider da misurare (default: tvmaze)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latenza simulata per richiesta in ms')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Frazione di richieste che ricevono 429 (0-1)')
+    parser.add_argument('--retry-after', type=int, default=1, help='Valore Retry-After delle risposte 429')
+    parser.add_argument('--workers', type=int, default=8, help='Richieste API parallele')
+    parser.add_argument('--scan-workers', type=int, default=1, help='Cartelle scansionate in parallelo')
+    parser.add_argument('--persistent-cache', action='store_true',
+                        help='Usa la cache SQLite (in una directory temporanea) invece di quella in memoria')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Aggiunge una fase che rivalida con ETag tutti i metadati scaduti')
+    parser.add_argument('--memory', type=int, metavar='N',
+                        help='Misura solo la memoria di elenco e piano per N voci sintetiche (senza disco né rete)')
+    parser.add_argument('--max-rss-mb', type=float,
+                        help='Con --memory: esce con errore se il picco di memoria supera questo limite')
+    parser.add_argument('--seed', type=int, default=42, help='Seme per la generazione della libreria')
+    parser.add_argument('--output', help='Scrive il report JSON su file invece che su stdout')
+    parser.add_argument('--keep', action='store_true', help='Non cancella la libreria generata')
+    return parser
+
+def main():
+    args = create_argument_parser().parse_args()
+    report = run_memory_benchmark(args) if args.memory else run_benchmark(args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"📄 Report scritto in: {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+    if report.get('within_bound') is False:
+        print(f"❌ Picco di memoria {report['peak_rss_mb']} MB oltre il limite di {args.max_rss_mb} MB",
+              file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
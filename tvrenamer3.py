@@ -11,15 +11,43 @@ import os
 import re
 import sys
 import time
+import math
 import html
+import errno
+import shutil
+import csv
+import json
+import zlib
+import string
+import mmap
+import hashlib
+import random
+import difflib
+import queue
+import select
+import sqlite3
+import struct
+import ctypes
+import ctypes.util
+import fnmatch
+import pstats
+import cProfile
 import argparse
+import threading
+import contextlib
+import itertools
 from pathlib import Path
-from typing import Optional, Dict, List, Tuple, Set
-from dataclasses import dataclass
+from typing import Optional, Dict, List, Tuple, Set, Iterator, Iterable, Callable
+from dataclasses import dataclass, fields, is_dataclass
 from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from abc import ABC, abstractmethod
 from enum import Enum
 
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
@@ -35,6 +63,18 @@ class FormatStyle(Enum):
     MINIMAL = "minimal"
     KODI = "kodi"
 
+class LinkMode(Enum):
+    AUTO = "auto"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    SYMLINK = "symlink"
+
+class OutputFormat(Enum):
+    TABLE = "table"
+    JSON = "json"
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class Language(Enum):
     ITALIAN = "it"
     ENGLISH = "en"
@@ -53,6 +93,29 @@ class Config:
     format_style: FormatStyle = FormatStyle.STANDARD
     recursive: bool = False
     dry_run: bool = True
+    cache_dir: Optional[str] = None
+    use_cache: bool = True
+    workers: int = 8
+    library: bool = False
+    library_workers: int = 4
+    max_depth: Optional[int] = None
+    scan_workers: int = 1
+    tmdb_base_url: str = "https://api.themoviedb.org/3"
+    tvmaze_base_url: str = "https://api.tvmaze.com"
+    batch: bool = False
+    auto_threshold: float = 0.85
+    pending_file: Optional[str] = None
+    use_state: bool = True
+    watch: bool = False
+    settle_seconds: float = 5.0
+    output: OutputFormat = OutputFormat.TABLE
+    plan_out: Optional[str] = None
+    move_to: Optional[str] = None
+    organize: Optional[str] = None
+    link_mode: LinkMode = LinkMode.AUTO
+    template: Optional[str] = None
+    rename_workers: int = 4
+    aliases: Optional[str] = None
 
     @classmethod
     def from_args(cls, args: argparse.Namespace) -> 'Config':
@@ -62,7 +125,28 @@ class Config:
             interface_language=Language(args.interface),
             format_style=FormatStyle(args.format),
             recursive=args.recursive,
-            dry_run=not args.execute
+            dry_run=not args.execute,
+            cache_dir=args.cache_dir,
+            use_cache=not args.no_cache,
+            workers=max(1, args.workers),
+            library=args.library,
+            library_workers=max(1, args.library_workers),
+            max_depth=args.max_depth,
+            scan_workers=max(1, args.scan_workers),
+            batch=args.batch,
+            auto_threshold=args.auto_threshold,
+            pending_file=args.pending_file,
+            use_state=not args.full_rescan,
+            watch=args.watch,
+            settle_seconds=max(0.0, args.settle),
+            output=OutputFormat(args.output),
+            plan_out=args.plan_out,
+            move_to=os.path.abspath(os.path.expanduser(args.move_to)) if args.move_to else None,
+            rename_workers=max(1, args.rename_workers),
+            organize=os.path.abspath(os.path.expanduser(args.organize)) if args.organize else None,
+            link_mode=LinkMode(args.link),
+            template=args.template,
+            aliases=args.aliases
         )
 
 @dataclass(frozen=True)
@@ -78,15 +162,253 @@ class SeriesInfo:
 @dataclass(frozen=True)
 class EpisodeInfo:
     """Informazioni su un episodio"""
+    __slots__ = ('title', 'season', 'episode')
     title: str
     season: int
     episode: int
 
+@dataclass(frozen=True)
+class MediaInfo:
+    """Caratteristiche del video lette dall'intestazione del contenitore"""
+    __slots__ = ('width', 'height', 'codec', 'duration')
+    width: int
+    height: int
+    codec: str
+    duration: float  # secondi
+    
+    @property
+    def pixels(self) -> int:
+        return self.width * self.height
+    
+    @property
+    def resolution(self) -> str:
+        """Etichetta usuale (1080p, 720p, ...): altezza equivalente in 16:9, valida per i formati panoramici e anamorfici"""
+        # 1920x800 (scope) conta come 1080p, 1440x1080 (HDV) resta 1080p
+        height = max(self.height, self.width * 9 // 16)
+        if not height:
+            return ''
+        for min_height, label in ((1800, '2160p'), (1300, '1440p'), (900, '1080p'), (650, '720p')):
+            if height >= min_height:
+                return label
+        return f"{height}p"
+
+@dataclass(frozen=True)
+class ParsedFilename:
+    """Risultato strutturato dell'analisi di un nome file"""
+    __slots__ = ('series_prefix', 'season', 'episodes', 'marker_position', 'title_end',
+                 'quality', 'release_group')
+    series_prefix: str
+    season: Optional[int]
+    episodes: Tuple[int, ...]
+    marker_position: Optional[int]
+    title_end: int
+    quality: Tuple[str, ...]
+    release_group: Optional[str]
+    
+    @property
+    def episode(self) -> Optional[int]:
+        return self.episodes[0] if self.episodes else None
+
+@dataclass(frozen=True, order=True)
+class VideoFile:
+    """File video trovato dalla scansione: cartella (stringa condivisa tra i file) e nome
+    
+    Sostituisce Path nelle liste di file delle librerie grandi, esponendo
+    la parte di interfaccia di Path usata dal programma.
+    """
+    __slots__ = ('directory', 'name')
+    directory: str
+    name: str
+    
+    @property
+    def path(self) -> Path:
+        return Path(self.directory, self.name)
+    
+    @property
+    def parent(self) -> Path:
+        return Path(self.directory)
+    
+    @property
+    def stem(self) -> str:
+        return os.path.splitext(self.name)[0]
+    
+    @property
+    def suffix(self) -> str:
+        return os.path.splitext(self.name)[1]
+    
+    def absolute(self) -> Path:
+        return self.path.absolute()
+    
+    def exists(self) -> bool:
+        return os.path.exists(self.__fspath__())
+    
+    def stat(self) -> os.stat_result:
+        return os.stat(self.__fspath__())
+    
+    def __fspath__(self) -> str:
+        return os.path.join(self.directory, self.name)
+    
+    __str__ = __fspath__
+
 @dataclass(frozen=True)
 class RenameOperation:
-    """Operazione di rinomina"""
-    old_path: Path
+    """Operazione di rinomina: cartella, nome attuale, nuovo nome e cartella di destinazione"""
+    __slots__ = ('directory', 'name', 'new_name', 'target_directory')
+    directory: str
+    name: str
     new_name: str
+    target_directory: str
+    
+    @classmethod
+    def for_file(cls, video_file, new_name: str, target_directory: Optional[str] = None) -> 'RenameOperation':
+        """Operazione per un file (VideoFile o Path); senza destinazione resta nella stessa cartella"""
+        if isinstance(video_file, VideoFile):
+            directory, name = video_file.directory, video_file.name
+        else:
+            directory, name = os.path.split(os.fspath(video_file))
+        return cls(directory, name, new_name, target_directory or directory)
+    
+    @property
+    def old_path(self) -> Path:
+        return Path(self.directory, self.name)
+    
+    @property
+    def new_path(self) -> Path:
+        return Path(self.target_directory, self.new_name)
+
+@dataclass(frozen=True)
+class SeriesUnit:
+    """Gruppo di file di una libreria che appartengono alla stessa serie"""
+    __slots__ = ('directory', 'series_name', 'files')
+    directory: Path
+    series_name: str
+    files: Tuple[VideoFile, ...]
+
+# ============================================================================
+# TRACCIAMENTO E PROFILAZIONE
+# ============================================================================
+
+class _NullSpan:
+    """Intervallo inattivo restituito quando il tracciamento è disabilitato"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        return False
+    
+    def set(self, **args):
+        pass
+
+class _Span:
+    """Intervallo temporizzato registrato dal Tracer"""
+    
+    __slots__ = ('tracer', 'name', 'category', 'args', 'start')
+    
+    def __init__(self, tracer: 'Tracer', name: str, category: str, args: Dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer._record(self.name, self.category, self.start, duration, self.args)
+        return False
+    
+    def set(self, **args):
+        """Aggiunge attributi all'intervallo"""
+        self.args.update(args)
+
+class Tracer:
+    """Registra fasi e chiamate HTTP come trace Chrome/Perfetto; nessun costo se disabilitato"""
+    
+    _NULL_SPAN = _NullSpan()
+    
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._events: List[Tuple] = []
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+    
+    def span(self, name: str, category: str = 'stage', **args):
+        """Context manager che misura un intervallo"""
+        if not self.enabled:
+            return self._NULL_SPAN
+        return _Span(self, name, category, args)
+    
+    def count(self, name: str, value: float = 1):
+        """Incrementa un contatore (es. cache hit/miss)"""
+        if self.enabled:
+            with self._lock:
+                self._counters[name] += value
+    
+    def _record(self, name: str, category: str, start: float, duration: float, args: Dict):
+        event = (name, category, start, duration, threading.get_ident(), args)
+        with self._lock:
+            self._events.append(event)
+    
+    def write_chrome_trace(self, path: str):
+        """Scrive gli eventi nel formato JSON di chrome://tracing e Perfetto"""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+            counters = dict(self._counters)
+        
+        trace = [{
+            'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+            'ts': round((start - self._origin) * 1e6, 1), 'dur': round(duration * 1e6, 1),
+            'args': args
+        } for name, category, start, duration, tid, args in events]
+        
+        if counters:
+            end = max((start + duration for _, _, start, duration, _, _ in events), default=self._origin)
+            trace.append({'name': 'counters', 'ph': 'C', 'pid': pid, 'tid': 0,
+                          'ts': round((end - self._origin) * 1e6, 1), 'args': counters})
+        
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    
+    def summary(self) -> List[Tuple[str, str, int, float, float]]:
+        """Aggrega gli intervalli: (categoria, nome, conteggio, totale s, massimo s)"""
+        totals: Dict[Tuple[str, str], List[float]] = {}
+        with self._lock:
+            for name, category, _, duration, _, args in self._events:
+                key = (category, args.get('url', name) if category == 'http' else name)
+                entry = totals.setdefault(key, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += duration
+                entry[2] = max(entry[2], duration)
+        return sorted(((cat, name, int(n), total, peak) for (cat, name), (n, total, peak) in totals.items()),
+                      key=lambda row: row[3], reverse=True)
+    
+    def print_summary(self):
+        """Mostra la tabella riassuntiva dei tempi"""
+        print("\n⏱️  PROFILO ESECUZIONE")
+        print("=" * 100)
+        print(f"{'CATEGORIA':<10} {'NOME':<52} {'N':>6} {'TOTALE s':>10} {'MEDIA ms':>10} {'MAX ms':>8}")
+        print("-" * 100)
+        for category, name, count, total, peak in self.summary():
+            print(f"{category:<10} {name[:52]:<52} {count:>6} {total:>10.3f} "
+                  f"{total / count * 1000:>10.1f} {peak * 1000:>8.1f}")
+        
+        with self._lock:
+            counters = sorted(self._counters.items())
+        if counters:
+            print("-" * 100)
+            for name, value in counters:
+                print(f"{'counter':<10} {name:<52} {value:>6g}")
+        print("=" * 100)
+
+# Tracer globale dell'applicazione (abilitato da --trace-out / --profile)
+TRACER = Tracer()
 
 # ============================================================================
 # UTILITÀ E COSTANTI
@@ -110,23 +432,159 @@ class Constants:
         'stranger things': 'Stranger Things',
         'quantum leap': 'Quantum Leap'
     }
+    
+    # Durata della cache dei metadati (secondi)
+    CACHE_TTL_SEARCH = 24 * 3600
+    CACHE_TTL_AIRING = 12 * 3600
+    CACHE_TTL_ENDED = 90 * 24 * 3600
+    # Risultati vuoti (serie o stagione inesistente) ed errori di rete
+    CACHE_TTL_NEGATIVE = 6 * 3600
+    CACHE_TTL_ERROR = 5 * 60
+    
+    # Ricerca parallela sui provider: dopo la prima risposta utile gli altri
+    # hanno al massimo SEARCH_HEDGE_GRACE secondi (prima si attende senza limite:
+    # ogni richiesta è già limitata da timeout e tentativi del client HTTP)
+    SEARCH_HEDGE_GRACE = 0.3
+    ENDED_STATUSES = {'ended', 'canceled', 'cancelled'}
+
+class IgnoreRules:
+    """Regole di esclusione per la scansione (cartelle di sistema e .tvrenamerignore)"""
+    
+    IGNORE_FILE = '.tvrenamerignore'
+    DEFAULT_PATTERNS = (
+        '@eaDir', '#recycle', '#snapshot', '.@__thumb', '$RECYCLE.BIN',
+        'System Volume Information', 'lost+found', 'Sample', 'Samples'
+    )
+    
+    def __init__(self, patterns: Tuple[str, ...] = DEFAULT_PATTERNS):
+        self.patterns = tuple(patterns)
+        self._regex = re.compile(
+            '|'.join(fnmatch.translate(pattern) for pattern in self.patterns) or r'(?!)',
+            re.IGNORECASE
+        )
+    
+    def matches(self, name: str) -> bool:
+        """Verifica se un nome di file o cartella va escluso"""
+        return self._regex.match(name) is not None
+    
+    def extend_from(self, directory: str) -> 'IgnoreRules':
+        """Aggiunge i pattern del file .tvrenamerignore (validi per la cartella e le sottocartelle)"""
+        try:
+            with open(os.path.join(directory, self.IGNORE_FILE), encoding='utf-8') as f:
+                extra = tuple(line.strip().rstrip('/') for line in f
+                              if line.strip() and not line.lstrip().startswith('#'))
+        except OSError:
+            return self
+        return IgnoreRules(self.patterns + extra) if extra else self
 
 class FileUtils:
     """Utilità per la gestione dei file"""
     
+    _WHITESPACE_RE = re.compile(r'\s+')
+    
     @staticmethod
-    def find_video_files(directory: Path, recursive: bool = False) -> List[Path]:
+    def find_video_files(directory: Path, recursive: bool = False, max_depth: Optional[int] = None,
+                         workers: int = 1) -> List[VideoFile]:
         """Trova tutti i file video in una directory"""
-        files = []
-        pattern = directory.rglob('*') if recursive else directory.iterdir()
+        return sorted(FileUtils.iter_video_files(directory, recursive, max_depth, workers))
+    
+    @classmethod
+    def iter_video_files(cls, directory: Path, recursive: bool = False, max_depth: Optional[int] = None,
+                         workers: int = 1, rules: Optional[IgnoreRules] = None) -> Iterator[VideoFile]:
+        """Genera i file video man mano che vengono trovati (os.scandir, senza stat per file)"""
+        if not recursive:
+            max_depth = 0
+        rules = rules or IgnoreRules()
+        
+        if workers > 1:
+            yield from cls._walk_parallel(str(directory), rules, max_depth, workers)
+            return
         
-        for file_path in pattern:
-            if (file_path.is_file() and 
-                file_path.suffix.lower() in Constants.VIDEO_EXTENSIONS and
-                not file_path.name.startswith('.')):
-                files.append(file_path)
+        stack = [(str(directory), 0, rules)]
+        while stack:
+            path, depth, dir_rules = stack.pop()
+            files, subdirs, dir_rules = cls.scan_directory(path, dir_rules)
+            yield from files
+            
+            if max_depth is None or depth < max_depth:
+                # Ordine inverso sullo stack per visitare le sottocartelle in ordine alfabetico
+                stack.extend((sub, depth + 1, dir_rules) for sub in reversed(subdirs))
+    
+    @staticmethod
+    def scan_directory(path: str, rules: IgnoreRules) -> Tuple[List[VideoFile], List[str], IgnoreRules]:
+        """Legge una cartella: restituisce file video, sottocartelle e regole valide al suo interno"""
+        try:
+            with os.scandir(path) as iterator:
+                entries = sorted(iterator, key=lambda entry: entry.name)
+        except OSError:
+            return [], [], rules
+        
+        if any(entry.name == IgnoreRules.IGNORE_FILE for entry in entries):
+            rules = rules.extend_from(path)
+        
+        files, subdirs = [], []
+        for entry in entries:
+            if entry.name.startswith('.') or rules.matches(entry.name):
+                continue
+            try:
+                # DirEntry riusa il tipo restituito da readdir: nessuna stat sui file normali
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif (os.path.splitext(entry.name)[1].lower() in Constants.VIDEO_EXTENSIONS and
+                      entry.is_file()):
+                    # Una sola stringa di cartella condivisa da tutti i file (niente Path per file)
+                    files.append(VideoFile(path, entry.name))
+            except OSError:
+                continue
+        
+        return files, subdirs, rules
+    
+    @classmethod
+    def _walk_parallel(cls, root: str, rules: IgnoreRules, max_depth: Optional[int],
+                       workers: int) -> Iterator[VideoFile]:
+        """Visita le cartelle sorelle in parallelo (utile su NFS/SMB ad alta latenza)"""
+        results: queue.Queue = queue.Queue()
+        done = object()
+        pending = [0]
+        pending_lock = threading.Lock()
+        # Generatore chiuso in anticipo: nessuna nuova cartella da visitare
+        stopped = threading.Event()
         
-        return sorted(files)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            def submit(path: str, depth: int, dir_rules: IgnoreRules):
+                with pending_lock:
+                    if stopped.is_set():
+                        return
+                    pending[0] += 1
+                    executor.submit(scan, path, depth, dir_rules)
+            
+            def scan(path: str, depth: int, dir_rules: IgnoreRules):
+                try:
+                    if stopped.is_set():
+                        return
+                    files, subdirs, dir_rules = cls.scan_directory(path, dir_rules)
+                    for file_path in files:
+                        results.put(file_path)
+                    if max_depth is None or depth < max_depth:
+                        for sub in subdirs:
+                            submit(sub, depth + 1, dir_rules)
+                finally:
+                    with pending_lock:
+                        pending[0] -= 1
+                        if pending[0] == 0:
+                            results.put(done)
+            
+            submit(root, 0, rules)
+            try:
+                while True:
+                    item = results.get()
+                    if item is done:
+                        break
+                    yield item
+            finally:
+                # Sotto il lock: dopo questo punto nessun worker chiama più executor.submit
+                with pending_lock:
+                    stopped.set()
     
     @staticmethod
     def clean_filename(name: str) -> str:
@@ -136,38 +594,641 @@ class FileUtils:
         for char in invalid_chars:
             name = name.replace(char, '')
         name = name.replace('&', 'and')
-        return re.sub(r'\s+', ' ', name).strip()
+        return FileUtils._WHITESPACE_RE.sub(' ', name).strip()
+
+class FilenameParser:
+    """Analizzatore dei nomi file: una sola passata con pattern precompilati e combinati"""
+    
+    # Marcatori stagione/episodio (in ordine di priorità: S01E01(E02...), 1x01, Season 1 ... Episode 1)
+    # e tag di qualità in un'unica espressione. "Season" non consuma le cifre, così un eventuale
+    # 1x01 successivo resta visibile; il lookahead iniziale scarta subito le posizioni inutili.
+    TOKEN_RE = re.compile(
+        r'(?=[0-9SsXxHhWwBbDd])(?:'
+        r'(?P<sxe>[Ss](?P<s1>\d+)[Ee](?P<e1>\d+)(?P<more>(?:-?[Ee]\d+)*))'
+        r'|(?P<nxm>(?P<s2>\d+)[Xx](?P<e2>\d+))'
+        r'|(?P<long>(?i:season)\s*(?=(?P<s3>\d+))(?:(?=.*(?i:episode)\s*(?P<e3>\d+)))?)'
+        r'|(?<![A-Za-z0-9])(?P<quality>(?i:2160p|1080p|720p|480p|4K|HDTV|WEB-?DL|WEBRip|BluRay|'
+        r'BDRip|DVDRip|x264|x265|H\.?264|H\.?265|HEVC))(?![A-Za-z0-9]))'
+    )
+    MARKER_PRIORITY = {'sxe': 0, 'nxm': 1, 'long': 2}
+    EXTRA_EPISODE_RE = re.compile(r'(-?)[Ee](\d+)')
+    GROUP_SUFFIX_RE = re.compile(r'-([A-Za-z0-9]+)(?:\[[^\]]*\])?$')
+    GROUP_PREFIX_RE = re.compile(r'^\[([^\]]+)\]')
+    
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def parse(text: str) -> ParsedFilename:
+        """Analizza un nome file, con o senza estensione (risultato memorizzato per nome)"""
+        cls = FilenameParser
+        stem, extension = os.path.splitext(text)
+        if extension.lower() in Constants.VIDEO_EXTENSIONS:
+            text = stem
+        
+        marker_position = title_end = len(text)
+        best = best_priority = None
+        quality = []
+        quality_end = 0
+        
+        for match in cls.TOKEN_RE.finditer(text):
+            kind = match.lastgroup
+            start = match.start()
+            
+            if kind == 'quality':
+                quality.append(match.group(kind))
+                quality_end = match.end()
+                if start < title_end:
+                    title_end = start
+                continue
+            
+            if start < marker_position:
+                marker_position = start
+            if kind == 'long':
+                if match.group('e3') is None:
+                    continue  # "Season N" senza episodio: conta solo per la posizione
+            elif start < title_end:
+                title_end = start
+            
+            priority = cls.MARKER_PRIORITY[kind]
+            if best is None or priority < best_priority:
+                best, best_priority = match, priority
+        
+        season, episodes, marker_end = None, (), 0
+        if best is not None:
+            marker_end = best.end()
+            if best_priority == 0:
+                season = int(best.group('s1'))
+                episodes = cls._episode_list(int(best.group('e1')), best.group('more'))
+            elif best_priority == 1:
+                season, episodes = int(best.group('s2')), (int(best.group('e2')),)
+            else:
+                season, episodes = int(best.group('s3')), (int(best.group('e3')),)
+        
+        # Gruppo di rilascio: "-GRUPPO" finale dopo marcatori/qualità, oppure "[Gruppo]" iniziale
+        release_group = None
+        dash = text.rfind('-')
+        if dash >= marker_end and dash >= quality_end and (episodes or quality):
+            suffix_match = cls.GROUP_SUFFIX_RE.match(text, dash)
+            if suffix_match:
+                release_group = suffix_match.group(1)
+        if release_group is None and text.startswith('['):
+            prefix_match = cls.GROUP_PREFIX_RE.match(text)
+            if prefix_match:
+                release_group = prefix_match.group(1)
+        
+        has_marker = marker_position < len(text)
+        return ParsedFilename(
+            series_prefix=text[:marker_position].strip(),
+            season=season,
+            episodes=episodes,
+            marker_position=marker_position if has_marker else None,
+            title_end=title_end,
+            quality=tuple(dict.fromkeys(quality)) if len(quality) > 1 else tuple(quality),
+            release_group=release_group
+        )
+    
+    @classmethod
+    def _episode_list(cls, first: int, more: str) -> Tuple[int, ...]:
+        """Episodi multipli: S01E01E02 (elenco) o S01E01-E03 (intervallo)"""
+        episodes = [first]
+        for dash, number in cls.EXTRA_EPISODE_RE.findall(more or ''):
+            number = int(number)
+            if dash and number > episodes[-1]:
+                episodes.extend(range(episodes[-1] + 1, number + 1))
+            elif number not in episodes:
+                episodes.append(number)
+        return tuple(episodes)
+
+class ContentFingerprint:
+    """Impronta rapida del contenuto: dimensione più hash dei primi e degli ultimi 64 KiB
+    
+    Legge poche centinaia di KB per file (tramite mmap) e distingue le copie
+    identiche dalle release diverse dello stesso episodio.
+    """
+    
+    SAMPLE = 64 * 1024
+    WORKERS = 8
+    
+    @classmethod
+    def compute_many(cls, paths: List[str]) -> Dict[str, Tuple[int, str]]:
+        """Impronte (dimensione, hash) calcolate in parallelo; i file illeggibili sono omessi"""
+        def compute(path: str) -> Optional[Tuple[int, str]]:
+            try:
+                return cls.compute(path)
+            except OSError:
+                return None
+        
+        if len(paths) <= 1:
+            results = [compute(path) for path in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=min(cls.WORKERS, len(paths)), thread_name_prefix='hash') as pool:
+                results = list(pool.map(compute, paths))
+        return {path: result for path, result in zip(paths, results) if result is not None}
+    
+    @classmethod
+    def compute(cls, path: str) -> Tuple[int, str]:
+        st = os.stat(path)
+        return st.st_size, cls._digest(path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    
+    @classmethod
+    @lru_cache(maxsize=65536)
+    def _digest(cls, path: str, device: int, inode: int, size: int, mtime_ns: int) -> str:
+        # Cache per inode e mtime: un file riscritto cambia chiave e viene ricalcolato
+        digest = hashlib.blake2b(size.to_bytes(8, 'little'), digest_size=16)
+        if size == 0:
+            return digest.hexdigest()
+        with open(path, 'rb') as f:
+            try:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    digest.update(data[:cls.SAMPLE])
+                    digest.update(data[max(cls.SAMPLE, size - cls.SAMPLE):])
+            except (OSError, ValueError):
+                # Filesystem senza mmap (alcuni mount di rete): lettura con seek
+                digest.update(f.read(cls.SAMPLE))
+                if size > cls.SAMPLE:
+                    f.seek(max(cls.SAMPLE, size - cls.SAMPLE))
+                    digest.update(f.read(cls.SAMPLE))
+        return digest.hexdigest()
+
+class MediaProbe:
+    """Legge risoluzione, codec e durata dalle sole intestazioni MKV (EBML) e MP4 (moov)
+    
+    Gli elementi non necessari vengono saltati con seek in base alla loro
+    dimensione: i dati audio/video non vengono mai letti, pochi KB per file.
+    """
+    
+    WORKERS = 8
+    # Limite per un singolo valore letto: oltre, l'intestazione è considerata non valida
+    MAX_VALUE = 64 * 1024
+    
+    # EBML / Matroska
+    EBML = 0x1A45DFA3
+    SEGMENT = 0x18538067
+    SEEK_HEAD, SEEK, SEEK_ID, SEEK_POSITION = 0x114D9B74, 0x4DBB, 0x53AB, 0x53AC
+    INFO, TIMECODE_SCALE, DURATION = 0x1549A966, 0x2AD7B1, 0x4489
+    TRACKS, TRACK_ENTRY, TRACK_TYPE, CODEC_ID = 0x1654AE6B, 0xAE, 0x83, 0x86
+    VIDEO, PIXEL_WIDTH, PIXEL_HEIGHT = 0xE0, 0xB0, 0xBA
+    CLUSTER = 0x1F43B675
+    
+    MKV_CODECS = {
+        'V_MPEG4/ISO/AVC': 'h264', 'V_MPEGH/ISO/HEVC': 'hevc', 'V_AV1': 'av1', 'V_VP9': 'vp9',
+        'V_VP8': 'vp8', 'V_MPEG4/ISO/ASP': 'mpeg4', 'V_MPEG4/ISO/SP': 'mpeg4', 'V_MPEG4/ISO/AP': 'mpeg4',
+        'V_MPEG2': 'mpeg2', 'V_MPEG1': 'mpeg1', 'V_MS/VFW/FOURCC': 'vfw'
+    }
+    MP4_CODECS = {
+        b'avc1': 'h264', b'avc3': 'h264', b'hvc1': 'hevc', b'hev1': 'hevc', b'av01': 'av1',
+        b'vp09': 'vp9', b'mp4v': 'mpeg4', b'dvh1': 'hevc', b'dvhe': 'hevc'
+    }
+    MP4_TOP_LEVEL = {b'ftyp', b'moov', b'mdat', b'free', b'skip', b'wide', b'pdin'}
+    
+    @classmethod
+    def probe_many(cls, paths: List[str]) -> Dict[str, MediaInfo]:
+        """Intestazioni lette in parallelo; file non riconosciuti o illeggibili sono omessi"""
+        if len(paths) <= 1:
+            results = [cls.probe(path) for path in paths]
+        else:
+            with ThreadPoolExecutor(max_workers=min(cls.WORKERS, len(paths)), thread_name_prefix='probe') as pool:
+                results = list(pool.map(cls.probe, paths))
+        return {path: info for path, info in zip(paths, results) if info is not None}
+    
+    @classmethod
+    def probe(cls, path: str) -> Optional[MediaInfo]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return cls._probe(path, st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+    
+    @classmethod
+    @lru_cache(maxsize=65536)
+    def _probe(cls, path: str, device: int, inode: int, size: int, mtime_ns: int) -> Optional[MediaInfo]:
+        # Cache per inode e mtime, come le impronte dei duplicati
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(8)
+                if head[:4] == struct.pack('>I', cls.EBML):
+                    return cls._probe_mkv(f, size)
+                if head[4:8] in cls.MP4_TOP_LEVEL:
+                    return cls._probe_mp4(f, size)
+        except (OSError, ValueError, struct.error):
+            return None
+        return None
+    
+    # ------------------------------------------------------------------
+    # Matroska
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def _probe_mkv(cls, f, file_size: int) -> Optional[MediaInfo]:
+        segment = next(((start, size) for element_id, start, size in cls._elements(f, 0, file_size)
+                        if element_id == cls.SEGMENT), None)
+        if segment is None:
+            return None
+        segment_start = segment[0]
+        segment_end = file_size if segment[1] is None else min(segment_start + segment[1], file_size)
+        
+        sections: Dict[int, Tuple[int, int]] = {}
+        positions: Dict[int, int] = {}
+        for element_id, start, size in cls._elements(f, segment_start, segment_end):
+            if element_id == cls.CLUSTER or size is None:
+                break
+            if element_id == cls.SEEK_HEAD:
+                positions.update(cls._mkv_seek_head(f, start, start + size))
+            elif element_id in (cls.INFO, cls.TRACKS):
+                sections[element_id] = (start, start + size)
+                if len(sections) == 2:
+                    break
+        
+        # Info o Tracks dopo i cluster: si raggiungono con la posizione indicata dal SeekHead
+        for element_id in (cls.INFO, cls.TRACKS):
+            if element_id not in sections and element_id in positions:
+                found = next(iter(cls._elements(f, segment_start + positions[element_id], segment_end)), None)
+                if found and found[0] == element_id and found[2] is not None:
+                    sections[element_id] = (found[1], found[1] + found[2])
+        
+        if cls.TRACKS not in sections:
+            return None
+        video = cls._mkv_video_track(f, *sections[cls.TRACKS])
+        if video is None:
+            return None
+        duration = cls._mkv_duration(f, *sections[cls.INFO]) if cls.INFO in sections else 0.0
+        width, height, codec = video
+        return MediaInfo(width, height, codec, duration)
+    
+    @classmethod
+    def _mkv_seek_head(cls, f, start: int, end: int) -> Dict[int, int]:
+        positions = {}
+        for element_id, seek_start, seek_size in cls._elements(f, start, end):
+            if element_id != cls.SEEK or seek_size is None:
+                continue
+            target = position = None
+            for child_id, child_start, child_size in cls._elements(f, seek_start, seek_start + seek_size):
+                if child_id == cls.SEEK_ID:
+                    target = cls._read_uint(f, child_start, child_size)
+                elif child_id == cls.SEEK_POSITION:
+                    position = cls._read_uint(f, child_start, child_size)
+            if target is not None and position is not None:
+                positions.setdefault(target, position)
+        return positions
+    
+    @classmethod
+    def _mkv_video_track(cls, f, start: int, end: int) -> Optional[Tuple[int, int, str]]:
+        for element_id, entry_start, entry_size in cls._elements(f, start, end):
+            if element_id != cls.TRACK_ENTRY or entry_size is None:
+                continue
+            track_type, codec, width, height = None, '', 0, 0
+            for child_id, child_start, child_size in cls._elements(f, entry_start, entry_start + entry_size):
+                if child_id == cls.TRACK_TYPE:
+                    track_type = cls._read_uint(f, child_start, child_size)
+                elif child_id == cls.CODEC_ID:
+                    codec = cls._read(f, child_start, child_size).decode('ascii', 'ignore').rstrip('\0')
+                elif child_id == cls.VIDEO and child_size is not None:
+                    for video_id, video_start, video_size in cls._elements(f, child_start, child_start + child_size):
+                        if video_id == cls.PIXEL_WIDTH:
+                            width = cls._read_uint(f, video_start, video_size)
+                        elif video_id == cls.PIXEL_HEIGHT:
+                            height = cls._read_uint(f, video_start, video_size)
+            if track_type == 1:
+                return width, height, cls.MKV_CODECS.get(codec, codec.lower())
+        return None
+    
+    @classmethod
+    def _mkv_duration(cls, f, start: int, end: int) -> float:
+        scale, duration = 1000000, 0.0
+        for element_id, child_start, child_size in cls._elements(f, start, end):
+            if element_id == cls.TIMECODE_SCALE:
+                scale = cls._read_uint(f, child_start, child_size)
+            elif element_id == cls.DURATION and child_size in (4, 8):
+                duration = struct.unpack('>f' if child_size == 4 else '>d', cls._read(f, child_start, child_size))[0]
+        return duration * scale / 1e9
+    
+    @classmethod
+    def _elements(cls, f, start: int, end: int) -> Iterator[Tuple[int, int, Optional[int]]]:
+        """(id, inizio dei dati, dimensione o None se sconosciuta) degli elementi tra start e end"""
+        position = start
+        while position < end:
+            f.seek(position)
+            element_id = cls._vint(f, 4, keep_marker=True)
+            if element_id is None:
+                return
+            size = cls._vint(f, 8)
+            data = f.tell()
+            yield element_id, data, size
+            if size is None:
+                return
+            position = data + size
+    
+    @staticmethod
+    def _vint(f, max_length: int, keep_marker: bool = False) -> Optional[int]:
+        """Intero a lunghezza variabile EBML; per le dimensioni, tutti i bit a 1 indicano "sconosciuta" """
+        first = f.read(1)
+        if not first:
+            return None
+        length, mask = 1, 0x80
+        while length <= max_length and not first[0] & mask:
+            length += 1
+            mask >>= 1
+        if length > max_length:
+            raise ValueError("intero EBML non valido")
+        rest = f.read(length - 1)
+        if len(rest) < length - 1:
+            return None
+        value = first[0] if keep_marker else first[0] & (mask - 1)
+        for byte in rest:
+            value = (value << 8) | byte
+        if not keep_marker and value == (1 << (7 * length)) - 1:
+            return None
+        return value
+    
+    # ------------------------------------------------------------------
+    # MP4 / MOV
+    # ------------------------------------------------------------------
+    
+    @classmethod
+    def _probe_mp4(cls, f, file_size: int) -> Optional[MediaInfo]:
+        moov = cls._box(f, 0, file_size, b'moov')
+        if moov is None:
+            return None
+        
+        duration = 0.0
+        mvhd = cls._box(f, *moov, b'mvhd')
+        if mvhd is not None:
+            data = cls._read(f, mvhd[0], min(mvhd[1] - mvhd[0], 32))
+            if data[0] == 1:
+                timescale, length = struct.unpack('>IQ', data[20:32])
+            else:
+                timescale, length = struct.unpack('>II', data[12:20])
+            duration = length / timescale if timescale else 0.0
+        
+        for kind, start, end in cls._boxes(f, *moov):
+            if kind != b'trak':
+                continue
+            mdia = cls._box(f, start, end, b'mdia')
+            hdlr = cls._box(f, *mdia, b'hdlr') if mdia else None
+            if hdlr is None or cls._read(f, hdlr[0] + 8, 4) != b'vide':
+                continue
+            
+            width = height = 0
+            tkhd = cls._box(f, start, end, b'tkhd')
+            if tkhd is not None:
+                offset = 88 if cls._read(f, tkhd[0], 1) == b'\x01' else 76
+                width, height = (value >> 16 for value in struct.unpack('>II', cls._read(f, tkhd[0] + offset, 8)))
+            
+            codec = ''
+            minf = cls._box(f, *mdia, b'minf')
+            stbl = cls._box(f, *minf, b'stbl') if minf else None
+            stsd = cls._box(f, *stbl, b'stsd') if stbl else None
+            if stsd is not None:
+                entry = cls._read(f, stsd[0] + 8, 36)
+                codec = cls.MP4_CODECS.get(entry[4:8], entry[4:8].decode('ascii', 'ignore').strip())
+                # Dimensioni codificate nella sample entry se tkhd non le riporta
+                if not width and len(entry) >= 36:
+                    width, height = struct.unpack('>HH', entry[32:36])
+            return MediaInfo(width, height, codec, duration)
+        return None
+    
+    @classmethod
+    def _box(cls, f, start: int, end: int, kind: bytes) -> Optional[Tuple[int, int]]:
+        return next(((box_start, box_end) for box_kind, box_start, box_end in cls._boxes(f, start, end)
+                     if box_kind == kind), None)
+    
+    @staticmethod
+    def _boxes(f, start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+        """(tipo, inizio dei dati, fine) dei box tra start e end, saltando il contenuto"""
+        position = start
+        while position + 8 <= end:
+            f.seek(position)
+            header = f.read(8)
+            if len(header) < 8:
+                return
+            size, kind = struct.unpack('>I4s', header)
+            data = position + 8
+            if size == 1:
+                size = struct.unpack('>Q', f.read(8))[0]
+                data += 8
+            elif size == 0:
+                size = end - position
+            if size < data - position:
+                return
+            yield kind, data, min(position + size, end)
+            position += size
+    
+    @classmethod
+    def _read(cls, f, start: int, size: Optional[int]) -> bytes:
+        if size is None or size > cls.MAX_VALUE:
+            raise ValueError("valore d'intestazione troppo grande")
+        f.seek(start)
+        return f.read(size)
+    
+    @classmethod
+    def _read_uint(cls, f, start: int, size: Optional[int]) -> int:
+        return int.from_bytes(cls._read(f, start, size), 'big')
 
 class PatternUtils:
     """Utilità per l'estrazione di pattern dai nomi file"""
     
-    SEASON_EPISODE_PATTERNS = [
-        r'[Ss](\d+)[Ee](\d+)',
-        r'(\d+)x(\d+)',
-        r'[Ss]eason\s*(\d+).*[Ee]pisode\s*(\d+)'
-    ]
-    
     @classmethod
     def extract_season_episode(cls, filename: str) -> Tuple[Optional[int], Optional[int]]:
         """Estrae numero stagione e episodio dal nome file"""
-        for pattern in cls.SEASON_EPISODE_PATTERNS:
-            match = re.search(pattern, filename, re.IGNORECASE)
-            if match:
-                return int(match.group(1)), int(match.group(2))
-        return None, None
+        parsed = FilenameParser.parse(filename)
+        return parsed.season, parsed.episode
     
     @classmethod
     def find_season_episode_position(cls, text: str) -> int:
         """Trova la posizione del pattern stagione/episodio nel testo"""
-        patterns = [r'[Ss]\d+[Ee]\d+', r'\d+x\d+', r'[Ss]eason\s*\d+']
-        earliest = len(text)
+        position = FilenameParser.parse(text).marker_position
+        return position if position is not None else len(text)
+
+# ============================================================================
+# INDICE ALIAS SERIE
+# ============================================================================
+
+class _AliasTable:
+    """Tabella degli alias: dizionario esatto e indice di trigrammi costruito al primo uso"""
+    
+    __slots__ = ('exact', 'keys', '_postings', '_lock')
+    
+    def __init__(self, exact: Dict[str, str]):
+        self.exact = exact
+        self.keys = list(exact)
+        self._postings: Optional[Dict[str, List[int]]] = None
+        self._lock = threading.Lock()
+    
+    def postings(self) -> Dict[str, List[int]]:
+        """Trigramma -> indici delle chiavi che lo contengono"""
+        if self._postings is None:
+            with self._lock:
+                if self._postings is None:
+                    postings: Dict[str, List[int]] = {}
+                    for index, key in enumerate(self.keys):
+                        for gram in AliasIndex.trigrams(key):
+                            postings.setdefault(gram, []).append(index)
+                    self._postings = postings
+        return self._postings
+
+class AliasIndex:
+    """Alias dei nomi serie: chiave normalizzata esatta più indice di trigrammi per i nomi simili"""
+    
+    FILE_NAME = 'aliases.txt'
+    # Secondi minimi fra due controlli del file per la ricarica a caldo
+    RELOAD_INTERVAL = 2.0
+    # Trigrammi in comune (Dice) per considerare un alias candidato
+    CANDIDATE_THRESHOLD = 0.6
+    # Somiglianza minima del nome e di ogni parola per una correzione approssimata
+    FUZZY_THRESHOLD = 0.85
+    WORD_THRESHOLD = 0.75
+    # Nomi più corti non vengono corretti per somiglianza ('brba' non è 'brb')
+    MIN_FUZZY_LENGTH = 6
+    MAX_CANDIDATES = 20
+    
+    _BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)')
+    _SEPARATORS_RE = re.compile(r'[\s\-\._]+')
+    _NON_WORD_RE = re.compile(r'[^\w\s]')
+    
+    def __init__(self, builtin: Optional[Dict[str, str]] = None):
+        self.path: Optional[Path] = None
+        self._builtin = dict(builtin or {})
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._table = self._build(self._builtin.items())
+    
+    @classmethod
+    def path_for(cls, config: Config) -> Path:
+        """File degli alias indicato o aliases.txt nella directory della cache"""
+        if config.aliases:
+            return Path(config.aliases).expanduser()
+        directory = Path(config.cache_dir).expanduser() if config.cache_dir else PersistentCache.default_directory()
+        return directory / cls.FILE_NAME
+    
+    def use_file(self, path: Path):
+        """Carica gli alias dal file (anche se creato in seguito) e lo tiene sotto controllo"""
+        with self._lock:
+            self.path = path
+            self._signature = None
+        self._checked = time.monotonic()
+        self._reload()
+    
+    def __len__(self) -> int:
+        return len(self._table.keys)
+    
+    @classmethod
+    def normalize(cls, name: str) -> str:
+        """Chiave di confronto: minuscole, senza tag fra parentesi né punteggiatura"""
+        key = cls._BRACKETS_RE.sub(' ', name.lower())
+        key = cls._SEPARATORS_RE.sub(' ', key)
+        return ' '.join(cls._NON_WORD_RE.sub('', key).split())
+    
+    @staticmethod
+    def trigrams(key: str) -> Set[str]:
+        """Trigrammi della chiave, con bordi per pesare inizio e fine"""
+        padded = f"  {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+    
+    def correct(self, name: str) -> Optional[str]:
+        """Nome canonico per un nome rilevato (None se nessun alias corrisponde)"""
+        table = self._current()
+        key = self.normalize(name)
+        if not key:
+            return None
         
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                earliest = min(earliest, match.start())
+        canonical = table.exact.get(key)
+        if canonical:
+            TRACER.count('alias_exact')
+            return canonical
         
-        return earliest
+        match = self._fuzzy(key, table)
+        if match is None:
+            return None
+        TRACER.count('alias_fuzzy')
+        return table.exact[match]
+    
+    def _fuzzy(self, key: str, table: _AliasTable) -> Optional[str]:
+        """Alias più simile sopra la soglia, verificato solo sui candidati con più trigrammi in comune"""
+        if len(key) < self.MIN_FUZZY_LENGTH:
+            return None
+        postings = table.postings()
+        query = self.trigrams(key)
+        counts = Counter()
+        for gram in query:
+            counts.update(postings.get(gram, ()))
+        
+        # Un alias con meno trigrammi in comune non può raggiungere la soglia
+        needed = math.ceil(self.CANDIDATE_THRESHOLD * len(query) / (2 - self.CANDIDATE_THRESHOLD))
+        best, best_score = None, self.FUZZY_THRESHOLD
+        words = key.split()
+        for index, shared in counts.most_common(self.MAX_CANDIDATES):
+            if shared < needed:
+                break
+            candidate = table.keys[index]
+            score = difflib.SequenceMatcher(None, key, candidate).ratio()
+            if score > best_score and self._same_words(words, candidate.split()):
+                best, best_score = candidate, score
+        return best
+    
+    @classmethod
+    def _same_words(cls, words: List[str], other: List[str]) -> bool:
+        """Corregge l'ortografia delle parole, non le sostituisce ('office us' non è 'office uk')"""
+        if len(words) != len(other):
+            return False
+        return all(a == b or difflib.SequenceMatcher(None, a, b).ratio() >= cls.WORD_THRESHOLD
+                   for a, b in zip(words, other))
+    
+    def _current(self) -> _AliasTable:
+        """Tabella in uso, ricaricata se il file è cambiato (controllo a intervalli)"""
+        if self.path is not None:
+            now = time.monotonic()
+            if now - self._checked >= self.RELOAD_INTERVAL:
+                self._checked = now
+                self._reload()
+        return self._table
+    
+    def _reload(self):
+        """Ricostruisce la tabella quando mtime o dimensione del file cambiano"""
+        with self._lock:
+            try:
+                st = self.path.stat()
+                signature = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                signature = None
+            if signature == self._signature:
+                return
+            
+            entries = list(self._builtin.items())
+            if signature is not None:
+                try:
+                    entries.extend(self._read(self.path))
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"⚠️  Impossibile leggere gli alias da {self.path}: {e}")
+                    return
+            # Sostituzione atomica: le ricerche in corso usano la tabella precedente
+            self._table = self._build(entries)
+            self._signature = signature
+    
+    @staticmethod
+    def _read(path: Path) -> Iterator[Tuple[str, str]]:
+        """Righe 'alias = Nome Canonico'; una riga senza '=' registra solo il nome canonico"""
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                alias, _, canonical = line.partition('=')
+                canonical = canonical.strip() or alias.strip()
+                yield alias.strip(), canonical
+    
+    @classmethod
+    def _build(cls, entries: Iterable[Tuple[str, str]]) -> _AliasTable:
+        """Dizionario delle chiavi normalizzate; le voci successive prevalgono"""
+        exact: Dict[str, str] = {}
+        for alias, canonical in entries:
+            # Il nome canonico è anche alias di se stesso (fissa maiuscole e punteggiatura)
+            for key in (cls.normalize(alias), cls.normalize(canonical)):
+                if key:
+                    exact[key] = canonical
+        return _AliasTable(exact)
+
+# Alias globali: correzioni interne più il file caricato da TVSeriesRenamer
+ALIASES = AliasIndex(Constants.SERIES_CORRECTIONS)
 
 # ============================================================================
 # ESTRATTORE NOME SERIE
@@ -176,6 +1237,20 @@ class PatternUtils:
 class SeriesExtractor:
     """Estrattore intelligente del nome della serie dai file"""
     
+    _SEPARATORS_RE = re.compile(r'[\s\-\._]+')
+    _DIR_SUFFIXES_RE = re.compile(
+        r'\.finito|\.completo|\.complete|\.finished|\s*-\s*(complete|completo|finito).*'
+        r'|\s*\(\d{4}\).*|\s*\[.*?\].*|\s*S\d+.*',
+        re.IGNORECASE
+    )
+    _DOTS_RE = re.compile(r'[._]+')
+    _WHITESPACE_RE = re.compile(r'\s+')
+    _BRACKETS_RE = re.compile(r'\[.*?\]|\(.*?\)')
+    _WORD_RE = re.compile(r'[A-Za-z]{3,}')
+    _YEAR_RE = re.compile(r'\.\d{4}|\s+\d{4}|\(\d{4}\)')
+    _NON_WORD_RE = re.compile(r'[^\w\s]')
+    _NUMERIC_RE = re.compile(r'^[\d\s\-\.]+')
+    
     @classmethod
     def extract_from_files(cls, files: List[Path], directory_name: str = "") -> str:
         """Estrae il nome della serie da una lista di file"""
@@ -205,15 +1280,9 @@ class SeriesExtractor:
         series_candidates = []
         
         for file_path in files[:10]:  # Analizza solo i primi 10 file
-            stem = file_path.stem
-            season_pos = PatternUtils.find_season_episode_position(stem)
-            
-            if season_pos > 0:
-                series_part = stem[:season_pos].strip()
-                series_part = re.sub(r'[\s\-\._]+', ' ', series_part)
-                
-                if len(series_part) >= 3:
-                    series_candidates.append(series_part.lower())
+            series_part = cls.series_key(file_path.name)
+            if series_part:
+                series_candidates.append(series_part)
         
         if series_candidates:
             counter = Counter(series_candidates)
@@ -224,26 +1293,31 @@ class SeriesExtractor:
         
         return "Unknown Series"
     
+    @classmethod
+    def series_key(cls, filename: str) -> Optional[str]:
+        """Parte del nome file che precede stagione/episodio, normalizzata"""
+        parsed = FilenameParser.parse(filename)
+        
+        # Senza marcatore si usa l'intero nome file
+        if parsed.marker_position != 0:
+            series_part = cls._SEPARATORS_RE.sub(' ', parsed.series_prefix).strip()
+            
+            if len(series_part) >= 3:
+                return series_part.lower()
+        
+        return None
+    
     @classmethod
     def _extract_from_directory(cls, directory_name: str) -> str:
         """Estrae il nome della serie dal nome della directory"""
         if not directory_name or not cls._is_meaningful_directory(directory_name):
             return "Unknown Series"
         
-        cleaned = directory_name.lower()
-        
         # Rimuovi suffissi comuni
-        suffixes = [
-            r'\.finito', r'\.completo', r'\.complete', r'\.finished',
-            r'\s*-\s*(complete|completo|finito).*', r'\s*\(\d{4}\).*',
-            r'\s*\[.*?\].*', r'\s*S\d+.*'
-        ]
+        cleaned = cls._DIR_SUFFIXES_RE.sub('', directory_name.lower())
         
-        for suffix in suffixes:
-            cleaned = re.sub(suffix, '', cleaned, flags=re.IGNORECASE)
-        
-        cleaned = re.sub(r'[._]+', ' ', cleaned)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        cleaned = cls._DOTS_RE.sub(' ', cleaned)
+        cleaned = cls._WHITESPACE_RE.sub(' ', cleaned).strip()
         
         return cleaned if len(cleaned) >= 3 else "Unknown Series"
     
@@ -253,17 +1327,11 @@ class SeriesExtractor:
         words_counter = Counter()
         
         for file_path in files[:10]:
-            stem = file_path.stem
-            
-            # Rimuovi pattern comuni
-            cleaned = re.sub(r'[Ss]\d+[Ee]\d+.*', '', stem)
-            cleaned = re.sub(r'\d+x\d+.*', '', cleaned)
-            cleaned = re.sub(r'(720p|1080p|480p|2160p|4K|HDTV|WEB-?DL|BluRay|BDRip|DVDRip).*', 
-                           '', cleaned, flags=re.IGNORECASE)
-            cleaned = re.sub(r'\[.*?\]', '', cleaned)
-            cleaned = re.sub(r'\(.*?\)', '', cleaned)
+            # Tieni solo la parte prima di stagione/episodio e tag di qualità
+            cleaned = file_path.stem[:FilenameParser.parse(file_path.name).title_end]
+            cleaned = cls._BRACKETS_RE.sub('', cleaned)
             
-            words = re.findall(r'[A-Za-z]{3,}', cleaned)
+            words = cls._WORD_RE.findall(cleaned)
             for word in words:
                 words_counter[word.lower()] += 1
         
@@ -286,25 +1354,22 @@ class SeriesExtractor:
         cleaned = series_name.lower()
         
         # Rimuovi anni alla fine
-        cleaned = re.sub(r'\.\d{4}', '', cleaned)
-        cleaned = re.sub(r'\s+\d{4}', '', cleaned)
-        cleaned = re.sub(r'\(\d{4}\)', '', cleaned)
+        cleaned = cls._YEAR_RE.sub('', cleaned)
         
-        # Sostituisci separatori con spazi
-        cleaned = re.sub(r'[._\-]+', ' ', cleaned)
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        # Sostituisci separatori (e spazi multipli) con uno spazio
+        cleaned = cls._SEPARATORS_RE.sub(' ', cleaned).strip()
         
-        # Applica correzioni note
-        for incorrect, correct in Constants.SERIES_CORRECTIONS.items():
-            if incorrect in cleaned:
-                return correct
+        # Applica gli alias noti (correzioni interne e file degli alias)
+        corrected = ALIASES.correct(cleaned)
+        if corrected:
+            return corrected
         
         return cleaned.title()
     
     @classmethod
     def _is_meaningful_directory(cls, directory_name: str) -> bool:
         """Verifica se il nome della directory è significativo"""
-        cleaned = re.sub(r'[^\w\s]', '', directory_name.lower().strip())
+        cleaned = cls._NON_WORD_RE.sub('', directory_name.lower().strip())
         
         if len(cleaned) < 3:
             return False
@@ -312,61 +1377,528 @@ class SeriesExtractor:
         if cleaned in Constants.GENERIC_NAMES:
             return False
         
-        if re.match(r'^[\d\s\-\.]+', cleaned):
+        if cls._NUMERIC_RE.match(cleaned):
             return False
         
         return True
 
 # ============================================================================
-# COSTRUTTORE NOMI FILE
+# SCANSIONE LIBRERIA
 # ============================================================================
 
-class FilenameBuilder:
-    """Costruttore di nomi file per diversi formati"""
+class LibraryScanner:
+    """Suddivide una libreria in unità per serie (per cartella e per nome estratto)"""
     
-    FORMAT_TEMPLATES = {
-        FormatStyle.STANDARD: "{series} - S{season:02d}E{episode:02d} - {title}{ext}",
-        FormatStyle.PLEX: "{series} - S{season:02d}E{episode:02d} - {title}{ext}",
-        FormatStyle.SIMPLE: "{series} {season}x{episode:02d} {title}{ext}",
-        FormatStyle.MINIMAL: "{series} S{season:02d}E{episode:02d}{ext}",
+    @classmethod
+    def iter_units(cls, root: Path, max_depth: Optional[int] = None, workers: int = 1,
+                   file_filter: Optional[Callable[[List[Path]], List[Path]]] = None) -> Iterator[SeriesUnit]:
+        """Genera le unità man mano che le cartelle delle serie vengono scansionate"""
+        loose_files, subdirs, rules = FileUtils.scan_directory(str(root), IgnoreRules())
+        if file_filter:
+            loose_files = file_filter(loose_files)
+        
+        # File direttamente nella radice: raggruppati solo per nome estratto
+        yield from cls.split_by_name(root, loose_files)
+        
+        if max_depth is not None and max_depth < 1:
+            return
+        sub_depth = max_depth - 1 if max_depth is not None else None
+        
+        def scan_folder(path: str) -> List[SeriesUnit]:
+            folder = Path(path)
+            with TRACER.span('scan', folder=folder.name):
+                files = sorted(FileUtils.iter_video_files(folder, True, sub_depth, rules=rules))
+                if file_filter:
+                    files = file_filter(files)
+            with TRACER.span('extraction', folder=folder.name):
+                return list(cls.split_by_name(folder, files))
+        
+        # Le cartelle delle serie sono scansionate in parallelo e consegnate appena pronte
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(scan_folder, path) for path in subdirs]
+            for future in as_completed(futures):
+                yield from future.result()
+    
+    @classmethod
+    def split_by_name(cls, directory: Path, files: List[Path]) -> Iterator[SeriesUnit]:
+        """Divide i file di una cartella in base al nome serie estratto"""
+        if not files:
+            return
+        
+        groups: Dict[Optional[str], List[Path]] = {}
+        for file_path in files:
+            groups.setdefault(SeriesExtractor.series_key(file_path.name), []).append(file_path)
+        
+        # I file senza nome riconoscibile seguono il gruppo più numeroso della cartella
+        unnamed = groups.pop(None, [])
+        if groups and unnamed:
+            largest = max(groups, key=lambda key: len(groups[key]))
+            groups[largest].extend(unnamed)
+        elif unnamed:
+            groups[None] = unnamed
+        
+        for group_files in groups.values():
+            group_files.sort()
+            series_name = SeriesExtractor.extract_from_files(group_files, directory.name)
+            yield SeriesUnit(directory=directory, series_name=series_name, files=tuple(group_files))
+
+# ============================================================================
+# MONITORAGGIO CARTELLE (MODALITÀ WATCH)
+# ============================================================================
+
+class InotifyWatcher:
+    """Notifiche del kernel Linux (inotify via ctypes) sui nuovi file di un albero"""
+    
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    
+    _EVENT = struct.Struct('iIII')
+    
+    def __init__(self, root: Path, max_depth: Optional[int] = None):
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify disponibile solo su Linux")
+        
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        
+        self.root = root
+        self.max_depth = max_depth
+        self._watches: Dict[int, Tuple[str, int, IgnoreRules]] = {}
+        try:
+            self._add_tree(str(root), 0, IgnoreRules())
+        except OSError:
+            self.close()
+            raise
+    
+    def poll(self, timeout: float) -> List[VideoFile]:
+        """Attende fino a timeout secondi e restituisce i file creati o spostati nell'albero"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            
+            if mask & self.IN_Q_OVERFLOW:
+                # Coda del kernel piena: si recupera rileggendo tutto l'albero
+                paths.extend(FileUtils.iter_video_files(self.root, True, self.max_depth))
+                continue
+            if mask & self.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if wd not in self._watches or not name:
+                continue
+            
+            directory, depth, rules = self._watches[wd]
+            if name.startswith('.') or rules.matches(name):
+                continue
+            path = os.path.join(directory, name)
+            
+            if mask & self.IN_ISDIR:
+                # Cartella nuova (es. stagione completa spostata): la si osserva e se ne leggono i file
+                if self.max_depth is None or depth < self.max_depth:
+                    self._add_tree(path, depth + 1, rules)
+                    remaining = None if self.max_depth is None else self.max_depth - depth - 1
+                    paths.extend(FileUtils.iter_video_files(Path(path), True, remaining, rules=rules))
+            elif mask & (self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE):
+                paths.append(VideoFile(directory, name))
+        
+        return paths
+    
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+    
+    def _add_tree(self, top: str, depth: int, rules: IgnoreRules):
+        """Aggiunge un watch per ogni cartella del sottoalbero (rispettando profondità e esclusioni)"""
+        stack = [(top, depth, rules)]
+        while stack:
+            path, level, parent_rules = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+            if wd < 0:
+                errno = ctypes.get_errno()
+                # ENOSPC: raggiunto fs.inotify.max_user_watches
+                raise OSError(errno, f"inotify_add_watch {path}: {os.strerror(errno)}")
+            
+            _, subdirs, folder_rules = FileUtils.scan_directory(path, parent_rules)
+            self._watches[wd] = (path, level, folder_rules)
+            if self.max_depth is None or level < self.max_depth:
+                stack.extend((subdir, level + 1, folder_rules) for subdir in subdirs)
+
+class PollingWatcher:
+    """Alternativa portabile: confronta periodicamente l'elenco dei file (scandir, senza stat)"""
+    
+    INTERVAL = 10.0
+    
+    def __init__(self, root: Path, max_depth: Optional[int] = None, workers: int = 1):
+        self.root = root
+        self.max_depth = max_depth
+        self.workers = workers
+        self._known = self._snapshot()
+        self._next_scan = time.monotonic() + self.INTERVAL
+    
+    def poll(self, timeout: float) -> List[VideoFile]:
+        """Restituisce i file comparsi dall'ultima scansione"""
+        delay = self._next_scan - time.monotonic()
+        if delay > 0:
+            time.sleep(min(timeout, delay))
+            return []
+        
+        current = self._snapshot()
+        new_files = current - self._known
+        self._known = current
+        self._next_scan = time.monotonic() + self.INTERVAL
+        return sorted(new_files)
+    
+    def close(self):
+        pass
+    
+    def _snapshot(self) -> Set[VideoFile]:
+        return set(FileUtils.iter_video_files(self.root, True, self.max_depth, self.workers))
+
+def create_watcher(root: Path, max_depth: Optional[int] = None, workers: int = 1):
+    """Usa inotify se disponibile, altrimenti il polling"""
+    try:
+        return InotifyWatcher(root, max_depth)
+    except (OSError, AttributeError) as e:
+        print(f"⚠️  inotify non disponibile ({e}), controllo periodico ogni {PollingWatcher.INTERVAL:.0f}s")
+        return PollingWatcher(root, max_depth, workers)
+
+class FileSettler:
+    """Rimanda l'elaborazione dei file finché dimensione e mtime non restano stabili"""
+    
+    # File temporanei di download e copia (client torrent, browser, rsync, ...)
+    TEMP_SUFFIXES = ('.part', '.partial', '.!qb', '.!ut', '.crdownload', '.download',
+                     '.tmp', '.temp', '.aria2', '.filepart')
+    
+    def __init__(self, settle: float = 5.0):
+        self.settle = settle
+        self._pending: Dict[VideoFile, Tuple[Optional[Tuple[int, int]], float]] = {}
+    
+    @classmethod
+    def is_candidate(cls, path: Path) -> bool:
+        """File video definitivo (non nascosto, non temporaneo)"""
+        name = path.name.lower()
+        if name.startswith('.') or name.startswith('~') or name.endswith(cls.TEMP_SUFFIXES):
+            return False
+        return os.path.splitext(name)[1] in Constants.VIDEO_EXTENSIONS
+    
+    def add(self, path: VideoFile):
+        if self.is_candidate(path) and path not in self._pending:
+            self._pending[path] = (None, time.monotonic())
+    
+    def ready(self) -> List[VideoFile]:
+        """File rimasti invariati per almeno `settle` secondi (tolti dall'attesa)"""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, since) in list(self._pending.items()):
+            try:
+                st = path.stat()
+            except OSError:
+                # Rimosso o rinominato nel frattempo: arriverà un nuovo evento
+                del self._pending[path]
+                continue
+            
+            current = (st.st_size, st.st_mtime_ns)
+            if current != signature:
+                self._pending[path] = (current, now)
+            elif st.st_size > 0 and now - since >= self.settle:
+                ready.append(path)
+                del self._pending[path]
+        
+        return sorted(ready)
+    
+    def __len__(self) -> int:
+        return len(self._pending)
+
+# ============================================================================
+# COSTRUTTORE NOMI FILE
+# ============================================================================
+
+class FilenameBuilder:
+    """Costruttore di nomi file per diversi formati"""
+    
+    FORMAT_TEMPLATES = {
+        FormatStyle.STANDARD: "{series} - S{season:02d}E{episode:02d} - {title}{ext}",
+        FormatStyle.PLEX: "{series} - S{season:02d}E{episode:02d} - {title}{ext}",
+        FormatStyle.SIMPLE: "{series} {season}x{episode:02d} {title}{ext}",
+        FormatStyle.MINIMAL: "{series} S{season:02d}E{episode:02d}{ext}",
         FormatStyle.KODI: "{series} S{season:02d}E{episode:02d} {title}{ext}"
     }
     
+    # Campi di --template ricavati dall'intestazione del video (MediaProbe)
+    MEDIA_FIELDS = {'resolution', 'codec', 'width', 'height', 'duration'}
+    # Gruppi rimasti vuoti quando un campo non è disponibile, es. "[ ]"
+    _EMPTY_GROUP_RE = re.compile(r'\s*(\[\s*\]|\(\s*\))')
+    
     @classmethod
     def build(cls, series_name: str, season: int, episode: int, 
-              episode_title: str, extension: str, format_style: FormatStyle) -> str:
-        """Costruisce il nome file nel formato specificato"""
-        template = cls.FORMAT_TEMPLATES.get(format_style, cls.FORMAT_TEMPLATES[FormatStyle.STANDARD])
+              episode_title: str, extension: str, format_style: FormatStyle,
+              template: Optional[str] = None, media: Optional[MediaInfo] = None) -> str:
+        """Costruisce il nome file nel formato specificato (o con il modello di --template)"""
+        if template is None:
+            template = cls.FORMAT_TEMPLATES.get(format_style, cls.FORMAT_TEMPLATES[FormatStyle.STANDARD])
+            media_fields = {}
+        else:
+            media_fields = cls._media_fields(media)
         
-        return template.format(
+        name = template.format(
             series=FileUtils.clean_filename(series_name),
             season=season,
             episode=episode,
             title=FileUtils.clean_filename(episode_title),
-            ext=extension
+            ext=extension,
+            **media_fields
         )
+        if media_fields:
+            stem, ext = ((name[:-len(extension)], extension) if extension and name.endswith(extension)
+                         else (name, ''))
+            name = FileUtils.clean_filename(cls._EMPTY_GROUP_RE.sub('', stem)) + ext
+        return name
+    
+    @classmethod
+    def uses_media(cls, template: Optional[str]) -> bool:
+        """Il modello richiede la lettura delle intestazioni video"""
+        return bool(template) and any(field in cls.MEDIA_FIELDS for field in cls._fields(template))
+    
+    @classmethod
+    def validate_template(cls, template: str) -> Optional[str]:
+        """Messaggio d'errore per un modello non valido, None se utilizzabile"""
+        try:
+            fields = set(cls._fields(template))
+        except ValueError as e:
+            return str(e)
+        unknown = fields - cls.MEDIA_FIELDS - {'series', 'season', 'episode', 'title', 'ext'}
+        if unknown:
+            return f"campi sconosciuti: {', '.join(sorted(unknown))}"
+        if 'ext' not in fields:
+            return "il modello deve contenere {ext}"
+        try:
+            cls.build('Serie', 1, 1, 'Titolo', '.mkv', FormatStyle.STANDARD, template,
+                      MediaInfo(1920, 1080, 'h264', 2700.0))
+            cls.build('Serie', 1, 1, 'Titolo', '.mkv', FormatStyle.STANDARD, template)
+        except (ValueError, KeyError, IndexError) as e:
+            return str(e)
+        return None
+    
+    @staticmethod
+    def _fields(template: str) -> Iterator[str]:
+        for _, field, _, _ in string.Formatter().parse(template):
+            if field is not None:
+                yield re.split(r'[.\[]', field, 1)[0]
+    
+    @staticmethod
+    def _media_fields(media: Optional[MediaInfo]) -> Dict:
+        # Valori vuoti (o zero) se il file non è stato letto: i gruppi vuoti vengono poi rimossi
+        if media is None:
+            return {'resolution': '', 'codec': '', 'width': 0, 'height': 0, 'duration': 0}
+        return {'resolution': media.resolution, 'codec': media.codec, 'width': media.width,
+                'height': media.height, 'duration': int(round(media.duration / 60))}
 
 # ============================================================================
 # PROVIDER API (PATTERN STRATEGY)
 # ============================================================================
 
+class TokenBucket:
+    """Limitatore di frequenza thread-safe a token bucket, adattivo
+    
+    Un 429 con Retry-After sospende le richieste per il tempo indicato e
+    riduce poco la frequenza; senza Retry-After la dimezza (fino a 1/8 di
+    quella nominale). Le risposte regolari la riportano gradualmente al valore nominale.
+    """
+    
+    MIN_RATE_FACTOR = 8
+    RECOVERY_STEPS = 10
+    
+    def __init__(self, rate: float, capacity: float):
+        self.nominal_rate = rate
+        self.rate = rate  # token rigenerati al secondo
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """Attende un token disponibile e restituisce il tempo di attesa"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+    
+    def throttle(self, retry_after: Optional[float] = None):
+        """Risposta 429: riduce la frequenza e sospende le richieste per retry_after secondi"""
+        with self._lock:
+            factor = 0.8 if retry_after is not None else 0.5
+            self.rate = max(self.nominal_rate / self.MIN_RATE_FACTOR, self.rate * factor)
+            self._tokens = 0.0
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+        TRACER.count('http.throttled')
+    
+    def success(self):
+        """Risposta regolare: aumento additivo verso la frequenza nominale"""
+        if self.rate < self.nominal_rate:
+            with self._lock:
+                self.rate = min(self.nominal_rate, self.rate + self.nominal_rate / self.RECOVERY_STEPS)
+
+class CircuitBreaker:
+    """Interruttore di un provider: dopo errori consecutivi rifiuta subito le richieste
+    
+    Trascorso il periodo di raffreddamento lascia passare una sola richiesta
+    di prova: se riesce il circuito si richiude, altrimenti si riapre.
+    """
+    
+    THRESHOLD = 5
+    COOLDOWN = 30.0
+    
+    def __init__(self, host: str):
+        self.host = host
+        self._failures = 0
+        self._opened_until = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """True se la richiesta può partire"""
+        with self._lock:
+            if not self._opened_until:
+                return True
+            if time.monotonic() < self._opened_until or self._probing:
+                return False
+            self._probing = True
+            return True
+    
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_until = 0.0
+            self._probing = False
+    
+    def failure(self, cooldown: float = 0.0):
+        """Registra un errore; con cooldown il circuito si apre subito per almeno quel tempo"""
+        with self._lock:
+            self._failures += 1
+            if cooldown or self._probing or self._failures >= self.THRESHOLD:
+                self._opened_until = time.monotonic() + max(cooldown, self.COOLDOWN)
+                self._probing = False
+                TRACER.count('http.circuit_opened')
+
+class RetryBudget:
+    """Budget globale dei tentativi ripetuti nell'esecuzione: una riserva più una frazione delle richieste"""
+    
+    RESERVE = 20
+    RATIO = 0.2
+    
+    def __init__(self):
+        self._requests = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+    
+    def record_request(self):
+        with self._lock:
+            self._requests += 1
+    
+    def try_spend(self) -> bool:
+        """Consuma un tentativo se il budget lo consente"""
+        with self._lock:
+            if self._retries >= self.RESERVE + self.RATIO * self._requests:
+                return False
+            self._retries += 1
+            return True
+
+class SingleFlight:
+    """Unisce le chiamate concorrenti per la stessa chiave in un'unica esecuzione"""
+    
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+        
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error: Optional[BaseException] = None
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, 'SingleFlight._Call'] = {}
+    
+    def do(self, key: str, fn: Callable[[], object]):
+        """Esegue fn, oppure attende e condivide il risultato di chi la sta già eseguendo"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+        
+        if not leader:
+            TRACER.count('singleflight.shared')
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
 class HTTPClient:
     """Client HTTP con retry e rate limiting"""
     
     def __init__(self, config: Config):
         self.session = requests.Session()
         self.timeout = config.timeout
-        self._last_call = 0
-        self._min_interval = 0.2
-        
-        # Configura retry strategy
-        retry_strategy = Retry(
-            total=config.max_retries,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504]
-        )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        self.max_retries = config.max_retries
+        
+        # urllib3 ritenta solo le connessioni fallite, senza attese: 429, errori 5xx
+        # e timeout passano da get(), che conosce limitatori, interruttori e budget
+        retry_strategy = Retry(total=None, connect=1, read=0, status=0, other=0, backoff_factor=0)
+        
+        # Pool di connessioni dimensionato sul numero di worker
+        adapter = HTTPAdapter(
+            max_retries=retry_strategy,
+            pool_connections=4,
+            pool_maxsize=config.workers
+        )
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
         
@@ -374,51 +1906,370 @@ class HTTPClient:
             'User-Agent': 'UniversalTVRenamer/1.2',
             'Accept': 'application/json'
         })
+        
+        # Statistiche delle rivalidazioni (risposte 304 e byte non ritrasferiti)
+        self._stats_lock = threading.Lock()
+        self.not_modified = 0
+        self.bytes_saved = 0
+        
+        # Controllo del traffico per host e budget dei tentativi dell'esecuzione
+        self._hosts_lock = threading.Lock()
+        self._limiters: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self.retry_budget = RetryBudget()
+    
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    # Retry-After più lunghi non si attendono: il provider viene sospeso
+    MAX_RETRY_AFTER = 60.0
+    MAX_BACKOFF = 4.0
     
-    def get(self, url: str, **kwargs) -> requests.Response:
-        """Esegue una richiesta GET con rate limiting"""
-        elapsed = time.time() - self._last_call
-        if elapsed < self._min_interval:
-            time.sleep(self._min_interval - elapsed)
+    def get(self, url: str, rate_limit: Optional[Tuple[float, float]] = None,
+            validators: Optional[Dict] = None, **kwargs) -> requests.Response:
+        """Esegue una richiesta GET rispettando limitatore e interruttore dell'host
         
-        kwargs.setdefault('timeout', self.timeout)
-        response = self.session.get(url, **kwargs)
-        response.raise_for_status()
+        rate_limit (richieste al secondo, burst) configura il limitatore dell'host
+        alla prima richiesta. Con validators (da response_validators) la richiesta
+        è condizionale: il server può rispondere 304 senza corpo.
+        """
+        host = urlparse(url).netloc
+        limiter, breaker = self._controls_for(host, rate_limit)
         
-        self._last_call = time.time()
-        return response
+        with TRACER.span('GET', 'http') as span:
+            if validators:
+                headers = dict(kwargs.pop('headers', None) or {})
+                if validators.get('etag'):
+                    headers['If-None-Match'] = validators['etag']
+                if validators.get('last_modified'):
+                    headers['If-Modified-Since'] = validators['last_modified']
+                kwargs['headers'] = headers
+            
+            kwargs.setdefault('timeout', self.timeout)
+            response, waited, attempts = self._send(url, limiter, breaker, kwargs)
+            
+            if response.status_code == 304:
+                saved = (validators or {}).get('size', 0)
+                with self._stats_lock:
+                    self.not_modified += 1
+                    self.bytes_saved += saved
+                TRACER.count('http.not_modified')
+                TRACER.count('http.bytes_saved', saved)
+            
+            if TRACER.enabled:
+                span.set(
+                    url=self._url_template(url),
+                    status=response.status_code,
+                    bytes=len(response.content),
+                    rate_limit_wait_ms=round(waited * 1000, 1),
+                    retries=attempts
+                )
+                TRACER.count('http.rate_limit_wait_s', waited)
+            
+            response.raise_for_status()
+            return response
+    
+    def _send(self, url: str, limiter: TokenBucket, breaker: CircuitBreaker,
+              kwargs: Dict) -> Tuple[requests.Response, float, int]:
+        """Invia la richiesta ritentando 429, errori 5xx e di rete: (risposta, attesa s, tentativi ripetuti)"""
+        waited = 0.0
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                TRACER.count('http.circuit_rejected')
+                raise ProviderUnavailableException(f"{breaker.host}: provider temporaneamente sospeso")
+            
+            waited += limiter.acquire()
+            self.retry_budget.record_request()
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.RequestException:
+                breaker.failure()
+                if not self._may_retry(attempt):
+                    raise
+                delay = self._backoff(attempt)
+            else:
+                if response.status_code not in self.RETRY_STATUSES:
+                    breaker.success()
+                    limiter.success()
+                    return response, waited, attempt
+                
+                retry_after = self._retry_after(response)
+                if response.status_code == 429:
+                    limiter.throttle(min(retry_after, self.MAX_RETRY_AFTER) if retry_after is not None else None)
+                if retry_after is not None and retry_after > self.MAX_RETRY_AFTER:
+                    # Attesa troppo lunga: provider sospeso, non un errore sulla risorsa richiesta
+                    breaker.failure(cooldown=retry_after)
+                    raise ProviderUnavailableException(
+                        f"{breaker.host}: Retry-After {retry_after:.0f}s, provider sospeso")
+                # Un 429 breve è solo rallentamento (gestito dal limitatore): non apre il circuito
+                if response.status_code != 429:
+                    breaker.failure()
+                if not self._may_retry(attempt):
+                    return response, waited, attempt
+                # Dopo un 429 l'attesa la impone il limitatore dell'host, condiviso tra i thread
+                delay = 0.0 if response.status_code == 429 else (retry_after or self._backoff(attempt))
+            
+            attempt += 1
+            TRACER.count('http.retries')
+            if delay:
+                time.sleep(delay)
+                waited += delay
+    
+    def _controls_for(self, host: str, rate_limit: Optional[Tuple[float, float]]) -> Tuple[TokenBucket, CircuitBreaker]:
+        """Limitatore e interruttore dell'host, creati alla prima richiesta"""
+        with self._hosts_lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = self._limiters[host] = TokenBucket(*(rate_limit or APIProvider.RATE_LIMIT))
+                self._breakers[host] = CircuitBreaker(host)
+            return limiter, self._breakers[host]
+    
+    def _may_retry(self, attempt: int) -> bool:
+        if attempt >= self.max_retries:
+            return False
+        if not self.retry_budget.try_spend():
+            TRACER.count('http.retry_budget_exhausted')
+            return False
+        return True
+    
+    def _backoff(self, attempt: int) -> float:
+        """Attesa esponenziale con jitter tra due tentativi"""
+        return min(self.MAX_BACKOFF, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Secondi indicati dall'header Retry-After (numero o data HTTP)"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def response_validators(response: requests.Response) -> Optional[Dict]:
+        """Validatori HTTP (ETag, Last-Modified) di una risposta, da salvare con il valore in cache"""
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return None
+        return {'etag': etag, 'last_modified': last_modified, 'size': len(response.content)}
+    
+    _ID_SEGMENT_RE = re.compile(r'(/(?:tv|shows|season|episode))/\d+(?=/|$)')
+    
+    @classmethod
+    def _url_template(cls, url: str) -> str:
+        """URL senza query e con gli identificativi numerici generalizzati"""
+        parsed = urlparse(url)
+        return parsed.netloc + cls._ID_SEGMENT_RE.sub(r'\1/{n}', parsed.path)
 
 class SimpleCache:
-    """Cache semplice con TTL"""
+    """Cache semplice con TTL (condivisa dai worker di risoluzione: accessi sotto lock)"""
     
     def __init__(self, ttl: int = 3600):
         self.ttl = ttl
         self._cache: Dict = {}
-        self._timestamps: Dict = {}
+        self._expires: Dict = {}
+        self._validators: Dict = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str):
+        """Recupera un valore dalla cache"""
+        with self._lock:
+            if key not in self._cache:
+                TRACER.count('cache.miss')
+                return None
+            
+            if time.time() > self._expires[key]:
+                # Le voci con validatori restano disponibili per la rivalidazione
+                if key not in self._validators:
+                    del self._cache[key]
+                    del self._expires[key]
+                TRACER.count('cache.miss')
+                return None
+            
+            TRACER.count('cache.hit')
+            return self._cache[key]
+    
+    def get_stale(self, key: str) -> Optional[Tuple[object, Dict]]:
+        """Valore e validatori HTTP di una voce, anche se scaduta"""
+        with self._lock:
+            validators = self._validators.get(key)
+            if validators is None or key not in self._cache:
+                return None
+            return self._cache[key], validators
+    
+    def set(self, key: str, value, ttl: Optional[int] = None, validators: Optional[Dict] = None):
+        """Imposta un valore nella cache"""
+        with self._lock:
+            self._cache[key] = value
+            self._expires[key] = time.time() + (ttl if ttl is not None else self.ttl)
+            if validators:
+                self._validators[key] = validators
+            else:
+                self._validators.pop(key, None)
+    
+    def touch(self, key: str, ttl: int):
+        """Rinnova la scadenza di una voce esistente (risposta 304)"""
+        with self._lock:
+            if key in self._cache:
+                self._expires[key] = time.time() + ttl
+
+class CacheCodec:
+    """Serializzazione compatta (JSON + zlib) dei valori in cache"""
+    
+    TYPES = {cls.__name__: cls for cls in (SeriesInfo, EpisodeInfo)}
+    
+    @classmethod
+    def encode(cls, value) -> bytes:
+        payload = json.dumps(cls._to_json(value), separators=(',', ':'), ensure_ascii=False)
+        return zlib.compress(payload.encode('utf-8'))
+    
+    @classmethod
+    def decode(cls, blob: bytes):
+        return cls._from_json(json.loads(zlib.decompress(blob).decode('utf-8')))
+    
+    @classmethod
+    def _to_json(cls, value):
+        if is_dataclass(value):
+            data = {f.name: cls._to_json(getattr(value, f.name)) for f in fields(value)}
+            data['__type__'] = type(value).__name__
+            return data
+        if isinstance(value, dict):
+            # Le chiavi intere (numeri episodio) non sopravvivono a JSON
+            return {'__dict__': [[k, cls._to_json(v)] for k, v in value.items()]}
+        if isinstance(value, (list, tuple)):
+            return [cls._to_json(v) for v in value]
+        return value
+    
+    @classmethod
+    def _from_json(cls, data):
+        if isinstance(data, list):
+            return [cls._from_json(v) for v in data]
+        if isinstance(data, dict):
+            if '__dict__' in data:
+                return {k: cls._from_json(v) for k, v in data['__dict__']}
+            type_name = data.pop('__type__', None)
+            values = {k: cls._from_json(v) for k, v in data.items()}
+            return cls.TYPES[type_name](**values) if type_name in cls.TYPES else values
+        return data
+
+class PersistentCache:
+    """Cache persistente su SQLite (WAL), condivisa tra esecuzioni e processi"""
+    
+    DB_NAME = 'metadata.db'
+    STALE_RETENTION = 30 * 24 * 3600
+    
+    def __init__(self, directory: Path, ttl: int = 3600):
+        self.ttl = ttl
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / self.DB_NAME
+        self._lock = threading.Lock()
+        
+        # Autocommit: ogni scrittura è una transazione atomica, sicura tra processi
+        self._conn = sqlite3.connect(str(self.path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL, validators TEXT)'
+        )
+        # Database creati da versioni precedenti, senza validatori HTTP
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(cache)')}
+        if 'validators' not in columns:
+            self._conn.execute('ALTER TABLE cache ADD COLUMN validators TEXT')
+        # Elimina le voci scadute da molto tempo
+        self._conn.execute('DELETE FROM cache WHERE expires < ?',
+                           (time.time() - self.STALE_RETENTION,))
+    
+    @staticmethod
+    def default_directory() -> Path:
+        """Directory di cache predefinita (XDG_CACHE_HOME o ~/.cache)"""
+        base = os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        return Path(base) / 'tvrenamer'
     
     def get(self, key: str):
         """Recupera un valore dalla cache"""
-        if key not in self._cache:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, expires FROM cache WHERE key = ?', (key,)
+            ).fetchone()
+        
+        if row is None or time.time() > row[1]:
+            TRACER.count('cache.miss')
             return None
         
-        if time.time() - self._timestamps[key] > self.ttl:
-            del self._cache[key]
-            del self._timestamps[key]
+        try:
+            value = CacheCodec.decode(row[0])
+        except Exception:
+            TRACER.count('cache.miss')
             return None
         
-        return self._cache[key]
+        TRACER.count('cache.hit')
+        return value
+    
+    def get_stale(self, key: str) -> Optional[Tuple[object, Dict]]:
+        """Valore e validatori HTTP di una voce, anche se scaduta"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value, validators FROM cache WHERE key = ? AND validators IS NOT NULL', (key,)
+            ).fetchone()
+        
+        if row is None:
+            return None
+        try:
+            return CacheCodec.decode(row[0]), json.loads(row[1])
+        except Exception:
+            return None
     
-    def set(self, key: str, value):
+    def set(self, key: str, value, ttl: Optional[int] = None, validators: Optional[Dict] = None):
         """Imposta un valore nella cache"""
-        self._cache[key] = value
-        self._timestamps[key] = time.time()
+        expires = time.time() + (ttl if ttl is not None else self.ttl)
+        blob = CacheCodec.encode(value)
+        encoded = json.dumps(validators, separators=(',', ':')) if validators else None
+        
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires, validators) VALUES (?, ?, ?, ?)',
+                (key, blob, expires, encoded)
+            )
+    
+    def touch(self, key: str, ttl: int):
+        """Rinnova la scadenza di una voce esistente senza riscriverne il valore (risposta 304)"""
+        with self._lock:
+            self._conn.execute('UPDATE cache SET expires = ? WHERE key = ?', (time.time() + ttl, key))
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_cache(config: Config):
+    """Crea la cache dei metadati in base alla configurazione"""
+    if not config.use_cache:
+        return SimpleCache()
+    
+    directory = Path(config.cache_dir).expanduser() if config.cache_dir else PersistentCache.default_directory()
+    try:
+        return PersistentCache(directory)
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️  Cache persistente non disponibile ({e}), uso cache in memoria")
+        return SimpleCache()
 
 class APIProvider(ABC):
     """Classe base astratta per i provider API"""
     
-    def __init__(self, http_client: HTTPClient):
+    # Limite di frequenza del provider: (richieste al secondo, burst massimo)
+    RATE_LIMIT: Tuple[float, float] = (5.0, 5.0)
+    
+    def __init__(self, http_client: HTTPClient, cache=None):
         self.http_client = http_client
-        self.cache = SimpleCache()
+        self.cache = cache if cache is not None else SimpleCache()
+        self._flights = SingleFlight()
     
     @abstractmethod
     def search_series(self, query: str) -> List[SeriesInfo]:
@@ -426,139 +2277,320 @@ class APIProvider(ABC):
         pass
     
     @abstractmethod
-    def get_episode_info(self, series_id: str, season: int, episode: int) -> Optional[EpisodeInfo]:
-        """Ottiene informazioni su un episodio"""
+    def get_season_episodes(self, series_id: str, season: int) -> Dict[int, EpisodeInfo]:
+        """Ottiene la tabella degli episodi di una stagione (numero -> episodio)"""
         pass
+    
+    def preload_seasons(self, series_id: str, seasons: Set[int]):
+        """Carica in anticipo le tabelle episodi delle stagioni indicate"""
+        for season in sorted(seasons):
+            self.get_season_episodes(series_id, season)
+    
+    def get_episode_info(self, series_id: str, season: int, episode: int) -> Optional[EpisodeInfo]:
+        """Ottiene informazioni su un episodio dalla tabella della stagione"""
+        return self.get_season_episodes(series_id, season).get(episode)
+    
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET tramite il client HTTP condiviso, con i limiti di frequenza del provider"""
+        return self.http_client.get(url, rate_limit=self.RATE_LIMIT, **kwargs)
+    
+    def _cached_get(self, key: str, url: str, params: Dict,
+                    parse: Callable[[object], Tuple[object, int]], empty):
+        """Valore dalla cache, altrimenti scaricato una sola volta anche con più chiamanti concorrenti"""
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        return self._flights.do(key, lambda: self._load(key, url, params, parse, empty))
+    
+    def _load(self, key: str, url: str, params: Dict,
+              parse: Callable[[object], Tuple[object, int]], empty):
+        """Scarica e converte (parse -> valore, TTL) la risorsa, rivalidando la voce scaduta se possibile"""
+        # Una richiesta appena conclusa potrebbe aver già popolato la cache
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        stale = self.cache.get_stale(key)
+        try:
+            response = self._get(url, params=params, validators=stale[1] if stale else None)
+            if response.status_code == 304:
+                if not stale:
+                    raise requests.HTTPError("304 senza una voce in cache da rivalidare", response=response)
+                # Invariata: si rinnova la scadenza senza ritrasferire né riconvertire il corpo
+                self.cache.touch(key, stale[1]['ttl'])
+                return stale[0]
+            value, ttl = parse(response.json())
+        except Exception as e:
+            if stale and not self._is_missing(e):
+                # Errore temporaneo: meglio il dato scaduto che nessun dato
+                TRACER.count('api.stale_served')
+                return stale[0]
+            self._store_negative(key, empty, e)
+            return empty
+        
+        if not value:
+            TRACER.count('api.negative_cached')
+            ttl = Constants.CACHE_TTL_NEGATIVE
+        self._store(key, value, ttl, response)
+        return value
+    
+    def _store(self, key: str, value, ttl: int, response: requests.Response):
+        """Salva un valore in cache insieme ai validatori HTTP della risposta da cui proviene"""
+        validators = HTTPClient.response_validators(response)
+        if validators:
+            validators['ttl'] = ttl
+        self.cache.set(key, value, ttl, validators)
+    
+    def _revalidate_group(self, keys: List[str], url: str, params: Dict) -> Tuple[Optional[requests.Response], bool]:
+        """Richiesta condizionale per più voci nate dalla stessa risposta
+        
+        Restituisce (risposta, rinnovate): se il server risponde 304 le voci
+        vengono rinnovate e la risposta è None.
+        """
+        stale = [self.cache.get_stale(key) for key in keys]
+        validators = stale[0][1] if stale and stale[0] else None
+        # Il TTL cambia fra voci positive e negative: contano solo ETag e Last-Modified
+        if validators and any(entry is None or self._identity(entry[1]) != self._identity(validators)
+                              for entry in stale):
+            validators = None  # Voci provenienti da risposte diverse
+        
+        response = self._get(url, params=params, validators=validators)
+        if response.status_code == 304:
+            if not validators:
+                raise requests.HTTPError("304 senza una voce in cache da rivalidare", response=response)
+            for key, entry in zip(keys, stale):
+                self.cache.touch(key, entry[1]['ttl'])
+            return None, True
+        return response, False
+    
+    @staticmethod
+    def _identity(validators: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """Validatori che identificano la risposta d'origine"""
+        return validators.get('etag'), validators.get('last_modified')
+    
+    @staticmethod
+    def _is_missing(error: Exception) -> bool:
+        """Risorsa inesistente (404), al contrario di un errore temporaneo"""
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code == 404
+    
+    def _store_negative(self, key: str, empty, error: Exception):
+        """Memorizza un esito negativo: risorsa inesistente (404) o errore temporaneo"""
+        if isinstance(error, ProviderUnavailableException):
+            return  # Il provider è sospeso: nessuna informazione sulla risorsa
+        missing = self._is_missing(error)
+        if not missing and self.cache.get_stale(key) is not None:
+            return  # La voce scaduta resta disponibile finché il provider non risponde
+        TRACER.count('api.negative_cached')
+        self.cache.set(key, empty, Constants.CACHE_TTL_NEGATIVE if missing else Constants.CACHE_TTL_ERROR)
+    
+    @staticmethod
+    def _episodes_ttl(status: Optional[str]) -> int:
+        """TTL delle tabelle episodi: breve per serie in corso, lungo per serie concluse"""
+        if status and status.lower() in Constants.ENDED_STATUSES:
+            return Constants.CACHE_TTL_ENDED
+        return Constants.CACHE_TTL_AIRING
 
 class TMDBProvider(APIProvider):
     """Provider per The Movie Database"""
     
-    def __init__(self, api_key: str, http_client: HTTPClient, language: Language):
-        super().__init__(http_client)
+    RATE_LIMIT = (40.0, 10.0)
+    
+    def __init__(self, api_key: str, http_client: HTTPClient, language: Language, cache=None,
+                 base_url: str = "https://api.themoviedb.org/3"):
+        super().__init__(http_client, cache)
         self.api_key = api_key
         self.language = language
-        self.base_url = "https://api.themoviedb.org/3"
+        self.base_url = base_url
     
     def search_series(self, query: str) -> List[SeriesInfo]:
         cache_key = f"tmdb_{query}_{self.language.value}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return cached
-        
-        try:
-            url = f"{self.base_url}/search/tv"
-            params = {
-                'api_key': self.api_key,
-                'query': query,
-                'language': f'{self.language.value}-{self.language.value.upper()}'
-            }
-            
-            response = self.http_client.get(url, params=params)
-            data = response.json()
-            
-            results = []
-            for item in data.get('results', [])[:5]:
-                series = SeriesInfo(
-                    id=str(item.get('id')),
-                    name=item.get('name', 'Nome non disponibile'),
-                    year=item.get('first_air_date', '')[:4] if item.get('first_air_date') else '',
-                    overview=item.get('overview', ''),
-                    source='TMDB',
-                    vote_average=item.get('vote_average')
-                )
-                results.append(series)
-            
-            self.cache.set(cache_key, results)
-            return results
-        except Exception:
-            return []
+        params = {
+            'api_key': self.api_key,
+            'query': query,
+            'language': f'{self.language.value}-{self.language.value.upper()}'
+        }
+        return self._cached_get(cache_key, f"{self.base_url}/search/tv", params, self._parse_search, [])
     
-    def get_episode_info(self, series_id: str, season: int, episode: int) -> Optional[EpisodeInfo]:
-        cache_key = f"tmdb_ep_{series_id}_{season}_{episode}_{self.language.value}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return cached
+    @staticmethod
+    def _parse_search(data: Dict) -> Tuple[List[SeriesInfo], int]:
+        results = []
+        for item in data.get('results', [])[:5]:
+            series = SeriesInfo(
+                id=str(item.get('id')),
+                name=item.get('name', 'Nome non disponibile'),
+                year=item.get('first_air_date', '')[:4] if item.get('first_air_date') else '',
+                overview=item.get('overview', ''),
+                source='TMDB',
+                vote_average=item.get('vote_average')
+            )
+            results.append(series)
         
-        try:
-            url = f"{self.base_url}/tv/{series_id}/season/{season}/episode/{episode}"
-            params = {
-                'api_key': self.api_key,
-                'language': f'{self.language.value}-{self.language.value.upper()}'
-            }
-            
-            response = self.http_client.get(url, params=params)
-            data = response.json()
+        return results, Constants.CACHE_TTL_SEARCH
+    
+    # TMDB accetta al massimo 20 sotto-risorse in append_to_response
+    MAX_APPENDED_SEASONS = 20
+    
+    def get_season_episodes(self, series_id: str, season: int) -> Dict[int, EpisodeInfo]:
+        cache_key = self._season_cache_key(series_id, season)
+        url = f"{self.base_url}/tv/{series_id}/season/{season}"
+        # Senza lo stato della serie si assume che sia ancora in corso
+        return self._cached_get(cache_key, url, self._params(),
+                                lambda data: (self._parse_season(data, season), self._episodes_ttl(None)), {})
+    
+    def preload_seasons(self, series_id: str, seasons: Set[int]):
+        """Carica più stagioni per richiesta tramite append_to_response"""
+        def missing() -> List[int]:
+            return sorted(s for s in seasons
+                          if self.cache.get(self._season_cache_key(series_id, s)) is None)
+        
+        # Le stagioni mancanti si ricalcolano nel leader; chi si è accodato
+        # a una richiesta per altre stagioni riprova una volta con le proprie
+        for _ in range(2):
+            if not missing():
+                return
+            self._flights.do(f"tmdb_show_{series_id}_{self.language.value}",
+                             lambda: self._preload(series_id, missing()))
+    
+    def _preload(self, series_id: str, missing: List[int]):
+        for start in range(0, len(missing), self.MAX_APPENDED_SEASONS):
+            chunk = missing[start:start + self.MAX_APPENDED_SEASONS]
+            keys = [self._season_cache_key(series_id, season) for season in chunk]
+            try:
+                url = f"{self.base_url}/tv/{series_id}"
+                params = self._params()
+                params['append_to_response'] = ','.join(f'season/{s}' for s in chunk)
+                
+                response, renewed = self._revalidate_group(keys, url, params)
+                if renewed:
+                    continue
+                data = response.json()
+            except Exception as e:
+                for key in keys:
+                    self._store_negative(key, {}, e)
+                continue
             
-            episode_info = EpisodeInfo(
-                title=data.get('name', f'Episode {episode}'),
+            ttl = self._episodes_ttl(data.get('status'))
+            for season, key in zip(chunk, keys):
+                season_data = data.get(f'season/{season}')
+                episodes = self._parse_season(season_data, season) if season_data is not None else {}
+                if not episodes:
+                    TRACER.count('api.negative_cached')
+                self._store(key, episodes, ttl if episodes else Constants.CACHE_TTL_NEGATIVE, response)
+    
+    def _params(self) -> Dict[str, str]:
+        """Parametri comuni a tutte le richieste TMDB"""
+        return {
+            'api_key': self.api_key,
+            'language': f'{self.language.value}-{self.language.value.upper()}'
+        }
+    
+    def _season_cache_key(self, series_id: str, season: int) -> str:
+        return f"tmdb_season_{series_id}_{season}_{self.language.value}"
+    
+    @staticmethod
+    def _parse_season(data: Dict, season: int) -> Dict[int, EpisodeInfo]:
+        """Converte la risposta di una stagione nella tabella degli episodi"""
+        episodes = {}
+        for item in data.get('episodes', []):
+            number = item.get('episode_number')
+            if number is None:
+                continue
+            episodes[number] = EpisodeInfo(
+                title=item.get('name') or f'Episode {number}',
                 season=season,
-                episode=episode
+                episode=number
             )
-            
-            self.cache.set(cache_key, episode_info)
-            return episode_info
-        except Exception:
-            return None
+        return episodes
 
 class TVMazeProvider(APIProvider):
     """Provider per TVMaze"""
     
-    def __init__(self, http_client: HTTPClient):
-        super().__init__(http_client)
-        self.base_url = "https://api.tvmaze.com"
+    # TVMaze consente circa 20 richieste ogni 10 secondi
+    RATE_LIMIT = (2.0, 2.0)
+    
+    def __init__(self, http_client: HTTPClient, cache=None, base_url: str = "https://api.tvmaze.com"):
+        super().__init__(http_client, cache)
+        self.base_url = base_url
     
     def search_series(self, query: str) -> List[SeriesInfo]:
         cache_key = f"tvmaze_{query}"
-        cached = self.cache.get(cache_key)
-        if cached:
-            return cached
-        
-        try:
-            url = f"{self.base_url}/search/shows"
-            response = self.http_client.get(url, params={'q': query})
-            data = response.json()
-            
-            results = []
-            for item in data[:5]:
-                show = item.get('show', {})
-                summary = re.sub(r'<[^>]+>', '', show.get('summary', '') or '').strip()
-                
-                series = SeriesInfo(
-                    id=str(show.get('id')),
-                    name=show.get('name', 'Nome non disponibile'),
-                    year=show.get('premiered', '')[:4] if show.get('premiered') else '',
-                    overview=summary,
-                    source='TVMaze',
-                    vote_average=show.get('rating', {}).get('average') if show.get('rating') else None
-                )
-                results.append(series)
+        return self._cached_get(cache_key, f"{self.base_url}/search/shows", {'q': query},
+                                self._parse_search, [])
+    
+    @staticmethod
+    def _parse_search(data: List) -> Tuple[List[SeriesInfo], int]:
+        results = []
+        for item in data[:5]:
+            show = item.get('show', {})
+            summary = re.sub(r'<[^>]+>', '', show.get('summary', '') or '').strip()
             
-            self.cache.set(cache_key, results)
-            return results
-        except Exception:
-            return []
+            series = SeriesInfo(
+                id=str(show.get('id')),
+                name=show.get('name', 'Nome non disponibile'),
+                year=show.get('premiered', '')[:4] if show.get('premiered') else '',
+                overview=summary,
+                source='TVMaze',
+                vote_average=show.get('rating', {}).get('average') if show.get('rating') else None
+            )
+            results.append(series)
+        
+        return results, Constants.CACHE_TTL_SEARCH
     
-    def get_episode_info(self, series_id: str, season: int, episode: int) -> Optional[EpisodeInfo]:
-        cache_key = f"tvmaze_ep_{series_id}_{season}_{episode}"
+    def get_season_episodes(self, series_id: str, season: int) -> Dict[int, EpisodeInfo]:
+        cache_key = self._season_cache_key(series_id, season)
         cached = self.cache.get(cache_key)
-        if cached:
-            return cached
+        if cached is None:
+            # TVMaze restituisce l'intera serie in una sola richiesta
+            self.preload_seasons(series_id, {season})
+            cached = self.cache.get(cache_key)
+        return cached if cached is not None else {}
+    
+    def preload_seasons(self, series_id: str, seasons: Set[int]):
+        """Carica tutti gli episodi della serie con embed=episodes"""
+        def all_cached() -> bool:
+            return all(self.cache.get(self._season_cache_key(series_id, s)) is not None for s in seasons)
         
+        # Come per TMDB, chi si è accodato per altre stagioni riprova una volta
+        for _ in range(2):
+            if all_cached():
+                return
+            self._flights.do(f"tvmaze_show_{series_id}", lambda: all_cached() or self._preload(series_id, seasons))
+    
+    def _preload(self, series_id: str, seasons: Set[int]):
+        keys = [self._season_cache_key(series_id, season) for season in sorted(seasons)]
         try:
-            url = f"{self.base_url}/shows/{series_id}/episodebynumber"
-            response = self.http_client.get(url, params={'season': season, 'number': episode})
+            url = f"{self.base_url}/shows/{series_id}"
+            response, renewed = self._revalidate_group(keys, url, {'embed': 'episodes'})
+            if renewed:
+                return
             data = response.json()
-            
-            episode_info = EpisodeInfo(
-                title=data.get('name', f'Episode {episode}'),
+        except Exception as e:
+            for key in keys:
+                self._store_negative(key, {}, e)
+            return
+        
+        tables: Dict[int, Dict[int, EpisodeInfo]] = {season: {} for season in seasons}
+        for item in data.get('_embedded', {}).get('episodes', []):
+            season, number = item.get('season'), item.get('number')
+            if season is None or number is None:
+                continue  # Speciali senza numerazione
+            tables.setdefault(season, {})[number] = EpisodeInfo(
+                title=item.get('name') or f'Episode {number}',
                 season=season,
-                episode=episode
+                episode=number
             )
-            
-            self.cache.set(cache_key, episode_info)
-            return episode_info
-        except Exception:
-            return None
+        
+        ttl = self._episodes_ttl(data.get('status'))
+        for season, episodes in tables.items():
+            if not episodes:
+                TRACER.count('api.negative_cached')
+            self._store(self._season_cache_key(series_id, season), episodes,
+                        ttl if episodes else Constants.CACHE_TTL_NEGATIVE, response)
+    
+    @staticmethod
+    def _season_cache_key(series_id: str, season: int) -> str:
+        return f"tvmaze_season_{series_id}_{season}"
 
 # ============================================================================
 # GESTORE API
@@ -567,51 +2599,153 @@ class TVMazeProvider(APIProvider):
 class APIManager:
     """Gestore che coordina múltipli provider API"""
     
-    def __init__(self, config: Config, http_client: HTTPClient):
+    def __init__(self, config: Config, http_client: HTTPClient, cache=None):
         self.providers: List[APIProvider] = []
         
-        # Inizializza provider disponibili
+        # Inizializza provider disponibili (con cache condivisa)
         if config.tmdb_api_key:
             try:
-                self.providers.append(TMDBProvider(config.tmdb_api_key, http_client, config.language))
+                self.providers.append(TMDBProvider(config.tmdb_api_key, http_client, config.language,
+                                                   cache, config.tmdb_base_url))
                 print("✅ TMDB configurato")
             except Exception:
                 pass
         
         try:
-            self.providers.append(TVMazeProvider(http_client))
+            self.providers.append(TVMazeProvider(http_client, cache, config.tvmaze_base_url))
             print("✅ TVMaze configurato")
         except Exception:
             pass
         
         if not self.providers:
             print("❌ ERRORE: Nessun provider disponibile!")
+        
+        # Pool dedicato alle ricerche: ogni ricerca interroga tutti i provider insieme
+        self._search_pool: Optional[ThreadPoolExecutor] = None
+        if len(self.providers) > 1:
+            self._search_pool = ThreadPoolExecutor(max_workers=len(self.providers) * config.workers,
+                                                   thread_name_prefix='search')
+        
+        # Serie corrispondenti sugli altri provider: (fonte, id, provider) -> serie o None
+        self._mapped: Dict[Tuple[str, str, str], Optional[SeriesInfo]] = {}
+        self._mapping_flights = SingleFlight()
     
     def search_series(self, query: str) -> List[SeriesInfo]:
-        """Cerca serie utilizzando tutti i provider disponibili"""
-        all_results = []
+        """Cerca serie interrogando in parallelo tutti i provider disponibili
         
-        for provider in self.providers:
+        La latenza è quella del provider più rapido: dalla prima risposta con
+        risultati gli altri hanno SEARCH_HEDGE_GRACE secondi per aggiungersi.
+        Le risposte tardive finiscono comunque nella cache per le ricerche successive.
+        """
+        if self._search_pool is None:
+            return self._deduplicate_results(result for provider in self.providers
+                                             for result in self._search_provider(provider, query))
+        
+        futures = {self._search_pool.submit(self._search_provider, provider, query): index
+                   for index, provider in enumerate(self.providers)}
+        answers: Dict[int, List[SeriesInfo]] = {}
+        pending = set(futures)
+        # Nessun limite finché non arriva una risposta con risultati: un provider lento ma unico va atteso
+        deadline: Optional[float] = None
+        
+        while pending:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                answers[futures[future]] = future.result()
+            if deadline is None and any(answers.values()):
+                # Risultati sufficienti: breve attesa per gli altri, poi si prosegue
+                deadline = time.monotonic() + Constants.SEARCH_HEDGE_GRACE
+        
+        if pending:
+            TRACER.count('search.hedged', len(pending))
+        
+        # Ordine dei provider (non di arrivo), per un elenco stabile
+        return self._deduplicate_results(result for index in sorted(answers) for result in answers[index])
+    
+    @staticmethod
+    def _search_provider(provider: APIProvider, query: str) -> List[SeriesInfo]:
+        try:
+            return provider.search_series(query)
+        except Exception:
+            return []
+    
+    def close(self):
+        """Termina il pool delle ricerche senza attendere le risposte tardive"""
+        if self._search_pool is not None:
+            self._search_pool.shutdown(wait=False)
+    
+    def preload_episodes(self, series_info: SeriesInfo, seasons: Set[int]):
+        """Carica in blocco gli episodi delle stagioni indicate"""
+        provider = self._provider_for(series_info)
+        if provider and seasons:
             try:
-                results = provider.search_series(query)
-                all_results.extend(results)
+                provider.preload_seasons(series_info.id, seasons)
             except Exception:
+                pass
+    
+    def get_episode_info(self, series_info: SeriesInfo, season: int, episode: int) -> Optional[EpisodeInfo]:
+        """Ottiene informazioni sull'episodio dal provider appropriato
+        
+        Se il provider della serie non ha l'episodio si ripiega sulla stessa
+        serie negli altri provider.
+        """
+        provider = self._provider_for(series_info)
+        if provider:
+            info = self._episode_from(provider, series_info.id, season, episode)
+            if info is not None:
+                return info
+        
+        for fallback in self.providers:
+            if fallback is provider:
                 continue
+            mapped = self._mapped_series(series_info, fallback)
+            if mapped is not None:
+                info = self._episode_from(fallback, mapped.id, season, episode)
+                if info is not None:
+                    TRACER.count('episode.fallback')
+                    return info
+        return None
+    
+    @staticmethod
+    def _episode_from(provider: APIProvider, series_id: str, season: int, episode: int) -> Optional[EpisodeInfo]:
+        try:
+            return provider.get_episode_info(series_id, season, episode)
+        except Exception:
+            return None
+    
+    def _mapped_series(self, series_info: SeriesInfo, provider: APIProvider) -> Optional[SeriesInfo]:
+        """Stessa serie su un altro provider: nome normalizzato identico e, se noto, stesso anno"""
+        key = (series_info.source, series_info.id, self._provider_name(provider))
+        if key in self._mapped:
+            return self._mapped[key]
         
-        return self._deduplicate_results(all_results)
+        def lookup() -> Optional[SeriesInfo]:
+            if key not in self._mapped:
+                name = SeriesMatcher.normalize(series_info.name)
+                self._mapped[key] = next(
+                    (candidate for candidate in self._search_provider(provider, series_info.name)
+                     if SeriesMatcher.normalize(candidate.name) == name
+                     and (not series_info.year or not candidate.year or candidate.year == series_info.year)),
+                    None)
+            return self._mapped[key]
+        
+        return self._mapping_flights.do('/'.join(key), lookup)
     
-    def get_episode_info(self, series_info: SeriesInfo, season: int, episode: int) -> Optional[EpisodeInfo]:
-        """Ottiene informazioni sull'episodio dal provider appropriato"""
+    def _provider_for(self, series_info: SeriesInfo) -> Optional[APIProvider]:
+        """Trova il provider da cui proviene la serie"""
         for provider in self.providers:
-            provider_name = provider.__class__.__name__.replace('Provider', '')
-            if provider_name == series_info.source:
-                try:
-                    return provider.get_episode_info(series_info.id, season, episode)
-                except Exception:
-                    continue
+            if self._provider_name(provider) == series_info.source:
+                return provider
         return None
     
-    def _deduplicate_results(self, results: List[SeriesInfo]) -> List[SeriesInfo]:
+    @staticmethod
+    def _provider_name(provider: APIProvider) -> str:
+        return provider.__class__.__name__.replace('Provider', '')
+    
+    def _deduplicate_results(self, results: Iterable[SeriesInfo]) -> List[SeriesInfo]:
         """Rimuove duplicati dai risultati"""
         seen: Set[Tuple] = set()
         unique = []
@@ -624,6 +2758,329 @@ class APIManager:
         
         return unique[:10]
 
+# ============================================================================
+# RISOLUZIONE AUTOMATICA (MODALITÀ BATCH)
+# ============================================================================
+
+@dataclass(frozen=True)
+class MatchScore:
+    """Punteggio di confidenza di un candidato (0-1) e sue componenti"""
+    series: SeriesInfo
+    score: float
+    name: float
+    year: Optional[float]
+    episodes: Optional[float]
+    vote: Optional[float]
+
+class SeriesMatcher:
+    """Valuta i candidati di ricerca senza interazione con l'utente"""
+
+    # Peso di ogni componente; quelle senza dati non entrano nella media
+    WEIGHTS = {'name': 0.6, 'year': 0.15, 'episodes': 0.15, 'vote': 0.1}
+    # Candidati (per somiglianza del nome) di cui si scaricano gli episodi
+    EPISODE_CHECKS = 3
+    # Distacco minimo dal secondo candidato per accettare senza ambiguità
+    MIN_MARGIN = 0.05
+
+    _YEAR_RE = re.compile(r'(?<![A-Za-z0-9])(19[3-9]\d|20\d\d)(?![A-Za-z0-9])')
+    _NORMALIZE_RE = re.compile(r'[^a-z0-9]+')
+    _ARTICLE_RE = re.compile(r'^(the|a|an|il|lo|la|i|gli|le)\s+')
+    _TRAILING_YEAR_RE = re.compile(r'\s*\((19|20)\d\d\)\s*$')
+
+    def __init__(self, api_manager: 'APIManager', threshold: float = 0.85):
+        self.api_manager = api_manager
+        self.threshold = threshold
+
+    def rank(self, results: List[SeriesInfo], series_name: str, files: List[Path],
+             directory: Optional[Path] = None) -> List[MatchScore]:
+        """Ordina i candidati per punteggio decrescente"""
+        if not results:
+            return []
+
+        year_hint = self.year_hint(files, directory)
+        file_keys = self._file_keys(files)
+        name_scores = [self.name_similarity(series_name, result.name) for result in results]
+
+        # Gli episodi costano richieste: solo i candidati più simili per nome
+        by_name = sorted(range(len(results)), key=lambda i: -name_scores[i])
+        checked = set(by_name[:self.EPISODE_CHECKS])
+
+        ranked = []
+        for i, result in enumerate(results):
+            components = {
+                'name': name_scores[i],
+                'year': self._year_score(result.year, year_hint),
+                'episodes': self._episode_score(result, file_keys) if i in checked else None,
+                'vote': result.vote_average / 10 if result.vote_average else None
+            }
+            ranked.append(MatchScore(result, self._combine(components), **components))
+
+        ranked.sort(key=lambda match: -match.score)
+        return ranked
+
+    def choose(self, ranked: List[MatchScore]) -> Optional[MatchScore]:
+        """Restituisce il candidato migliore se supera soglia e margine, altrimenti None"""
+        if not ranked or ranked[0].score < self.threshold:
+            return None
+        if len(ranked) > 1 and ranked[0].score - ranked[1].score < self.MIN_MARGIN:
+            return None
+        return ranked[0]
+
+    @classmethod
+    def normalize(cls, name: str) -> str:
+        """Normalizza un titolo per il confronto (minuscolo, senza anno, articoli e punteggiatura)"""
+        name = cls._TRAILING_YEAR_RE.sub('', html.unescape(name).lower())
+        name = cls._NORMALIZE_RE.sub(' ', name).strip()
+        return cls._ARTICLE_RE.sub('', name)
+
+    @classmethod
+    def name_similarity(cls, query: str, candidate: str) -> float:
+        """Somiglianza 0-1 tra il nome estratto e quello del candidato"""
+        a, b = cls.normalize(query), cls.normalize(candidate)
+        if not a or not b:
+            return 0.0
+        if a == b:
+            return 1.0
+        return difflib.SequenceMatcher(None, a, b).ratio()
+
+    @classmethod
+    def year_hint(cls, files: List[Path], directory: Optional[Path] = None) -> Optional[int]:
+        """Anno suggerito dal nome della cartella o dalla parte iniziale dei file"""
+        candidates = [directory.name] if directory is not None else []
+        for video_file in files[:10]:
+            candidates.append(video_file.stem[:FilenameParser.parse(video_file.name).title_end])
+
+        for text in candidates:
+            match = cls._YEAR_RE.search(text)
+            if match:
+                return int(match.group(1))
+        return None
+
+    @staticmethod
+    def _year_score(year: str, hint: Optional[int]) -> Optional[float]:
+        """1 se l'anno coincide, 0.5 se differisce di uno, None senza indizio"""
+        if hint is None or not year or not year[:4].isdigit():
+            return None
+        delta = abs(int(year[:4]) - hint)
+        return 1.0 if delta == 0 else 0.5 if delta == 1 else 0.0
+
+    @staticmethod
+    def _file_keys(files: List[Path]) -> Set[Tuple[int, int]]:
+        """Coppie (stagione, episodio) presenti tra i file"""
+        keys = set()
+        for video_file in files:
+            season, episode = PatternUtils.extract_season_episode(video_file.name)
+            if season is not None and episode is not None:
+                keys.add((season, episode))
+        return keys
+
+    def _episode_score(self, series: SeriesInfo, keys: Set[Tuple[int, int]]) -> Optional[float]:
+        """Frazione degli episodi presenti sul disco che esistono nel candidato"""
+        if not keys:
+            return None
+        # Le tabelle scaricate qui restano in cache per la rinomina successiva
+        self.api_manager.preload_episodes(series, {season for season, _ in keys})
+        found = sum(1 for season, episode in keys
+                    if self.api_manager.get_episode_info(series, season, episode))
+        return found / len(keys)
+
+    def _combine(self, components: Dict[str, Optional[float]]) -> float:
+        """Media pesata delle componenti disponibili"""
+        total = weight = 0.0
+        for key, value in components.items():
+            if value is not None:
+                total += self.WEIGHTS[key] * value
+                weight += self.WEIGHTS[key]
+        return total / weight if weight else 0.0
+
+class PendingQueue:
+    """Coda su file JSON delle serie da risolvere in una passata interattiva"""
+
+    FILE_NAME = 'pending.json'
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_config(cls, config: Config) -> 'PendingQueue':
+        """Coda nella directory della cache (o nel file indicato)"""
+        if config.pending_file:
+            return cls(Path(config.pending_file).expanduser())
+        directory = Path(config.cache_dir).expanduser() if config.cache_dir else PersistentCache.default_directory()
+        return cls(directory / cls.FILE_NAME)
+
+    def load(self) -> List[Dict]:
+        """Legge le voci in coda (lista vuota se il file manca o è illeggibile)"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return []
+        return entries if isinstance(entries, list) else []
+
+    def add(self, series_name: str, directory: Path, files: List[Path], ranked: List[MatchScore]):
+        """Accoda una serie non risolta, sostituendo una voce precedente per la stessa cartella e nome"""
+        entry = {
+            'series_name': series_name,
+            'directory': str(directory.absolute()),
+            'files': [str(f.absolute()) for f in files],
+            'candidates': [
+                {'source': m.series.source, 'id': m.series.id, 'name': m.series.name,
+                 'year': m.series.year, 'score': round(m.score, 3)}
+                for m in ranked[:5]
+            ],
+            'queued_at': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        with self._lock:
+            entries = [e for e in self.load() if self._key(e) != self._key(entry)]
+            entries.append(entry)
+            self._save(entries)
+
+    def remove(self, entry: Dict):
+        """Rimuove una voce dalla coda"""
+        with self._lock:
+            self._save([e for e in self.load() if self._key(e) != self._key(entry)])
+
+    @staticmethod
+    def _key(entry: Dict) -> Tuple[str, str]:
+        return entry.get('directory', ''), entry.get('series_name', '')
+
+    def _save(self, entries: List[Dict]):
+        """Scrittura atomica (file temporaneo + rename)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+# ============================================================================
+# INDICE DI STATO (ESECUZIONI INCREMENTALI)
+# ============================================================================
+
+class StateIndex:
+    """Indice persistente dei file già elaborati, per dispositivo+inode"""
+
+    DB_NAME = 'state.db'
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / self.DB_NAME
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(self.path), timeout=30,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL, '
+            'mtime_ns INTEGER NOT NULL, directory TEXT NOT NULL, name TEXT NOT NULL, '
+            'series_key TEXT NOT NULL, series_id TEXT NOT NULL, source TEXT NOT NULL, '
+            'series_name TEXT NOT NULL, season INTEGER NOT NULL, episode INTEGER NOT NULL, '
+            'updated REAL NOT NULL, PRIMARY KEY (dev, ino))'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS files_directory ON files (directory)')
+
+    @classmethod
+    def for_config(cls, config: Config) -> Optional['StateIndex']:
+        """Indice nella directory della cache (None se disattivato o non disponibile)"""
+        if not config.use_state:
+            return None
+        directory = Path(config.cache_dir).expanduser() if config.cache_dir else PersistentCache.default_directory()
+        try:
+            return cls(directory)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️  Indice di stato non disponibile ({e}), elaborazione completa")
+            return None
+
+    @staticmethod
+    def directory_key(directory) -> str:
+        """Cartella come chiave dell'indice: assoluta e normalizzata (anche '..'), uguale in lettura e scrittura"""
+        return os.path.abspath(directory)
+
+    def filter_changed(self, files: List[Path]) -> List[Path]:
+        """Restituisce solo i file nuovi o modificati dall'ultima esecuzione"""
+        # Raggruppa per cartella con semplici operazioni su stringhe (centinaia di migliaia di file)
+        by_directory: Dict[str, List[Tuple[str, str, Path]]] = {}
+        for video_file in files:
+            path, name = str(video_file), video_file.name
+            by_directory.setdefault(path[:-len(name) - 1], []).append((path, name, video_file))
+
+        changed = []
+        for directory, directory_files in by_directory.items():
+            with self._lock:
+                rows = self._conn.execute(
+                    'SELECT name, dev, ino, size, mtime_ns FROM files WHERE directory = ?',
+                    (self.directory_key(directory),)
+                ).fetchall()
+            known = {row[0]: row[1:] for row in rows}
+
+            for path, name, video_file in directory_files:
+                # Nome mai visto: è nuovo senza bisogno di stat
+                record = known.get(name)
+                if record is None:
+                    changed.append(video_file)
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if record != (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns):
+                    changed.append(video_file)
+
+        return changed
+
+    def known_series(self, series_key: str, files: List[Path]) -> Optional[SeriesInfo]:
+        """Serie già scelta in passato per lo stesso nome nelle stesse cartelle"""
+        directories = sorted({self.directory_key(f.parent) for f in files})
+        if not directories:
+            return None
+
+        placeholders = ','.join('?' * len(directories))
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT series_id, source, series_name, COUNT(*) AS n FROM files '
+                f'WHERE series_key = ? AND directory IN ({placeholders}) '
+                'GROUP BY series_id, source, series_name ORDER BY n DESC LIMIT 1',
+                (series_key.lower(), *directories)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return SeriesInfo(id=row[0], name=row[2], year='', overview='', source=row[1])
+
+    def record(self, series_key: str, series: SeriesInfo, entries: List[Tuple[Path, int, int]]):
+        """Registra i file (percorso finale, stagione, episodio) risolti per una serie"""
+        now = time.time()
+        rows = []
+        for path, season, episode in entries:
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            rows.append((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns,
+                         self.directory_key(path.parent), path.name, series_key.lower(),
+                         str(series.id), series.source, series.name, season, episode, now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                self._conn.executemany(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows
+                )
+                self._conn.execute('COMMIT')
+            except sqlite3.Error:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
 # ============================================================================
 # INTERFACCIA UTENTE
 # ============================================================================
@@ -647,8 +3104,35 @@ class TextManager:
             'results': "📊 RISULTATI: ✅ {} successi, ❌ {} errori",
             'preview': "PREVIEW",
             'execution': "ESECUZIONE",
+            'season_label': "Stagione {}",
             'restore_script_created': "📄 Script di ripristino creato: {}",
-            'restore_instructions': "💡 Per ripristinare i nomi originali, esegui: python {}"
+            'restore_instructions': "💡 Per ripristinare i nomi originali, esegui: python {}",
+            'library_summary': "📚 LIBRERIA: {} serie elaborate, {} saltate, {} non riconosciute",
+            'library_results': "📊 TOTALE: ✅ {} successi, ❌ {} errori",
+            'auto_selected': "🤖 Selezione automatica: {} | {} | {} (punteggio {:.2f})",
+            'queued_pending': "📥 In coda per la revisione manuale: '{}' (miglior punteggio {:.2f})",
+            'pending_summary': "📥 {} serie in coda: risolvile con --resolve-pending",
+            'pending_empty': "✅ Nessuna serie in coda",
+            'pending_count': "📥 {} serie in coda da risolvere",
+            'unchanged_skipped': "⏩ {} file invariati dall'ultima esecuzione (--full-rescan per rielaborarli)",
+            'all_unchanged': "✅ Nessun file nuovo o modificato dall'ultima esecuzione",
+            'known_series': "♻️  Serie già associata: {} | {}",
+            'watching': "👀 In ascolto dei nuovi file in: {} (Ctrl+C per terminare)",
+            'watch_arrivals': "📥 {} nuovi file pronti",
+            'watch_stopped': "🛑 Monitoraggio terminato",
+            'journal_recovered': "♻️  Recuperato il journal di un'esecuzione interrotta: {} ({} rinomine completate, annullabili con --undo)",
+            'undo_results': "📊 RIPRISTINO: ✅ {} file ripristinati, ❌ {} errori",
+            'undo_preview_hint': "💡 Aggiungi --execute per ripristinare i nomi originali",
+            'progress': "⏳ {}/{} operazioni ({}%) - ETA {}:{:02d}",
+            'rows_hidden': "… {} righe non mostrate (usa --output csv o --output ndjson per l'elenco completo)",
+            'transfer': "📦 {} {}% ({:.0f}/{:.0f} MB)",
+            'duplicates_found': "🔄 DUPLICATI RILEVATI: S{:02d}E{:02d} - {} file",
+            'identical_copy': "copia identica di {}, non rinominata",
+            'wasted_space': "💾 {} copie identiche: {:.1f} MB recuperabili eliminandole",
+            'plan_label': "Piano",
+            'plan_saved': "📄 Piano salvato: {} ({} operazioni)",
+            'plan_apply_hint': "💡 Per eseguirlo senza nuove ricerche: --apply-plan {} --execute",
+            'plan_empty': "✅ Nessuna operazione nel piano"
         },
         Language.ENGLISH: {
             'header': "📺 Universal TV Series Renamer v1.2 (Refactored)",
@@ -665,8 +3149,35 @@ class TextManager:
             'results': "📊 RESULTS: ✅ {} successes, ❌ {} errors",
             'preview': "PREVIEW",
             'execution': "EXECUTION",
+            'season_label': "Season {}",
             'restore_script_created': "📄 Restore script created: {}",
-            'restore_instructions': "💡 To restore original names, run: python {}"
+            'restore_instructions': "💡 To restore original names, run: python {}",
+            'library_summary': "📚 LIBRARY: {} series processed, {} skipped, {} unrecognised",
+            'library_results': "📊 TOTAL: ✅ {} successes, ❌ {} errors",
+            'auto_selected': "🤖 Auto-selected: {} | {} | {} (score {:.2f})",
+            'queued_pending': "📥 Queued for manual review: '{}' (best score {:.2f})",
+            'pending_summary': "📥 {} series queued: resolve them with --resolve-pending",
+            'pending_empty': "✅ No queued series",
+            'pending_count': "📥 {} queued series to resolve",
+            'unchanged_skipped': "⏩ {} files unchanged since the last run (--full-rescan to process them again)",
+            'all_unchanged': "✅ No new or modified files since the last run",
+            'known_series': "♻️  Series already matched: {} | {}",
+            'watching': "👀 Watching for new files in: {} (Ctrl+C to stop)",
+            'watch_arrivals': "📥 {} new files ready",
+            'watch_stopped': "🛑 Watch stopped",
+            'journal_recovered': "♻️  Recovered the journal of an interrupted run: {} ({} renames completed, reversible with --undo)",
+            'undo_results': "📊 UNDO: ✅ {} files restored, ❌ {} errors",
+            'undo_preview_hint': "💡 Add --execute to restore the original names",
+            'progress': "⏳ {}/{} operations ({}%) - ETA {}:{:02d}",
+            'rows_hidden': "… {} rows not shown (use --output csv or --output ndjson for the full list)",
+            'transfer': "📦 {} {}% ({:.0f}/{:.0f} MB)",
+            'duplicates_found': "🔄 DUPLICATES DETECTED: S{:02d}E{:02d} - {} files",
+            'identical_copy': "identical copy of {}, not renamed",
+            'wasted_space': "💾 {} identical copies: {:.1f} MB reclaimable by deleting them",
+            'plan_label': "Plan",
+            'plan_saved': "📄 Plan saved: {} ({} operations)",
+            'plan_apply_hint': "💡 To run it without new lookups: --apply-plan {} --execute",
+            'plan_empty': "✅ No operations in the plan"
         }
     }
     
@@ -752,6 +3263,706 @@ class UserInterface:
                     sys.exit(0)
                 print("❌ Selezione non valida!")
 
+# ============================================================================
+# PIANIFICAZIONE RINOMINE
+# ============================================================================
+
+@dataclass(frozen=True)
+class RenameStep:
+    """Singola rinomina del piano (i passaggi intermedi usano nomi temporanei)"""
+    source: Path
+    target: Path
+    operation: RenameOperation
+    final: bool = True
+    # Deve attendere il passaggio precedente (stessa catena o stesso ciclo)
+    follows: bool = False
+
+@dataclass(frozen=True)
+class RenamePlan:
+    """Piano ordinato di rinomine e operazioni scartate per conflitto"""
+    steps: Tuple[RenameStep, ...]
+    conflicts: Tuple[Tuple[RenameOperation, str], ...]
+    chains: int
+    cycles: int
+    names: Set[Tuple[str, str]]
+
+class RenamePlanner:
+    """Ordina le rinomine in base alle dipendenze: catene in ordine inverso, cicli con un nome temporaneo"""
+    
+    TEMP_PREFIX = '.tvrenamer-tmp-'
+    
+    @classmethod
+    def plan(cls, operations: List[RenameOperation]) -> RenamePlan:
+        """Costruisce il piano con una sola lettura per cartella (niente stat per operazione)"""
+        occupied = cls._snapshot({op.directory for op in operations} |
+                                 {op.target_directory for op in operations})
+        
+        # Un solo proprietario per destinazione: le altre operazioni sono in conflitto
+        conflicts: List[Tuple[RenameOperation, str]] = []
+        active: Dict[Tuple[str, str], RenameOperation] = {}
+        target_of: Dict[Tuple[str, str], Tuple[str, str]] = {}
+        claimed: Set[Tuple[str, str]] = set()
+        for op in operations:
+            source_key = (op.directory, op.name)
+            target_key = (op.target_directory, op.new_name)
+            if target_key in claimed:
+                conflicts.append((op, 'duplicate'))
+                continue
+            claimed.add(target_key)
+            active[source_key] = op
+            target_of[source_key] = target_key
+        
+        # Grafo funzionale: ogni operazione attende al più quella che libera la sua destinazione
+        waited_by = {target: source for source, target in target_of.items() if target in active}
+        
+        # Destinazione occupata da un file che non verrà spostato: il rifiuto risale la catena
+        blocked = [source for source, target in target_of.items()
+                   if target in occupied and target not in active]
+        while blocked:
+            source_key = blocked.pop()
+            op = active.pop(source_key, None)
+            if op is None:
+                continue
+            conflicts.append((op, 'exists'))
+            waiting = waited_by.pop(source_key, None)
+            if waiting is not None:
+                blocked.append(waiting)
+        
+        waits_for = {source: target for target, source in waited_by.items()}
+        
+        steps: List[RenameStep] = []
+        emitted: Set[Tuple[str, str]] = set()
+        chains = cycles = 0
+        
+        # Catene: si parte dall'operazione la cui destinazione è libera e si risale
+        for source_key in active:
+            if source_key in waits_for or source_key in emitted:
+                continue
+            if source_key in waited_by:
+                chains += 1
+            key = source_key
+            follows = False
+            while key is not None and key not in emitted:
+                op = active[key]
+                steps.append(RenameStep(op.old_path, op.new_path, op, follows=follows))
+                emitted.add(key)
+                key = waited_by.get(key)
+                follows = True
+        
+        # Rimangono solo cicli (es. scambi A↔B): il primo file passa da un nome temporaneo
+        reserved: Set[Tuple[str, str]] = set()
+        for source_key in active:
+            if source_key in emitted:
+                continue
+            cycles += 1
+            first = active[source_key]
+            temp_path = cls._temp_path(first.old_path, occupied, reserved)
+            steps.append(RenameStep(first.old_path, temp_path, first, final=False))
+            emitted.add(source_key)
+            
+            key = waited_by[source_key]
+            while key != source_key:
+                op = active[key]
+                steps.append(RenameStep(op.old_path, op.new_path, op, follows=True))
+                emitted.add(key)
+                key = waited_by[key]
+            steps.append(RenameStep(temp_path, first.new_path, first, follows=True))
+        
+        return RenamePlan(tuple(steps), tuple(conflicts), chains, cycles, occupied)
+    
+    @staticmethod
+    def sequences(steps: Iterable[RenameStep]) -> List[List[RenameStep]]:
+        """Divide il piano in sequenze indipendenti (catene, cicli, rinomine singole)"""
+        sequences: List[List[RenameStep]] = []
+        for step in steps:
+            if step.follows and sequences:
+                sequences[-1].append(step)
+            else:
+                sequences.append([step])
+        return sequences
+    
+    @classmethod
+    def _snapshot(cls, directories: Set[str]) -> Set[Tuple[str, str]]:
+        """Nomi presenti nelle cartelle coinvolte (una scandir per cartella)"""
+        occupied = set()
+        for directory in directories:
+            try:
+                with os.scandir(directory) as iterator:
+                    occupied.update((directory, entry.name) for entry in iterator)
+            except OSError:
+                continue
+        return occupied
+    
+    @staticmethod
+    def key(path: Path) -> Tuple[str, str]:
+        """Chiave (cartella, nome) usata per il confronto dei nomi"""
+        return os.path.split(str(path))
+    
+    @classmethod
+    def _temp_path(cls, path: Path, occupied: Set[Tuple[str, str]],
+                   reserved: Set[Tuple[str, str]]) -> Path:
+        """Nome temporaneo nascosto, libero e non già assegnato, nella stessa cartella"""
+        counter = 0
+        while True:
+            candidate = path.parent / f"{cls.TEMP_PREFIX}{os.getpid()}-{counter}{path.suffix}"
+            key = cls.key(candidate)
+            if key not in occupied and key not in reserved:
+                reserved.add(key)
+                return candidate
+            counter += 1
+
+class RenamePlanFile:
+    """Piano di rinomina risolto (JSONL): salvato con --plan-out, eseguito offline con --apply-plan
+    
+    Ogni record contiene l'identità del file sorgente (inode, dimensione, mtime):
+    all'applicazione i file modificati o sostituiti nel frattempo vengono scartati.
+    L'intestazione indica se il piano crea collegamenti (--organize) e con quale --link.
+    """
+    
+    VERSION = 2
+    
+    def __init__(self, path: Path, organize: Optional[str] = None, link_mode: Optional[LinkMode] = None):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'type': 'plan', 'version': self.VERSION, 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                     'organize': organize, 'link': link_mode.value if organize and link_mode else None})
+    
+    def add(self, series_key: str, series: SeriesInfo, operations: List[RenameOperation],
+            kept: Iterable = ()):
+        """Aggiunge le operazioni risolte di una serie (o di una sua stagione)
+        
+        kept: file elaborati che restano invariati (già corretti, copie identiche),
+        registrati perché --apply-plan li segni come elaborati nell'indice di stato.
+        """
+        series_record = {'id': str(series.id), 'name': series.name, 'year': series.year, 'source': series.source}
+        records = []
+        for op in operations:
+            record = self._record('rename', series_key, series_record, op.directory, op.name)
+            if record is not None:
+                record.update(new_name=op.new_name, target_directory=op.target_directory)
+                records.append(record)
+        for video_file in kept:
+            record = self._record('keep', series_key, series_record, *os.path.split(os.fspath(video_file)))
+            if record is not None and record['season'] is not None and record['episode'] is not None:
+                records.append(record)
+        # --apply-plan raggruppa per stagione: record contigui anche con stagioni unite
+        records.sort(key=lambda record: record['season'] if record['season'] is not None else -1)
+        with self._lock:
+            for record in records:
+                self._write(record)
+            self.count += sum(1 for record in records if record['type'] == 'rename')
+    
+    @staticmethod
+    def _record(kind: str, series_key: str, series_record: Dict, directory: str, name: str) -> Optional[Dict]:
+        """Record con l'identità attuale del file (None se non più presente)"""
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            return None
+        season, episode = PatternUtils.extract_season_episode(name)
+        return {'type': kind, 'series_key': series_key, 'series': series_record,
+                'season': season, 'episode': episode, 'directory': directory, 'name': name,
+                'inode': st.st_ino, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+    
+    def close(self):
+        """Chiude il piano dopo averlo scritto su disco (il messaggio "Piano salvato" segue il fsync)"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+    
+    def _write(self, record: Dict):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+    
+    @classmethod
+    def header(cls, path: Path) -> Dict:
+        """Intestazione del piano (modalità, versione), verificata"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls._header(f, path)
+        except OSError as e:
+            raise ConfigurationException(f"Impossibile leggere il piano {path}: {e}")
+    
+    @classmethod
+    def _header(cls, f, path: Path) -> Dict:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            header = None
+        if not isinstance(header, dict) or header.get('type') != 'plan':
+            raise ConfigurationException(f"Piano non valido: {path}")
+        if header.get('version') != cls.VERSION:
+            raise ConfigurationException(f"Versione del piano non supportata: {header.get('version')}")
+        return header
+    
+    @classmethod
+    def read(cls, path: Path) -> Iterator[Dict]:
+        """Legge i record di un piano (rinomine e file invariati), verificandone l'intestazione"""
+        try:
+            with open(path, encoding='utf-8') as f:
+                cls._header(f, path)
+                for line in f:
+                    record = json.loads(line)
+                    if record.get('type') in ('rename', 'keep'):
+                        yield record
+        except OSError as e:
+            raise ConfigurationException(f"Impossibile leggere il piano {path}: {e}")
+        except ValueError as e:
+            raise ConfigurationException(f"Piano danneggiato {path}: {e}")
+    
+    @staticmethod
+    def operation(record: Dict) -> RenameOperation:
+        return RenameOperation(record['directory'], record['name'], record['new_name'],
+                               record.get('target_directory') or record['directory'])
+    
+    @staticmethod
+    def series(record: Dict) -> SeriesInfo:
+        data = record['series']
+        return SeriesInfo(data['id'], data['name'], data.get('year') or '', '', data['source'])
+    
+    @staticmethod
+    def stale(record: Dict) -> Optional[str]:
+        """Motivo per cui il file sorgente non corrisponde più al piano, None se invariato"""
+        try:
+            st = os.stat(os.path.join(record['directory'], record['name']))
+        except FileNotFoundError:
+            return "file non più presente"
+        except OSError as e:
+            return str(e)
+        if st.st_ino != record['inode']:
+            return "file sostituito dopo il piano"
+        if st.st_size != record['size'] or st.st_mtime_ns != record['mtime_ns']:
+            return "file modificato dopo il piano"
+        return None
+
+# ============================================================================
+# ESECUZIONE DELLE RINOMINE
+# ============================================================================
+
+class FileMover:
+    """Rinomina nello stesso filesystem; tra filesystem diversi copia senza passare dallo spazio utente
+    
+    La copia va su un nome temporaneo nella cartella di destinazione, viene
+    sincronizzata su disco e verificata nella dimensione; solo dopo prende il
+    nome finale e il file sorgente viene rimosso.
+    """
+    
+    CHUNK = 64 * 1024 * 1024
+    # Errori per cui copy_file_range/sendfile non sono utilizzabili su questa coppia di file
+    UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP, errno.EBADF}
+    
+    @classmethod
+    def move(cls, source: Path, target: Path, progress: Optional[Callable[[int, int], None]] = None):
+        """Sposta source in target; progress(copiati, totale) durante le copie tra filesystem"""
+        try:
+            os.rename(source, target)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+        cls._move_across(source, target, progress)
+    
+    @classmethod
+    def _move_across(cls, source: Path, target: Path, progress: Optional[Callable[[int, int], None]]):
+        size = os.stat(source).st_size
+        partial = target.with_name(f"{RenamePlanner.TEMP_PREFIX}{os.getpid()}-{threading.get_ident()}{target.suffix}")
+        try:
+            with open(source, 'rb') as src, open(partial, 'xb') as dst:
+                cls._copy(src.fileno(), dst.fileno(), size, progress)
+                os.fsync(dst.fileno())
+            copied = os.stat(partial).st_size
+            if copied != size:
+                raise OSError(errno.EIO, f"copia incompleta ({copied} di {size} byte)", str(target))
+            shutil.copystat(source, partial)
+            os.rename(partial, target)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(partial)
+            raise
+        # Il nuovo nome deve essere su disco prima di rimuovere l'unica altra copia
+        cls._fsync_directory(target.parent)
+        os.unlink(source)
+    
+    @staticmethod
+    def _fsync_directory(directory: Path):
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    @classmethod
+    def _copy(cls, src: int, dst: int, size: int, progress: Optional[Callable[[int, int], None]]):
+        """Copia nel kernel (copy_file_range, poi sendfile), con lettura/scrittura come ultima risorsa"""
+        offset = 0
+        methods = []
+        if hasattr(os, 'copy_file_range'):
+            methods.append(lambda count: os.copy_file_range(src, dst, count))
+        if hasattr(os, 'sendfile'):
+            methods.append(lambda count: os.sendfile(dst, src, None, count))
+        
+        for method in methods:
+            try:
+                while offset < size:
+                    sent = method(min(cls.CHUNK, size - offset))
+                    if not sent:
+                        break  # Copia corta (FUSE, NFS, overlay): si prosegue con il metodo successivo
+                    offset += sent
+                    if progress:
+                        progress(offset, size)
+                if offset >= size:
+                    return
+            except OSError as e:
+                if e.errno not in cls.UNSUPPORTED:
+                    raise
+            # Il metodo successivo riparte dallo stesso punto
+            os.lseek(src, offset, os.SEEK_SET)
+            os.lseek(dst, offset, os.SEEK_SET)
+        
+        while offset < size:
+            data = os.read(src, min(cls.CHUNK, size - offset))
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                view = view[os.write(dst, view):]
+            offset += len(data)
+            if progress:
+                progress(offset, size)
+
+class FileLinker:
+    """Crea il file di destinazione senza copiare dati né toccare l'originale (--organize)
+    
+    In automatico: hardlink nello stesso filesystem, reflink dove gli hardlink
+    non sono ammessi, symlink tra filesystem diversi. Il metodo riuscito viene
+    ricordato per ogni coppia di filesystem.
+    """
+    
+    FICLONE = 0x40049409
+    # Errori per cui un metodo non è disponibile su questa coppia di filesystem
+    UNSUPPORTED = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EOPNOTSUPP, errno.ENOTTY,
+                   errno.EINVAL, errno.ENOSYS}
+    
+    def __init__(self, mode: LinkMode):
+        self.mode = mode
+        self._methods: Dict[Tuple[int, int], LinkMode] = {}
+    
+    def link(self, source: Path, target: Path) -> LinkMode:
+        """Collega source in target e restituisce il metodo usato"""
+        if self.mode != LinkMode.AUTO:
+            self._create(self.mode, source, target)
+            return self.mode
+        
+        devices = (os.stat(source).st_dev, os.stat(target.parent).st_dev)
+        known = self._methods.get(devices)
+        if known is not None:
+            candidates = [known]
+        elif devices[0] == devices[1]:
+            candidates = [LinkMode.HARDLINK, LinkMode.REFLINK, LinkMode.SYMLINK]
+        else:
+            candidates = [LinkMode.SYMLINK]
+        
+        for method in candidates:
+            try:
+                self._create(method, source, target)
+            except OSError as e:
+                if e.errno not in self.UNSUPPORTED or method == candidates[-1]:
+                    raise
+                continue
+            self._methods[devices] = method
+            return method
+    
+    @staticmethod
+    def same_file(source: Path, target: Path) -> bool:
+        """Destinazione già collegata all'originale (hardlink o symlink)"""
+        try:
+            return os.path.samefile(source, target)
+        except OSError:
+            return False
+    
+    @classmethod
+    def _create(cls, method: LinkMode, source: Path, target: Path):
+        if method == LinkMode.HARDLINK:
+            os.link(source, target)
+        elif method == LinkMode.SYMLINK:
+            os.symlink(os.path.abspath(source), target)
+        else:
+            cls._reflink(source, target)
+    
+    @classmethod
+    def _reflink(cls, source: Path, target: Path):
+        """Copia condivisa copy-on-write (btrfs, XFS): ioctl FICLONE"""
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.EOPNOTSUPP, "reflink non supportato su questa piattaforma", str(target))
+        import fcntl
+        with open(source, 'rb') as src, open(target, 'xb') as dst:
+            try:
+                fcntl.ioctl(dst.fileno(), cls.FICLONE, src.fileno())
+            except OSError:
+                dst.close()
+                os.unlink(target)
+                raise
+        shutil.copystat(source, target)
+
+class RenameExecutor:
+    """Esegue in parallelo sequenze indipendenti di rinomine, con un pool limitato per filesystem"""
+    
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._pools: Dict[int, ThreadPoolExecutor] = {}
+        self._devices: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def map(self, fn: Callable[..., Tuple[int, int]], items: List,
+            directory: Callable[..., str]) -> Iterator[Tuple[int, int]]:
+        """Applica fn a ogni elemento (una sequenza di rinomine o un collegamento)
+        
+        Il pool è scelto dal filesystem della cartella di destinazione, dove avvengono le scritture.
+        """
+        if self.workers == 1 or len(items) == 1:
+            for item in items:
+                yield fn(item)
+            return
+        
+        futures = [self._pool(self._device(directory(item))).submit(fn, item) for item in items]
+        for future in as_completed(futures):
+            yield future.result()
+    
+    def close(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown()
+    
+    def _device(self, directory: str) -> int:
+        device = self._devices.get(directory)
+        if device is None:
+            try:
+                device = os.stat(directory).st_dev
+            except OSError:
+                device = -1
+            self._devices[directory] = device
+        return device
+    
+    def _pool(self, device: int) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(device)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f'rename-{device}')
+                self._pools[device] = pool
+            return pool
+
+# ============================================================================
+# REPORT DELLE RINOMINE
+# ============================================================================
+
+class Reporter(ABC):
+    """Destinazione dei risultati delle rinomine: un record per operazione"""
+    
+    FIELDS = ('status', 'series', 'season', 'source', 'target', 'error')
+    
+    # Stati dei record: anteprima, rinominato, collegato (--organize), destinazione occupata, errore
+    PLANNED, RENAMED, LINKED, CONFLICT, ERROR = 'planned', 'renamed', 'linked', 'conflict', 'error'
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+    
+    def begin(self, title: str, total: int):
+        """Inizio di un gruppo di operazioni"""
+        pass
+    
+    def record(self, status: str, operation: RenameOperation, series: Optional[str] = None,
+               season: Optional[int] = None, error: Optional[str] = None):
+        with self._lock:
+            self._write({
+                'status': status,
+                'series': series,
+                'season': season,
+                'source': os.path.join(operation.directory, operation.name),
+                'target': os.path.join(operation.target_directory, operation.new_name),
+                'error': error
+            }, operation)
+    
+    def transfer(self, name: str, copied: int, total: int):
+        """Avanzamento di una copia tra filesystem diversi"""
+        pass
+    
+    def end(self):
+        """Fine di un gruppo di operazioni"""
+        pass
+    
+    def close(self):
+        pass
+    
+    @abstractmethod
+    def _write(self, record: Dict, operation: RenameOperation):
+        """Scrive un record nel formato del reporter"""
+        pass
+
+class TableReporter(Reporter):
+    """Tabella a terminale con scrittura a blocchi; con molte operazioni mostra avanzamento e ETA"""
+    
+    PROGRESS_THRESHOLD = 500
+    PREVIEW_ROWS = 20
+    FLUSH_ROWS = 256
+    REFRESH_INTERVAL = 0.2
+    
+    def __init__(self, stream, text_manager: 'TextManager'):
+        super().__init__(stream)
+        self.text_manager = text_manager
+        self.english = text_manager.language == Language.ENGLISH
+        self._rows: List[str] = []
+        isatty = getattr(stream, 'isatty', None)
+        self._tty = bool(isatty and isatty())
+        self._progress = self._line = False
+        self._total = self._done = self._hidden = 0
+        self._started = self._drawn = 0.0
+    
+    def begin(self, title: str, total: int):
+        with self._lock:
+            lines = [f"\n📋 {title} - {total} operazioni", "=" * 100]
+            if self.english:
+                lines.append(f"{'STATUS':<8} {'ORIGINAL FILE':<45} {'NEW FILE':<45}")
+            else:
+                lines.append(f"{'STATO':<8} {'FILE ORIGINALE':<45} {'NUOVO FILE':<45}")
+            lines.append("-" * 100)
+            self._rows.extend(lines)
+            
+            # Avanzamento al posto delle righe solo su un terminale: in un file o una pipe la tabella resta completa
+            self._progress = total > self.PROGRESS_THRESHOLD and self._tty
+            self._total, self._done, self._hidden = total, 0, 0
+            self._started = self._drawn = time.monotonic()
+    
+    def transfer(self, name: str, copied: int, total: int):
+        if not self._tty:
+            return
+        with self._lock:
+            now = time.monotonic()
+            if copied < total and now - self._drawn < self.REFRESH_INTERVAL:
+                return
+            self._drawn = now
+            self._flush()
+            self.stream.write('\r\033[K' + self.text_manager.get(
+                'transfer', TVSeriesRenamer._truncate_filename(name, 42), copied * 100 // max(total, 1),
+                copied / 1048576, total / 1048576))
+            self.stream.flush()
+            self._line = True
+    
+    def end(self):
+        with self._lock:
+            self._clear_progress()
+            if self._progress:
+                if self._hidden:
+                    self._rows.append(self.text_manager.get('rows_hidden', self._hidden))
+                self._progress = False
+            self._flush()
+    
+    def _write(self, record: Dict, operation: RenameOperation):
+        status = record['status']
+        self._done += 1
+        
+        # In modalità avanzamento si mostrano solo le prime righe e i problemi
+        if self._progress and self._done > self.PREVIEW_ROWS and status in (self.PLANNED, self.RENAMED, self.LINKED):
+            self._hidden += 1
+            now = time.monotonic()
+            if now - self._drawn >= self.REFRESH_INTERVAL:
+                self._drawn = now
+                self._flush()
+                self._draw_progress(now)
+            return
+        
+        old_display = TVSeriesRenamer._truncate_filename(operation.name, 42)
+        new_display = TVSeriesRenamer._truncate_filename(operation.new_name, 42)
+        if status == self.PLANNED:
+            label = "📹 OK"
+        elif status == self.RENAMED:
+            label = "✅ DONE"
+        elif status == self.LINKED:
+            label = "🔗 LINK"
+        elif status == self.CONFLICT:
+            label = "❌ EXISTS" if self.english else "❌ ESISTE"
+        else:
+            label = "❌ ERROR"
+            error = record['error'] or ''
+            new_display = error[:12] + "..." if len(error) > 15 else error
+        
+        self._clear_progress()
+        self._rows.append(f"{label:<8} {old_display:<45} {new_display:<45}")
+        if self._progress or len(self._rows) >= self.FLUSH_ROWS:
+            self._flush()
+    
+    def _flush(self):
+        if self._rows:
+            self.stream.write('\n'.join(self._rows) + '\n')
+            self._rows.clear()
+            self.stream.flush()
+    
+    def _draw_progress(self, now: float):
+        elapsed = now - self._started
+        remaining = (self._total - self._done) * elapsed / self._done if self._done else 0
+        self.stream.write('\r' + self.text_manager.get(
+            'progress', self._done, self._total, self._done * 100 // max(self._total, 1),
+            int(remaining) // 60, int(remaining) % 60))
+        self.stream.flush()
+        self._line = True
+    
+    def _clear_progress(self):
+        if self._line:
+            self.stream.write('\r\033[K')
+            self._line = False
+
+class JSONReporter(Reporter):
+    """Array JSON scritto man mano (un elemento per operazione)"""
+    
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._count = 0
+        self.stream.write('[')
+    
+    def _write(self, record: Dict, operation: RenameOperation):
+        self.stream.write((',\n' if self._count else '\n') + json.dumps(record, ensure_ascii=False))
+        self._count += 1
+    
+    def close(self):
+        with self._lock:
+            self.stream.write('\n]\n' if self._count else ']\n')
+            self.stream.flush()
+
+class NDJSONReporter(Reporter):
+    """Un oggetto JSON per riga, scritto subito: adatto a pipe e a --watch"""
+    
+    def _write(self, record: Dict, operation: RenameOperation):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+class CSVReporter(Reporter):
+    """CSV con intestazione, una riga per operazione"""
+    
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._writer = csv.DictWriter(stream, fieldnames=self.FIELDS, lineterminator='\n')
+        self._writer.writeheader()
+    
+    def _write(self, record: Dict, operation: RenameOperation):
+        self._writer.writerow(record)
+    
+    def close(self):
+        self.stream.flush()
+
+def create_reporter(config: Config, stream, text_manager: 'TextManager') -> Reporter:
+    """Crea il reporter per il formato di output richiesto"""
+    if config.output == OutputFormat.JSON:
+        return JSONReporter(stream)
+    if config.output == OutputFormat.NDJSON:
+        return NDJSONReporter(stream)
+    if config.output == OutputFormat.CSV:
+        return CSVReporter(stream)
+    return TableReporter(stream, text_manager)
+
 # ============================================================================
 # RINOMINATORE PRINCIPALE
 # ============================================================================
@@ -759,31 +3970,86 @@ class UserInterface:
 class TVSeriesRenamer:
     """Classe principale per la rinomina delle serie TV"""
     
-    def __init__(self, config: Config):
+    # File passati all'indice di stato per blocco durante la scansione
+    SCAN_CHUNK = 4096
+    
+    def __init__(self, config: Config, output=None):
         self.config = config
         self.text_manager = TextManager(config.interface_language)
         self.ui = UserInterface(self.text_manager)
+        # Tabella o record leggibili da programmi; i messaggi restano su sys.stdout
+        self.reporter = create_reporter(config, output or sys.stdout, self.text_manager)
         self.http_client = HTTPClient(config)
-        self.api_manager = APIManager(config, self.http_client)
+        self.cache = create_cache(config)
+        # Alias dei nomi serie dal file esterno (ricaricato a caldo se modificato)
+        ALIASES.use_file(AliasIndex.path_for(config))
+        self.api_manager = APIManager(config, self.http_client, self.cache)
+        # Serializza prompt e tabelle quando più serie sono elaborate in parallelo
+        self._ui_lock = threading.RLock()
+        # Modalità batch: scelta automatica, i casi incerti finiscono in coda
+        self.matcher = SeriesMatcher(self.api_manager, config.auto_threshold)
+        self.pending = PendingQueue.for_config(config)
+        self._interactive = not (config.batch or config.watch)
+        self._queued = 0
+        # Esecuzioni incrementali: i file già elaborati e invariati vengono saltati
+        self.state = StateIndex.for_config(config)
+        self._unchanged = 0
+        # Journal delle rinomine, creato alla prima rinomina reale
+        self.journal: Optional['RenameJournal'] = None
+        self._journal_lock = threading.Lock()
+        # Pool per la risoluzione degli episodi, creato alla prima serie
+        self._resolve_pool: Optional[ThreadPoolExecutor] = None
+        self._resolve_lock = threading.Lock()
+        # Rinomine reali: sequenze indipendenti in parallelo, un pool per filesystem
+        self.executor = RenameExecutor(config.rename_workers)
+        # --organize: collegamenti in un albero separato al posto delle rinomine
+        self.linker = FileLinker(config.link_mode) if config.organize else None
+        # Il modello di --template usa campi letti dalle intestazioni video
+        self._template_media = FilenameBuilder.uses_media(config.template)
+        # Piano risolto da salvare per --apply-plan (solo in anteprima)
+        self.plan: Optional[RenamePlanFile] = None
+        if config.plan_out:
+            try:
+                self.plan = RenamePlanFile(Path(config.plan_out).expanduser(), config.organize, config.link_mode)
+            except OSError as e:
+                raise ConfigurationException(f"Impossibile creare il piano {config.plan_out}: {e}")
+        self._recover_journals()
     
     def process_directory(self, directory: Path):
         """Processa una directory per la rinomina"""
         self.ui.show_header(self.config, directory)
         
-        # Trova file video
-        video_files = FileUtils.find_video_files(directory, self.config.recursive)
+        # Trova file video: l'indice di stato filtra a blocchi mentre la visita prosegue,
+        # così restano in memoria (e vengono ordinati) solo i file nuovi o modificati
+        with TRACER.span('scan') as span:
+            found = 0
+            video_files: List[VideoFile] = []
+            walker = FileUtils.iter_video_files(directory, self.config.recursive,
+                                                self.config.max_depth, self.config.scan_workers)
+            for chunk in iter(lambda: list(itertools.islice(walker, self.SCAN_CHUNK)), []):
+                found += len(chunk)
+                video_files.extend(self._filter_unchanged(chunk))
+            video_files.sort()
+            span.set(files=found)
         
-        if not video_files:
+        if not found:
             print(self.text_manager.get('no_files'))
             return
         
-        print(f"\n{self.text_manager.get('files_found', len(video_files))}")
+        print(f"\n{self.text_manager.get('files_found', found)}")
+        
+        if self._unchanged:
+            print(self.text_manager.get('unchanged_skipped', self._unchanged))
+        if not video_files:
+            print(self.text_manager.get('all_unchanged'))
+            return
         
         # Ottieni nome directory corretto
         directory_name = Path.cwd().name if str(directory) in ['.', './'] else directory.name
         
         # Estrai nome serie intelligentemente
-        series_name = SeriesExtractor.extract_from_files(video_files, directory_name)
+        with TRACER.span('extraction'):
+            series_name = SeriesExtractor.extract_from_files(video_files, directory_name)
         
         print(f"📺 Serie rilevata: '{series_name}'")
         
@@ -796,40 +4062,443 @@ class TVSeriesRenamer:
         
         # Processa la serie
         self._process_series(series_name, video_files, directory)
+        self._print_pending_summary()
+    
+    def watch(self, root: Path):
+        """Resta in ascolto e rinomina i nuovi file appena completati"""
+        # Recupera ciò che è arrivato mentre il programma non era attivo (l'indice rende il passaggio rapido)
+        if self.config.library:
+            self.process_library(root)
+        else:
+            self.process_directory(root)
+        self._queued = 0
+        
+        max_depth = self.config.max_depth if (self.config.recursive or self.config.library) else 0
+        watcher = create_watcher(root, max_depth, self.config.scan_workers)
+        settler = FileSettler(self.config.settle_seconds)
+        print(f"\n{self.text_manager.get('watching', root.absolute())}")
+        
+        try:
+            while True:
+                # Con file in attesa si controlla la stabilità ogni secondo
+                for path in watcher.poll(1.0 if len(settler) else 30.0):
+                    settler.add(path)
+                
+                ready = settler.ready()
+                if ready:
+                    self._process_arrivals(ready)
+                    self._print_pending_summary()
+                    self._queued = 0
+        except KeyboardInterrupt:
+            print(f"\n{self.text_manager.get('watch_stopped')}")
+        finally:
+            watcher.close()
+    
+    def _process_arrivals(self, files: List[Path]):
+        """Elabora un gruppo di nuovi file: estrazione, risoluzione e rinomina per serie"""
+        # Comprende gli eventi generati dalle rinomine stesse, già registrati nell'indice
+        files = self._filter_unchanged(files)
+        if not files:
+            return
+        print(f"\n{self.text_manager.get('watch_arrivals', len(files))}")
+        
+        by_directory: Dict[Path, List[Path]] = {}
+        for video_file in files:
+            by_directory.setdefault(video_file.parent, []).append(video_file)
+        
+        for directory, directory_files in by_directory.items():
+            for unit in LibraryScanner.split_by_name(directory, sorted(directory_files)):
+                if unit.series_name == "Unknown Series":
+                    print(f"⚠️  Serie non riconosciuta in: {unit.directory} ({len(unit.files)} file)")
+                    continue
+                try:
+                    unit, series, operations = self._plan_unit(unit)
+                except Exception as e:
+                    print(f"❌ Errore durante l'elaborazione di {unit.series_name}: {e}")
+                    continue
+                
+                if operations is None:
+                    continue
+                if operations:
+                    with TRACER.span('rename', operations=len(operations)):
+                        self._execute_renames(operations, unit.directory, series)
+                self._record_state(unit.series_name, series, list(unit.files), operations)
+    
+    def undo(self, target: str):
+        """Annulla le rinomine registrate in un journal (percorso oppure 'last')"""
+        if target == 'last':
+            path = RenameJournal.latest(RenameJournal.directory(self.config))
+        else:
+            path = Path(target).expanduser()
+        if path is None or not path.is_file():
+            raise ConfigurationException(f"Journal non trovato: {target}")
+        
+        print(f"📒 Journal: {path}")
+        with TRACER.span('undo'):
+            undone, errors, pairs = RenameJournal.undo(path, workers=self.config.workers,
+                                                       dry_run=self.config.dry_run)
+        
+        if self.config.dry_run:
+            mode = self.text_manager.get('preview')
+            print(f"\n📋 {mode} - {len(pairs)} operazioni")
+            print("=" * 100)
+            for src, dst in reversed(pairs):
+                print(f"{'↩️  UNDO':<8} {self._truncate_filename(dst.name, 42):<45} "
+                      f"{self._truncate_filename(src.name, 42):<45}")
+            print("=" * 100)
+            print(self.text_manager.get('undo_preview_hint'))
+        else:
+            print(self.text_manager.get('undo_results', undone, errors))
+    
+    def apply_plan(self, path: Path):
+        """Esegue un piano salvato con --plan-out, senza ricerche né accessi alla rete"""
+        # Un piano --organize crea collegamenti: mai spostare gli originali al loro posto
+        header = RenamePlanFile.header(path)
+        organize, link = header.get('organize'), header.get('link')
+        if self.config.organize and (self.config.organize != organize or self.config.link_mode.value != link):
+            raise ConfigurationException(
+                f"Il piano {path} è stato creato con --organize {organize or '-'} --link {link or '-'}: "
+                f"non corrisponde alle opzioni attuali")
+        self.linker = FileLinker(LinkMode(link)) if organize else None
+        print(f"📒 {self.text_manager.get('plan_label')}: {path}")
+        
+        # Il piano è scritto per serie, cartella e stagione: si legge un gruppo alla volta
+        def unit_key(record: Dict) -> Tuple:
+            return record['series_key'], record['series']['source'], record['series']['id'], record['directory']
+        
+        processed = 0
+        for (series_key, _, _, directory), records in itertools.groupby(RenamePlanFile.read(path), unit_key):
+            records = list(records)
+            series = RenamePlanFile.series(records[0])
+            renames = sum(1 for record in records if record['type'] == 'rename')
+            if renames:
+                print(f"\n{'='*80}")
+                print(f"📺 SERIE: {series_key} → {html.unescape(series.name)} ({renames} file)")
+                print(f"📁 {directory}")
+                print(f"{'='*80}")
+            
+            restore_manager = RestoreScriptManager(Path(directory), self.text_manager)
+            success_count = error_count = 0
+            batches = []
+            rejected: Dict[int, List[Tuple[RenameOperation, str]]] = {}
+            for season, season_records in itertools.groupby(records, lambda record: record['season']):
+                operations: List[RenameOperation] = []
+                season_files: List[VideoFile] = []
+                for record in season_records:
+                    reason = RenamePlanFile.stale(record)
+                    if record['type'] == 'keep':
+                        # Invariato nel piano: elaborato, salvo modifiche successive
+                        if not reason:
+                            season_files.append(VideoFile(record['directory'], record['name']))
+                        continue
+                    operation = RenamePlanFile.operation(record)
+                    if reason:
+                        rejected.setdefault(season, []).append((operation, reason))
+                    else:
+                        operations.append(operation)
+                        season_files.append(VideoFile(operation.directory, operation.name))
+                batches.append((season, season_files, operations))
+            
+            files = [video_file for _, season_files, _ in batches for video_file in season_files]
+            numbers = {os.path.join(record['directory'], record['name']): (record['season'], record['episode'])
+                       for record in records}
+            for seasons, season_files, operations in self._merge_linked_seasons(batches, files):
+                season = seasons[0] if len(seasons) == 1 else None
+                season_rejected = [entry for number in seasons for entry in rejected.pop(number, ())]
+                if operations or season_rejected:
+                    with TRACER.span('rename', season=season, operations=len(operations)):
+                        success, errors = self._run_renames(operations, restore_manager, season, series,
+                                                            season_rejected)
+                    success_count += success
+                    error_count += errors
+                self._record_state(series_key, series, season_files, operations, numbers)
+            
+            if renames:
+                self._finish_renames(success_count, error_count, restore_manager)
+            processed += renames
+        
+        if not processed:
+            print(self.text_manager.get('plan_empty'))
+    
+    def close(self):
+        """Chiude journal e indici alla fine dell'esecuzione"""
+        self.reporter.close()
+        if self.plan is not None:
+            self.plan.close()
+            print(self.text_manager.get('plan_saved', self.plan.path, self.plan.count))
+            print(self.text_manager.get('plan_apply_hint', self.plan.path))
+        self.api_manager.close()
+        if self._resolve_pool is not None:
+            self._resolve_pool.shutdown()
+        self.executor.close()
+        if self.journal is not None:
+            self.journal.close()
+    
+    def _get_journal(self) -> 'RenameJournal':
+        with self._journal_lock:
+            if self.journal is None:
+                self.journal = RenameJournal.create(RenameJournal.directory(self.config))
+            return self.journal
+    
+    def _recover_journals(self):
+        """Chiude i journal lasciati aperti da esecuzioni interrotte"""
+        try:
+            recovered = RenameJournal.recover(RenameJournal.directory(self.config))
+        except OSError as e:
+            print(f"⚠️  Impossibile verificare i journal precedenti: {e}")
+            return
+        for path, completed in recovered:
+            print(self.text_manager.get('journal_recovered', path, completed))
+    
+    def process_pending(self):
+        """Passata interattiva sulle serie lasciate in coda dalla modalità batch"""
+        entries = self.pending.load()
+        if not entries:
+            print(self.text_manager.get('pending_empty'))
+            return
+        
+        print(self.text_manager.get('pending_count', len(entries)))
+        self._interactive = True
+        
+        for entry in entries:
+            directory = Path(entry['directory'])
+            files = [Path(f) for f in entry.get('files', []) if Path(f).exists()]
+            if files:
+                self._process_series(entry['series_name'], files, directory)
+            else:
+                print(f"⏭️  File non più presenti: {directory}")
+            # Risolta o scartata dall'utente, la voce esce comunque dalla coda
+            self.pending.remove(entry)
+    
+    def process_library(self, root: Path):
+        """Processa una libreria con molte serie, una unità per serie in parallelo"""
+        self.ui.show_header(self.config, root)
+        
+        processed = skipped = unknown = 0
+        success_total = error_total = 0
+        
+        with ThreadPoolExecutor(max_workers=self.config.library_workers) as executor:
+            futures = []
+            for unit in LibraryScanner.iter_units(root, self.config.max_depth, self.config.scan_workers,
+                                                  self._filter_unchanged):
+                if unit.series_name == "Unknown Series":
+                    print(f"⚠️  Serie non riconosciuta in: {unit.directory} ({len(unit.files)} file)")
+                    unknown += 1
+                    continue
+                futures.append(executor.submit(self._plan_unit, unit))
+            
+            if not futures and not unknown:
+                if self._unchanged:
+                    print(self.text_manager.get('unchanged_skipped', self._unchanged))
+                    print(self.text_manager.get('all_unchanged'))
+                else:
+                    print(self.text_manager.get('no_files'))
+                return
+            
+            for future in as_completed(futures):
+                try:
+                    unit, series, operations = future.result()
+                except Exception as e:
+                    print(f"❌ Errore durante l'elaborazione di una serie: {e}")
+                    skipped += 1
+                    continue
+                
+                if operations is None:
+                    skipped += 1
+                    continue
+                
+                processed += 1
+                if operations:
+                    with self._ui_lock, TRACER.span('rename', operations=len(operations)):
+                        success, errors = self._execute_renames(operations, unit.directory, series)
+                    success_total += success
+                    error_total += errors
+                self._record_state(unit.series_name, series, list(unit.files), operations)
+        
+        print(f"\n{'='*80}")
+        print(self.text_manager.get('library_summary', processed, skipped, unknown))
+        if self._unchanged:
+            print(self.text_manager.get('unchanged_skipped', self._unchanged))
+        print(self.text_manager.get('library_results', success_total, error_total))
+        self._print_pending_summary()
+    
+    def _plan_unit(self, unit: SeriesUnit) -> Tuple[SeriesUnit, Optional[SeriesInfo],
+                                                    Optional[List[RenameOperation]]]:
+        """Risolve la serie di un'unità e ne prepara le rinomine (None se saltata)
+        
+        Gira nei worker della libreria: le rinomine dell'unità vengono quindi
+        preparate per intero e pianificate insieme, anche tra stagioni diverse;
+        solo il percorso a singola serie procede una stagione alla volta.
+        """
+        files = list(unit.files)
+        selected_series = self._select_series(unit.series_name, files, unit.directory, unit_header=True)
+        
+        if selected_series is None:
+            return unit, None, None
+        
+        return unit, selected_series, self._prepare_rename_operations(selected_series, files)
     
     def _process_series(self, series_name: str, files: List[Path], directory: Path):
         """Processa una serie specifica"""
+        self._print_series_header(series_name, len(files))
+        
+        selected_series = self._select_series(series_name, files, directory)
+        
+        if selected_series is None:
+            return
+        
+        # Prepara ed esegue le rinomine una stagione alla volta
+        batches = self._iter_season_operations(selected_series, files)
+        if not self._execute_seasons(series_name, selected_series, batches, directory, files):
+            print("⚠️  Nessuna rinomina da eseguire per questa serie.")
+    
+    def _select_series(self, series_name: str, files: List[Path], directory: Path,
+                       unit_header: bool = False) -> Optional[SeriesInfo]:
+        """Individua la serie: dall'indice di stato, altrimenti cercando online"""
+        known = self.state.known_series(series_name, files) if self.state else None
+        if known is not None:
+            with self._ui_lock:
+                if unit_header:
+                    self._print_series_header(series_name, len(files), directory)
+                print(self.text_manager.get('known_series', known.source, html.unescape(known.name)))
+            return known
+        
+        # Cerca serie online
+        with TRACER.span('search', query=series_name):
+            results = self.api_manager.search_series(series_name)
+        
+        if self._interactive:
+            with self._ui_lock:
+                if unit_header:
+                    self._print_series_header(series_name, len(files), directory)
+                return self._choose_series(results, series_name)
+        
+        # Il punteggio scarica episodi: fuori dal lock, per non bloccare le altre serie
+        ranked = self._rank_candidates(results, series_name, files, directory)
+        with self._ui_lock:
+            if unit_header:
+                self._print_series_header(series_name, len(files), directory)
+            return self._auto_choose(ranked, series_name, files, directory)
+    
+    def _filter_unchanged(self, files: List[Path]) -> List[Path]:
+        """Esclude i file già elaborati e non modificati dall'ultima esecuzione"""
+        if not self.state or not files:
+            return files
+        
+        with TRACER.span('state', files=len(files)):
+            changed = self.state.filter_changed(files)
+        with self._ui_lock:
+            self._unchanged += len(files) - len(changed)
+        return changed
+    
+    def _record_state(self, series_key: str, series: SeriesInfo, files: List[Path],
+                      operations: List[RenameOperation],
+                      numbers: Optional[Dict[str, Tuple[int, int]]] = None):
+        """Registra i file risolti nel piano (--plan-out) e nell'indice di stato (solo in esecuzione reale)
+        
+        numbers: stagione ed episodio già noti per percorso (--apply-plan), senza rianalizzare i nomi.
+        """
+        targets = {os.path.join(op.directory, op.name): op for op in operations}
+        if self.plan is not None:
+            self.plan.add(series_key, series, operations,
+                          [video_file for video_file in files if os.fspath(video_file) not in targets])
+        if self.config.dry_run or not self.state:
+            return
+        
+        entries = []
+        for video_file in files:
+            path = os.fspath(video_file)
+            known = numbers.get(path) if numbers else None
+            season, episode = known or PatternUtils.extract_season_episode(video_file.name)
+            if season is None or episode is None:
+                continue
+            operation = targets.get(path)
+            if operation is None:
+                entries.append((video_file, season, episode))
+            # --organize lascia l'originale: è elaborato se il collegamento esiste
+            elif self.linker:
+                if os.path.lexists(os.path.join(operation.target_directory, operation.new_name)):
+                    entries.append((video_file, season, episode))
+            # Rinomina non riuscita (destinazione esistente o errore): il file resta da elaborare
+            elif not video_file.exists():
+                entries.append((operation.new_path, season, episode))
+        
+        try:
+            self.state.record(series_key, series, entries)
+        except sqlite3.Error as e:
+            print(f"⚠️  Impossibile aggiornare l'indice di stato: {e}")
+    
+    def _print_series_header(self, series_name: str, file_count: int, directory: Optional[Path] = None):
+        """Mostra l'intestazione di una serie"""
         print(f"\n{'='*80}")
-        print(f"📺 SERIE: {series_name} ({len(files)} file)")
+        print(f"📺 SERIE: {series_name} ({file_count} file)")
+        if directory is not None:
+            print(f"📁 {directory}")
         print(f"{'='*80}")
         print(f"{self.text_manager.get('searching_for')} '{series_name}'")
-        
-        # Cerca serie online
-        results = self.api_manager.search_series(series_name)
-        choice_index = self.ui.select_series(results, series_name)
+    
+    def _choose_series(self, results: List[SeriesInfo], series_name: str) -> Optional[SeriesInfo]:
+        """Fa scegliere la serie tra i risultati di ricerca"""
+        # L'attesa dell'utente resta separata dai tempi di elaborazione
+        with TRACER.span('user_input', 'ui'):
+            choice_index = self.ui.select_series(results, series_name)
         
         if choice_index is None:
             print(f"⏭️  Saltando serie: {series_name}")
-            return
-        
-        selected_series = results[choice_index]
+            return None
         
-        # Prepara operazioni di rinomina
-        operations = self._prepare_rename_operations(selected_series, files)
+        return results[choice_index]
+    
+    def _rank_candidates(self, results: List[SeriesInfo], series_name: str,
+                         files: List[Path], directory: Path) -> List[MatchScore]:
+        """Calcola il punteggio di confidenza dei candidati"""
+        with TRACER.span('matching', candidates=len(results)):
+            return self.matcher.rank(results, series_name, files, directory)
+    
+    def _auto_choose(self, ranked: List[MatchScore], series_name: str,
+                     files: List[Path], directory: Path) -> Optional[SeriesInfo]:
+        """Accetta il candidato migliore se affidabile, altrimenti accoda la serie"""
+        if not ranked:
+            print(self.text_manager.get('no_series_found', series_name))
+            return None
         
-        if not operations:
-            print("⚠️  Nessuna rinomina da eseguire per questa serie.")
-            return
+        match = self.matcher.choose(ranked)
+        if match:
+            series = match.series
+            print(self.text_manager.get('auto_selected', series.source, html.unescape(series.name),
+                                        series.year or '-', match.score))
+            return series
         
-        # Esegui rinomine
-        self._execute_renames(operations, directory)
+        try:
+            self.pending.add(series_name, directory, files, ranked)
+        except OSError as e:
+            print(f"❌ Errore salvataggio coda {self.pending.path}: {e}")
+            return None
+        with self._ui_lock:
+            self._queued += 1
+        print(self.text_manager.get('queued_pending', series_name, ranked[0].score))
+        return None
+    
+    def _print_pending_summary(self):
+        """Ricorda le serie lasciate in coda durante l'esecuzione"""
+        if self._queued:
+            print(self.text_manager.get('pending_summary', self._queued))
+            print(f"   {self.pending.path}")
     
-    def _prepare_rename_operations(self, series: SeriesInfo, files: List[Path]) -> List[RenameOperation]:
-        """Prepara le operazioni di rinomina"""
-        operations = []
-        episode_files = {}
+    def _prepare_rename_operations(self, series: SeriesInfo, files: List[VideoFile]) -> List[RenameOperation]:
+        """Prepara le operazioni di rinomina di tutte le stagioni"""
+        return [operation for _, _, operations in self._iter_season_operations(series, files)
+                for operation in operations]
+    
+    def _iter_season_operations(self, series: SeriesInfo, files: List[VideoFile]
+                                ) -> Iterator[Tuple[int, List[VideoFile], List[RenameOperation]]]:
+        """Genera (stagione, file, operazioni) una stagione alla volta
         
-        # Raggruppa file per episodio
+        Solo le operazioni della stagione corrente restano in memoria: la
+        stagione successiva si risolve mentre la precedente è già stata eseguita.
+        """
+        # Raggruppa file per stagione ed episodio
+        seasons: Dict[int, Dict[int, List[VideoFile]]] = {}
         for video_file in files:
             season, episode = PatternUtils.extract_season_episode(video_file.name)
             
@@ -837,89 +4506,270 @@ class TVSeriesRenamer:
                 print(f"⚠️  SKIP: {video_file.name} (formato non riconosciuto)")
                 continue
             
-            ep_key = (season, episode)
-            if ep_key not in episode_files:
-                episode_files[ep_key] = []
-            episode_files[ep_key].append(video_file)
-        
-        # Crea operazioni per ogni episodio
-        for (season, episode), file_list in episode_files.items():
-            episode_info = self.api_manager.get_episode_info(series, season, episode)
-            episode_title = episode_info.title if episode_info else f"Episode {episode}"
+            seasons.setdefault(season, {}).setdefault(episode, []).append(video_file)
+        
+        # Scarica in blocco le stagioni coinvolte (una richiesta per stagione o per serie)
+        with TRACER.span('preload', series=series.name):
+            self.api_manager.preload_episodes(series, set(seasons))
+        
+        version_label = "[Versione {}]" if self.config.interface_language == Language.ITALIAN else "[Version {}]"
+        identical = wasted = 0
+        
+        for season in sorted(seasons):
+            episode_files = seasons.pop(season)
+            with TRACER.span('resolution', season=season, episodes=len(episode_files)):
+                episode_infos = self._resolve_episodes(series, [(season, episode) for episode in episode_files])
             
-            for i, video_file in enumerate(file_list):
-                new_name = FilenameBuilder.build(
-                    series.name, season, episode, episode_title, 
-                    video_file.suffix, self.config.format_style
-                )
+            # Impronte dei soli episodi con più file, calcolate insieme per la stagione
+            duplicates = [os.fspath(video_file) for file_list in episode_files.values() if len(file_list) > 1
+                          for video_file in file_list]
+            fingerprints = ContentFingerprint.compute_many(duplicates)
+            # Intestazioni video: per ordinare le versioni e, se il modello le usa, per tutti i nomi
+            media = MediaProbe.probe_many(
+                [os.fspath(video_file) for file_list in episode_files.values() for video_file in file_list]
+                if self._template_media else duplicates)
+            
+            # Crea operazioni per ogni episodio
+            target_directory = self._target_directory(series, season)
+            season_files: List[VideoFile] = []
+            operations: List[RenameOperation] = []
+            for episode, file_list in episode_files.items():
+                # Tutti i file, copie identiche comprese: senza operazione restano elaborati nell'indice
+                season_files.extend(file_list)
+                episode_info = episode_infos.get((season, episode))
+                episode_title = episode_info.title if episode_info else f"Episode {episode}"
                 
-                # Se ci sono duplicati, aggiungi versione
                 if len(file_list) > 1:
-                    version_text = f"[Versione {i+1}]" if self.config.interface_language == Language.ITALIAN else f"[Version {i+1}]"
-                    name_part, ext = os.path.splitext(new_name)
-                    new_name = f"{name_part} {version_text}{ext}"
-                
-                # Skip se il file è già nel formato corretto
-                if video_file.name == new_name:
-                    if self.config.dry_run:
-                        print(f"⏭️  SKIP: {video_file.name} (già corretto)")
-                    continue
+                    file_list, copies = self._rank_versions(season, episode, file_list, fingerprints, media,
+                                                                version_label)
+                    identical += len(copies)
+                    wasted += sum(size for _, size in copies)
                 
-                operations.append(RenameOperation(
-                    old_path=video_file,
-                    new_name=new_name
-                ))
+                for i, video_file in enumerate(file_list):
+                    new_name = FilenameBuilder.build(
+                        series.name, season, episode, episode_title,
+                        video_file.suffix, self.config.format_style,
+                        self.config.template, media.get(os.fspath(video_file))
+                    )
+                    
+                    # Se ci sono duplicati, aggiungi versione
+                    if len(file_list) > 1:
+                        name_part, ext = os.path.splitext(new_name)
+                        new_name = f"{name_part} {version_label.format(i + 1)}{ext}"
+                    
+                    # Skip se il file è già nel formato corretto
+                    if video_file.name == new_name and target_directory in (None, video_file.directory):
+                        if self.config.dry_run:
+                            print(f"⏭️  SKIP: {video_file.name} (già corretto)")
+                        continue
+                    
+                    operations.append(RenameOperation.for_file(video_file, new_name, target_directory))
+            
+            yield season, season_files, operations
+        
+        if identical:
+            print(self.text_manager.get('wasted_space', identical, wasted / 1048576))
+    
+    def _rank_versions(self, season: int, episode: int, file_list: List[VideoFile],
+                       fingerprints: Dict[str, Tuple[int, str]], media: Dict[str, MediaInfo],
+                       version_label: str) -> Tuple[List[VideoFile], List[Tuple[VideoFile, int]]]:
+        """Ordina le versioni di un episodio e separa le copie identiche
+        
+        Prima la risoluzione più alta (dall'intestazione del video), poi il file più
+        grande, poi il nome. Restituisce le versioni distinte da rinominare e le
+        copie identiche, lasciate invariate, con la dimensione.
+        """
+        def size_of(video_file: VideoFile) -> int:
+            return fingerprints.get(os.fspath(video_file), (0, ''))[0]
+        
+        def rank(video_file: VideoFile) -> Tuple[int, int, str]:
+            info = media.get(os.fspath(video_file))
+            return -(info.pixels if info else 0), -size_of(video_file), video_file.name
+        
+        ranked = sorted(file_list, key=rank)
+        print(self.text_manager.get('duplicates_found', season, episode, len(ranked)))
+        
+        versions: List[VideoFile] = []
+        copies: List[Tuple[VideoFile, int]] = []
+        first_with: Dict[Tuple[int, str], VideoFile] = {}
+        for video_file in ranked:
+            fingerprint = fingerprints.get(os.fspath(video_file))
+            size_mb = size_of(video_file) / 1048576
+            original = first_with.get(fingerprint) if fingerprint else None
+            if original is not None:
+                copies.append((video_file, fingerprint[0]))
+                print(f"   = {video_file.name} ({size_mb:.1f} MB) → "
+                      f"{self.text_manager.get('identical_copy', original.name)}")
+                continue
+            if fingerprint:
+                first_with[fingerprint] = video_file
+            versions.append(video_file)
+            info = media.get(os.fspath(video_file))
+            details = f", {info.resolution} {info.codec}".rstrip() if info else ""
+            print(f"   {len(versions)}. {video_file.name} ({size_mb:.1f} MB{details})  → "
+                  f"{version_label.format(len(versions))}")
+        return versions, copies
+    
+    def _target_directory(self, series: SeriesInfo, season: int) -> Optional[str]:
+        """Cartella di destinazione: None per rinominare sul posto"""
+        name = FileUtils.clean_filename(html.unescape(series.name))
+        if self.config.organize:
+            # Struttura attesa da Plex/Kodi: "Serie/Season 01", speciali in "Specials"
+            return os.path.join(self.config.organize, name, f"Season {season:02d}" if season else "Specials")
+        if self.config.move_to:
+            return os.path.join(self.config.move_to, name)
+        return None
+    
+    def _resolve_episodes(self, series: SeriesInfo,
+                          keys: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Optional[EpisodeInfo]]:
+        """Risolve in parallelo le informazioni degli episodi (stagione, episodio)"""
+        if not keys:
+            return {}
+        
+        def lookup(key: Tuple[int, int]) -> Optional[EpisodeInfo]:
+            return self.api_manager.get_episode_info(series, *key)
         
-        return operations
+        # Un solo episodio o un solo worker: nessun passaggio tra thread
+        if self.config.workers == 1 or len(keys) == 1:
+            return {key: lookup(key) for key in keys}
+        
+        # Pool condiviso tra stagioni e serie, invece di crearne uno per ogni chiamata
+        with self._resolve_lock:
+            if self._resolve_pool is None:
+                self._resolve_pool = ThreadPoolExecutor(max_workers=self.config.workers,
+                                                        thread_name_prefix='resolve')
+        return dict(zip(keys, self._resolve_pool.map(lookup, keys)))
+    
+    def _execute_renames(self, operations: List[RenameOperation], directory: Path,
+                         series: Optional[SeriesInfo] = None) -> Tuple[int, int]:
+        """Esegue le operazioni di rinomina e restituisce (successi, errori)"""
+        restore_manager = RestoreScriptManager(directory, self.text_manager)
+        success_count, error_count = self._run_renames(operations, restore_manager, series=series)
+        self._finish_renames(success_count, error_count, restore_manager)
+        return success_count, error_count
     
-    def _execute_renames(self, operations: List[RenameOperation], directory: Path):
-        """Esegue le operazioni di rinomina"""
+    def _execute_seasons(self, series_key: str, series: SeriesInfo,
+                         batches: Iterator[Tuple[int, List[VideoFile], List[RenameOperation]]],
+                         directory: Path, files: List[VideoFile]) -> int:
+        """Esegue e registra le rinomine stagione per stagione; restituisce il numero di operazioni"""
         restore_manager = RestoreScriptManager(directory, self.text_manager)
+        success_count = error_count = total = 0
+        
+        for seasons, season_files, operations in self._merge_linked_seasons(batches, files):
+            season = seasons[0] if len(seasons) == 1 else None
+            if operations:
+                total += len(operations)
+                with TRACER.span('rename', season=season, operations=len(operations)):
+                    success, errors = self._run_renames(operations, restore_manager, season, series)
+                success_count += success
+                error_count += errors
+            self._record_state(series_key, series, season_files, operations)
         
+        if total:
+            self._finish_renames(success_count, error_count, restore_manager)
+        return total
+    
+    @staticmethod
+    def _merge_linked_seasons(batches: Iterable[Tuple[int, List, List[RenameOperation]]], files: Iterable
+                              ) -> Iterator[Tuple[List[int], List, List[RenameOperation]]]:
+        """Unisce le stagioni legate da catene o cicli di nomi in un'unica pianificazione
+        
+        Una stagione che rinomina verso il nome attuale di un file non ancora
+        elaborato (es. un file con la stagione sbagliata) attende le stagioni
+        successive, finché il gruppo non dipende più da file esterni.
+        """
+        unvisited = {RenamePlanner.key(f) for f in files}
+        seasons: List[int] = []
+        pending_files: List = []
+        pending: List[RenameOperation] = []
+        for season, season_files, operations in batches:
+            unvisited.difference_update(RenamePlanner.key(f) for f in season_files)
+            seasons.append(season)
+            pending_files.extend(season_files)
+            pending.extend(operations)
+            if any((op.target_directory, op.new_name) in unvisited for op in pending):
+                continue
+            yield seasons, pending_files, pending
+            seasons, pending_files, pending = [], [], []
+        if seasons:
+            yield seasons, pending_files, pending
+    
+    def _run_renames(self, operations: List[RenameOperation], restore_manager: 'RestoreScriptManager',
+                     season: Optional[int] = None, series: Optional[SeriesInfo] = None,
+                     rejected: Iterable[Tuple[RenameOperation, str]] = ()) -> Tuple[int, int]:
+        """Pianifica ed esegue un gruppo di rinomine passando i risultati al reporter: (successi, errori)"""
         mode = self.text_manager.get('execution') if not self.config.dry_run else self.text_manager.get('preview')
-        print(f"\n📋 {mode} - {len(operations)} operazioni")
-        print("=" * 100)
+        if season is not None:
+            mode = f"{mode} - {self.text_manager.get('season_label', season)}"
+        reporter = self.reporter
+        series_name = series.name if series else None
         
-        if self.config.interface_language == Language.ENGLISH:
-            print(f"{'STATUS':<8} {'ORIGINAL FILE':<45} {'NEW FILE':<45}")
-        else:
-            print(f"{'STATO':<8} {'FILE ORIGINALE':<45} {'NUOVO FILE':<45}")
-        print("-" * 100)
+        def report(status: str, operation: RenameOperation, error: Optional[str] = None):
+            reporter.record(status, operation, series_name, season, error)
         
+        rejected = list(rejected)
+        reporter.begin(mode, len(operations) + len(rejected))
         success_count = 0
-        error_count = 0
+        error_count = len(rejected)
+        
+        # Operazioni scartate prima della pianificazione (es. file cambiati dopo --plan-out)
+        for operation, reason in rejected:
+            report(Reporter.ERROR, operation, reason)
+        
+        # Pianificazione: una lettura per cartella, poi catene e cicli ordinati
+        with TRACER.span('plan', operations=len(operations)) as span:
+            plan = RenamePlanner.plan(operations)
+            span.set(chains=plan.chains, cycles=plan.cycles, conflicts=len(plan.conflicts))
+        
+        for operation, reason in plan.conflicts:
+            # --organize rieseguito: il collegamento esiste già e punta allo stesso file
+            if self.linker and reason == 'exists' and FileLinker.same_file(operation.old_path, operation.new_path):
+                continue
+            report(Reporter.CONFLICT, operation)
+            error_count += 1
         
-        for operation in operations:
-            new_path = operation.old_path.parent / operation.new_name
+        if self.linker and not self.config.dry_run:
+            self._create_target_directories(plan)
             
-            # Tronca nomi per visualizzazione
-            old_display = self._truncate_filename(operation.old_path.name, 42)
-            new_display = self._truncate_filename(operation.new_name, 42)
+            def link(step: RenameStep) -> Tuple[int, int]:
+                return self._link_step(step, report)
             
-            if self.config.dry_run:
-                print(f"{'📹 OK':<8} {old_display:<45} {new_display:<45}")
-                success_count += 1
-            else:
-                try:
-                    if new_path.exists():
-                        status = "❌ EXISTS" if self.config.interface_language == Language.ENGLISH else "❌ ESISTE"
-                        print(f"{status:<8} {old_display:<45} {new_display:<45}")
-                        error_count += 1
-                        continue
-                    
-                    # Aggiungi alla lista per il ripristino PRIMA della rinomina
-                    restore_manager.add_rename(operation.old_path.name, operation.new_name)
-                    
-                    operation.old_path.rename(new_path)
-                    print(f"{'✅ DONE':<8} {old_display:<45} {new_display:<45}")
+            for success, errors in self.executor.map(link, list(plan.steps),
+                                                     lambda step: step.operation.target_directory):
+                success_count += success
+                error_count += errors
+        elif self.config.dry_run:
+            for step in plan.steps:
+                if step.final:
+                    report(Reporter.PLANNED, step.operation)
                     success_count += 1
-                    
-                except Exception as e:
-                    error_msg = str(e)[:12] + "..." if len(str(e)) > 15 else str(e)
-                    print(f"{'❌ ERROR':<8} {old_display:<45} {error_msg:<45}")
-                    error_count += 1
+        else:
+            self._create_target_directories(plan)
+            
+            # I nomi occupati restano in memoria: ogni controllo di collisione è una ricerca nell'insieme.
+            # Le sequenze non condividono nomi, quindi possono procedere in parallelo.
+            names = plan.names
+            
+            def run_sequence(steps: List[RenameStep]) -> Tuple[int, int]:
+                return self._run_sequence(steps, names, restore_manager, report)
+            
+            for success, errors in self.executor.map(run_sequence, RenamePlanner.sequences(plan.steps),
+                                                     lambda steps: str(steps[-1].target.parent)):
+                success_count += success
+                error_count += errors
+        
+        reporter.end()
+        if plan.chains or plan.cycles:
+            if self.config.interface_language == Language.ENGLISH:
+                print(f"🔁 Resolved {plan.chains} chains and {plan.cycles} cycles (via temporary names)")
+            else:
+                print(f"🔁 Risolte {plan.chains} catene e {plan.cycles} cicli (tramite nomi temporanei)")
         
         print("=" * 100)
+        return success_count, error_count
+    
+    def _finish_renames(self, success_count: int, error_count: int, restore_manager: 'RestoreScriptManager'):
+        """Riepilogo finale e script di ripristino"""
         print(self.text_manager.get('results', success_count, error_count))
         
         # Crea script di ripristino se ci sono state rinomine successful
@@ -939,6 +4789,94 @@ class TVSeriesRenamer:
                 else:
                     print(f"\n❌ Errore nella creazione dello script di ripristino: {e}")
     
+    def _run_sequence(self, steps: List[RenameStep], names: Set[Tuple[str, str]],
+                      restore_manager: 'RestoreScriptManager',
+                      report: Callable[..., None]) -> Tuple[int, int]:
+        """Esegue in ordine i passaggi di una catena o di un ciclo: (successi, errori)"""
+        success_count = error_count = 0
+        failed: Set[int] = set()
+        
+        for step in steps:
+            operation = step.operation
+            if id(operation) in failed:
+                continue
+            
+            try:
+                # Destinazione ancora occupata perché un passaggio precedente non è riuscito
+                if RenamePlanner.key(step.target) in names:
+                    report(Reporter.CONFLICT, operation)
+                    error_count += 1
+                    failed.add(id(operation))
+                    self._restore_from_temp(step, names, restore_manager)
+                    continue
+                
+                self._rename_step(step.source, step.target, names, restore_manager)
+                if step.final:
+                    report(Reporter.RENAMED, operation)
+                    success_count += 1
+                
+            except Exception as e:
+                report(Reporter.ERROR, operation, str(e))
+                error_count += 1
+                failed.add(id(operation))
+                self._restore_from_temp(step, names, restore_manager)
+        
+        return success_count, error_count
+    
+    def _link_step(self, step: RenameStep, report: Callable[..., None]) -> Tuple[int, int]:
+        """Collega un file nell'albero di --organize: (successi, errori)"""
+        operation = step.operation
+        try:
+            with TRACER.span('link', 'fs'):
+                self.linker.link(operation.old_path, operation.new_path)
+        except OSError as e:
+            report(Reporter.ERROR, operation, str(e))
+            return 0, 1
+        report(Reporter.LINKED, operation)
+        return 1, 0
+    
+    def _create_target_directories(self, plan: RenamePlan):
+        """Crea in blocco le cartelle di destinazione mancanti (--move-to, --organize)"""
+        for directory in {step.operation.target_directory for step in plan.steps
+                          if step.operation.target_directory != step.operation.directory}:
+            try:
+                os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                # L'errore emerge sulle singole rinomine verso questa cartella
+                print(f"⚠️  Impossibile creare la cartella {directory}: {e}")
+    
+    def _rename_step(self, source: Path, target: Path, names: Set[Tuple[str, str]],
+                     restore_manager: 'RestoreScriptManager'):
+        """Rinomina registrata nel journal, aggiornando l'insieme dei nomi occupati"""
+        # Registra l'intento nel journal PRIMA della rinomina
+        journal = self._get_journal()
+        seq = journal.intent(source, target)
+        
+        def progress(copied: int, total: int):
+            self.reporter.transfer(target.name, copied, total)
+        
+        try:
+            with TRACER.span('rename', 'fs'):
+                FileMover.move(source, target, progress)
+        except OSError as e:
+            journal.failed(seq, str(e))
+            raise
+        journal.done(seq)
+        names.discard(RenamePlanner.key(source))
+        names.add(RenamePlanner.key(target))
+        restore_manager.add_rename(source.name, target.name, journal.path, seq)
+    
+    def _restore_from_temp(self, step: RenameStep, names: Set[Tuple[str, str]],
+                           restore_manager: 'RestoreScriptManager'):
+        """Se un ciclo si interrompe, riporta al nome originale il file parcheggiato"""
+        original = step.operation.old_path
+        if step.source == original or RenamePlanner.key(original) in names:
+            return
+        try:
+            self._rename_step(step.source, original, names, restore_manager)
+        except OSError as e:
+            print(f"⚠️  File lasciato con nome temporaneo: {step.source} ({e})")
+    
     @staticmethod
     def _truncate_filename(filename: str, max_length: int) -> str:
         """Tronca un nome file se troppo lungo"""
@@ -952,9 +4890,9 @@ class RenamerFactory:
     """Factory per creare istanze del rinominatore"""
     
     @staticmethod
-    def create_renamer(config: Config) -> TVSeriesRenamer:
+    def create_renamer(config: Config, output=None) -> TVSeriesRenamer:
         """Crea un'istanza del rinominatore con la configurazione specificata"""
-        return TVSeriesRenamer(config)
+        return TVSeriesRenamer(config, output)
 
 class ConfigBuilder:
     """Builder per costruire configurazioni complesse"""
@@ -982,34 +4920,285 @@ class ConfigBuilder:
         self._config_dict['recursive'] = recursive
         return self
     
+    def with_cache(self, cache_dir: Optional[str] = None, enabled: bool = True) -> 'ConfigBuilder':
+        self._config_dict['cache_dir'] = cache_dir
+        self._config_dict['use_cache'] = enabled
+        return self
+    
+    def with_batch(self, enabled: bool = True, threshold: float = 0.85) -> 'ConfigBuilder':
+        self._config_dict['batch'] = enabled
+        self._config_dict['auto_threshold'] = threshold
+        return self
+    
     def build(self) -> Config:
         return Config(**self._config_dict)
 
 # ============================================================================
-# GESTORE SCRIPT DI RIPRISTINO
+# JOURNAL DELLE RINOMINE E SCRIPT DI RIPRISTINO
 # ============================================================================
 
+class RenameJournal:
+    """Journal append-only (JSONL): l'intento è registrato prima di ogni rinomina"""
+    
+    DIR_NAME = 'journals'
+    # fsync a blocchi: ogni N intenti o dopo un intervallo massimo
+    FSYNC_EVERY = 64
+    FSYNC_INTERVAL = 1.0
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(path, 'x', encoding='utf-8')
+        self._write({'type': 'begin', 'pid': os.getpid(), 'time': time.strftime('%Y-%m-%d %H:%M:%S')},
+                    sync=True)
+    
+    @classmethod
+    def directory(cls, config: Config) -> Path:
+        """Cartella dei journal, accanto alla cache dei metadati"""
+        base = Path(config.cache_dir).expanduser() if config.cache_dir else PersistentCache.default_directory()
+        return base / cls.DIR_NAME
+    
+    @classmethod
+    def create(cls, directory: Path) -> 'RenameJournal':
+        """Apre un nuovo journal per l'esecuzione corrente"""
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"rename_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        counter = 0
+        while True:
+            name = f"{stem}_{counter}.jsonl" if counter else f"{stem}.jsonl"
+            try:
+                return cls(directory / name)
+            except FileExistsError:
+                counter += 1
+    
+    def intent(self, src: Path, dst: Path) -> int:
+        """Registra una rinomina che sta per essere eseguita e ne restituisce il numero"""
+        with self._lock:
+            self._seq += 1
+            self._write({'type': 'intent', 'seq': self._seq,
+                         'src': str(src.absolute()), 'dst': str(dst.absolute())})
+            self._unsynced += 1
+            if (self._unsynced >= self.FSYNC_EVERY or
+                    time.monotonic() - self._last_sync >= self.FSYNC_INTERVAL):
+                self._sync()
+            return self._seq
+    
+    def done(self, seq: int):
+        with self._lock:
+            self._write({'type': 'done', 'seq': seq})
+    
+    def failed(self, seq: int, error: str):
+        with self._lock:
+            self._write({'type': 'failed', 'seq': seq, 'error': error})
+    
+    def close(self):
+        """Chiude il journal segnando la fine regolare dell'esecuzione"""
+        with self._lock:
+            if self._file.closed:
+                return
+            self._write({'type': 'end', 'time': time.strftime('%Y-%m-%d %H:%M:%S')}, sync=True)
+            self._file.close()
+    
+    def _write(self, record: Dict, sync: bool = False):
+        # flush a ogni riga: il record sopravvive all'interruzione del processo
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._file.flush()
+        if sync:
+            self._sync()
+    
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    # ------------------------------------------------------------------
+    # Lettura, recupero e annullamento
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def read(path: Path) -> List[Dict]:
+        """Legge i record ignorando un'eventuale ultima riga troncata"""
+        records = []
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records
+    
+    @staticmethod
+    def completed(records: List[Dict], seq_range: Optional[Tuple[int, int]] = None) -> List[Tuple[int, Path, Path]]:
+        """Rinomine eseguite e non ancora annullate: (numero, origine, destinazione)"""
+        intents: Dict[int, Tuple[Path, Path]] = {}
+        done: Set[int] = set()
+        undone: Set[int] = set()
+        for record in records:
+            seq = record.get('seq')
+            if seq is None or (seq_range and not seq_range[0] <= seq <= seq_range[1]):
+                continue
+            kind = record.get('type')
+            if kind == 'intent':
+                intents[seq] = (Path(record['src']), Path(record['dst']))
+            elif kind == 'done':
+                done.add(seq)
+            elif kind == 'undone':
+                undone.add(seq)
+        return [(seq, *intents[seq]) for seq in sorted(done - undone) if seq in intents]
+    
+    @classmethod
+    def latest(cls, directory: Path) -> Optional[Path]:
+        """Journal più recente della cartella"""
+        journals = sorted(directory.glob('rename_*.jsonl'), key=lambda p: p.stat().st_mtime)
+        return journals[-1] if journals else None
+    
+    @classmethod
+    def recover(cls, directory: Path) -> List[Tuple[Path, int]]:
+        """Chiude i journal di esecuzioni interrotte, stabilendo l'esito delle rinomine in sospeso"""
+        recovered = []
+        if not directory.is_dir():
+            return recovered
+        
+        for path in sorted(directory.glob('rename_*.jsonl')):
+            try:
+                records = cls.read(path)
+            except OSError:
+                continue
+            if not records or any(record.get('type') == 'end' for record in records):
+                continue
+            
+            begin = records[0]
+            if begin.get('type') == 'begin' and cls._process_alive(begin.get('pid')):
+                continue  # Esecuzione ancora in corso (es. modalità watch)
+            
+            settled = {r['seq'] for r in records if r.get('type') in ('done', 'failed') and 'seq' in r}
+            fixes = []
+            for record in records:
+                if record.get('type') != 'intent' or record['seq'] in settled:
+                    continue
+                src, dst = Path(record['src']), Path(record['dst'])
+                # Destinazione presente e origine sparita: la rinomina è avvenuta
+                if dst.exists() and not src.exists():
+                    fixes.append({'type': 'done', 'seq': record['seq'], 'recovered': True})
+                else:
+                    fixes.append({'type': 'failed', 'seq': record['seq'], 'error': 'interrotta', 'recovered': True})
+            fixes.append({'type': 'end', 'recovered': True, 'time': time.strftime('%Y-%m-%d %H:%M:%S')})
+            
+            with open(path, 'a+', encoding='utf-8') as f:
+                # Un'ultima riga troncata dall'interruzione va chiusa prima di accodare
+                f.seek(0, os.SEEK_END)
+                if f.tell():
+                    f.seek(f.tell() - 1)
+                    if f.read(1) != '\n':
+                        f.write('\n')
+                f.write(''.join(json.dumps(fix, ensure_ascii=False) + '\n' for fix in fixes))
+                f.flush()
+                os.fsync(f.fileno())
+            
+            completed = len(cls.completed(records + fixes))
+            recovered.append((path, completed))
+        
+        return recovered
+    
+    @classmethod
+    def undo(cls, path: Path, seq_range: Optional[Tuple[int, int]] = None, workers: int = 8,
+             dry_run: bool = False) -> Tuple[int, int, List[Tuple[Path, Path]]]:
+        """Annulla le rinomine del journal in ordine inverso; restituisce (annullate, errori, elenco)"""
+        operations = cls.completed(cls.read(path), seq_range)
+        pairs = [(src, dst) for _, src, dst in operations]
+        if dry_run or not operations:
+            return len(operations), 0, pairs
+        
+        # Cartelle diverse sono indipendenti; le rinomine tra cartelle restano in un unico gruppo
+        if all(src.parent == dst.parent for _, src, dst in operations):
+            groups: Dict[Path, List[Tuple[int, Path, Path]]] = {}
+            for operation in operations:
+                groups.setdefault(operation[1].parent, []).append(operation)
+        else:
+            groups = {path.parent: operations}
+        
+        def undo_group(group: List[Tuple[int, Path, Path]]) -> Tuple[List[int], int]:
+            invoker = CommandInvoker()
+            undone, errors = [], 0
+            for seq, src, dst in group:
+                invoker.record(RenameCommand(src, dst, executed=True))
+                if invoker.undo_last():
+                    undone.append(seq)
+                else:
+                    errors += 1
+            return undone, errors
+        
+        undone_total, error_total = [], 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(groups)))) as executor:
+            for undone, errors in executor.map(undo_group, [list(reversed(g)) for g in groups.values()]):
+                undone_total.extend(undone)
+                error_total += errors
+        
+        # Marca le rinomine annullate: un secondo --undo non le ripete
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(''.join(json.dumps({'type': 'undone', 'seq': seq}) + '\n' for seq in sorted(undone_total)))
+            f.flush()
+            os.fsync(f.fileno())
+        
+        return len(undone_total), error_total, pairs
+    
+    @staticmethod
+    def _process_alive(pid) -> bool:
+        if not isinstance(pid, int) or pid == os.getpid():
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            return True
+        return True
+
 class RestoreScriptManager:
-    """Gestore per la creazione di script di ripristino"""
+    """Gestore per la creazione di script di ripristino (lettori del journal)"""
     
     def __init__(self, directory: Path, text_manager: TextManager):
         self.directory = directory
         self.text_manager = text_manager
         self.renames: List[Tuple[str, str]] = []
+        self.journal_path: Optional[Path] = None
+        self.seq_range: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+    
+    def add_rename(self, old_name: str, new_name: str, journal_path: Optional[Path] = None,
+                   seq: Optional[int] = None):
+        """Aggiunge una rinomina alla lista (e al tratto di journal da ripristinare)"""
+        with self._lock:
+            self._add_rename(old_name, new_name, journal_path, seq)
     
-    def add_rename(self, old_name: str, new_name: str):
-        """Aggiunge una rinomina alla lista"""
+    def _add_rename(self, old_name: str, new_name: str, journal_path: Optional[Path], seq: Optional[int]):
         self.renames.append((old_name, new_name))
+        if journal_path is not None and seq is not None:
+            self.journal_path = journal_path
+            if self.seq_range is None:
+                self.seq_range = (seq, seq)
+            else:
+                self.seq_range = (min(self.seq_range[0], seq), max(self.seq_range[1], seq))
     
     def create_script(self) -> Optional[str]:
         """Crea lo script di ripristino"""
-        if not self.renames:
+        if not self.renames or self.journal_path is None:
             return None
         
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         script_name = f"restore_tv_names_{timestamp}.py"
         script_path = self.directory / script_name
         
+        # Più serie nella stessa cartella (modalità libreria) non devono sovrascriversi
+        counter = 1
+        while script_path.exists():
+            script_name = f"restore_tv_names_{timestamp}_{counter}.py"
+            script_path = self.directory / script_name
+            counter += 1
+        
         try:
             script_content = self._generate_script_content()
             
@@ -1028,19 +5217,45 @@ class RestoreScriptManager:
             return None
     
     def _generate_script_content(self) -> str:
-        """Genera il contenuto dello script di ripristino"""
+        """Genera lo script: legge dal journal le rinomine del proprio tratto e le annulla"""
         lines = [
             '#!/usr/bin/env python3',
             '# -*- coding: utf-8 -*-',
             '"""',
             'TV Renamer - Script di Ripristino',
             f'Creato: {time.strftime("%Y-%m-%d %H:%M:%S")}',
+            f'Journal: {self.journal_path}',
             '"""',
             '',
             'import os',
+            'import json',
+            'import shutil',
             'from pathlib import Path',
             'import sys',
             '',
+            f'JOURNAL = Path({str(self.journal_path.absolute())!r})',
+            f'FIRST_SEQ, LAST_SEQ = {self.seq_range[0]}, {self.seq_range[1]}',
+            '',
+            'def load_renames():',
+            '    """Rinomine eseguite e non annullate del tratto, dalla più recente"""',
+            '    intents, done, undone = {}, set(), set()',
+            "    with open(JOURNAL, encoding='utf-8') as f:",
+            '        for line in f:',
+            '            try:',
+            '                record = json.loads(line)',
+            '            except ValueError:',
+            '                continue',
+            "            seq = record.get('seq')",
+            '            if seq is None or not FIRST_SEQ <= seq <= LAST_SEQ:',
+            '                continue',
+            "            if record['type'] == 'intent':",
+            "                intents[seq] = (Path(record['src']), Path(record['dst']))",
+            "            elif record['type'] == 'done':",
+            '                done.add(seq)',
+            "            elif record['type'] == 'undone':",
+            '                undone.add(seq)',
+            '    return [(seq, *intents[seq]) for seq in sorted(done - undone, reverse=True) if seq in intents]',
+            '',
             'def main():',
             '    """Funzione principale dello script di ripristino"""',
             '    print("📺 TV Renamer - Script di Ripristino")',
@@ -1048,20 +5263,15 @@ class RestoreScriptManager:
             '    print("ATTENZIONE: Questo script ripristinerà i nomi file originali!")',
             '    print()',
             '    ',
-            '    script_dir = Path(__file__).parent.absolute()',
-            '    ',
-            '    # Lista delle rinomine da ripristinare (nuovo_nome, nome_originale)',
-            '    renames = ['
-        ]
-        
-        # Aggiungi le rinomine
-        for old_name, new_name in self.renames:
-            lines.append(f'        ({repr(new_name)}, {repr(old_name)}),')
-        
-        lines.extend([
-            '    ]',
+            '    try:',
+            '        renames = load_renames()',
+            '    except OSError as e:',
+            '        print(f"❌ Journal non leggibile: {JOURNAL} ({e})")',
+            '        return',
             '    ',
             '    print(f"📋 Trovati {len(renames)} file da ripristinare")',
+            '    if not renames:',
+            '        return',
             '    ',
             '    # Conferma utente',
             '    try:',
@@ -1079,23 +5289,22 @@ class RestoreScriptManager:
             '    success = 0',
             '    errors = 0',
             '    ',
-            '    for current_name, original_name in renames:',
-            '        try:',
-            '            current_path = script_dir / current_name',
-            '            original_path = script_dir / original_name',
-            '            ',
-            '            if current_path.exists() and not original_path.exists():',
-            '                current_path.rename(original_path)',
-            '                print(f"✅ {original_name}")',
-            '                success += 1',
-            '            elif original_path.exists():',
-            '                print(f"⚠️  {original_name} (già esistente, skip)")',
-            '            else:',
-            '                print(f"❌ {current_name} (file non trovato)")',
+            "    with open(JOURNAL, 'a', encoding='utf-8') as journal:",
+            '        for seq, original_path, current_path in renames:',
+            '            try:',
+            '                if current_path.exists() and not original_path.exists():',
+            '                    shutil.move(str(current_path), str(original_path))',
+            "                    journal.write(json.dumps({'type': 'undone', 'seq': seq}) + '\\n')",
+            '                    print(f"✅ {original_path.name}")',
+            '                    success += 1',
+            '                elif original_path.exists():',
+            '                    print(f"⚠️  {original_path.name} (già esistente, skip)")',
+            '                else:',
+            '                    print(f"❌ {current_path.name} (file non trovato)")',
+            '                    errors += 1',
+            '            except Exception as e:',
+            '                print(f"❌ {original_path.name} (errore: {e})")',
             '                errors += 1',
-            '        except Exception as e:',
-            '            print(f"❌ {original_name} (errore: {e})")',
-            '            errors += 1',
             '    ',
             '    print("-" * 50)',
             '    print(f"📊 Ripristinati: {success}, Errori: {errors}")',
@@ -1120,7 +5329,7 @@ class RestoreScriptManager:
             '        traceback.print_exc()',
             '        input("Premi INVIO per uscire...")',
             '        sys.exit(1)'
-        ])
+        ]
         
         return '\n'.join(lines)
 
@@ -1142,17 +5351,18 @@ class Command(ABC):
 class RenameCommand(Command):
     """Comando per rinominare un file"""
     
-    def __init__(self, old_path: Path, new_path: Path):
+    def __init__(self, old_path: Path, new_path: Path, executed: bool = False):
         self.old_path = old_path
         self.new_path = new_path
-        self._executed = False
+        # executed=True per comandi ricostruiti da un journal
+        self._executed = executed
     
     def execute(self) -> bool:
         """Esegue la rinomina"""
         try:
             if self.new_path.exists():
                 return False
-            self.old_path.rename(self.new_path)
+            FileMover.move(self.old_path, self.new_path)
             self._executed = True
             return True
         except Exception:
@@ -1163,7 +5373,9 @@ class RenameCommand(Command):
         if not self._executed:
             return False
         try:
-            self.new_path.rename(self.old_path)
+            if self.old_path.exists():
+                return False
+            FileMover.move(self.new_path, self.old_path)
             self._executed = False
             return True
         except Exception:
@@ -1182,6 +5394,10 @@ class CommandInvoker:
             return True
         return False
     
+    def record(self, command: Command):
+        """Aggiunge alla cronologia un comando già eseguito (es. letto da un journal)"""
+        self._history.append(command)
+    
     def undo_last(self) -> bool:
         """Annulla l'ultimo comando"""
         if self._history:
@@ -1209,6 +5425,10 @@ class APIException(TVRenamerException):
     """Eccezione per errori API"""
     pass
 
+class ProviderUnavailableException(APIException):
+    """Provider sospeso dal suo interruttore dopo errori ripetuti"""
+    pass
+
 class FileProcessingException(TVRenamerException):
     """Eccezione per errori di elaborazione file"""
     pass
@@ -1265,11 +5485,20 @@ Esempi di utilizzo:
   %(prog)s /path/to/series --execute
   %(prog)s /path/to/series --format plex --language en
   %(prog)s /path/to/series --recursive --tmdb-key YOUR_API_KEY
+  %(prog)s /path/to/library --library --execute
+  %(prog)s /path/to/library --library --batch --execute
+  %(prog)s --resolve-pending --execute
+  %(prog)s /path/to/library --library --watch --execute
+  %(prog)s --undo last --execute
+  %(prog)s /path/to/library --library --batch --plan-out piano.jsonl
+  %(prog)s --apply-plan piano.jsonl --execute
+  %(prog)s /path/to/library --library --batch --output ndjson > risultati.ndjson
         """
     )
     
     parser.add_argument(
         'directory', 
+        nargs='?',
         help='Directory contenente i file video'
     )
     
@@ -1311,6 +5540,176 @@ Esempi di utilizzo:
         help='API key TMDB'
     )
     
+    parser.add_argument(
+        '--max-depth',
+        type=int,
+        help='Profondità massima della ricerca ricorsiva'
+    )
+    
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=1,
+        help='Cartelle scansionate in parallelo (utile su NAS/NFS/SMB, default: 1)'
+    )
+    
+    parser.add_argument(
+        '--library',
+        action='store_true',
+        help='Modalità libreria: ogni sottocartella/serie viene elaborata separatamente'
+    )
+    
+    parser.add_argument(
+        '--library-workers',
+        type=int,
+        default=4,
+        help='Serie elaborate in parallelo in modalità libreria (default: 4)'
+    )
+    
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=8,
+        help='Numero di richieste API parallele (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--cache-dir',
+        help='Directory della cache persistente dei metadati (default: ~/.cache/tvrenamer)'
+    )
+    
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disabilita la cache persistente dei metadati'
+    )
+    
+    parser.add_argument(
+        '--aliases',
+        metavar='FILE',
+        help='File degli alias dei nomi serie, righe "alias = Nome Canonico", ricaricato se cambia '
+             '(default: aliases.txt nella directory della cache)'
+    )
+    
+    parser.add_argument(
+        '--batch',
+        action='store_true',
+        help='Modalità non interattiva: sceglie la serie in automatico, i casi incerti vanno in coda'
+    )
+    
+    parser.add_argument(
+        '--auto-threshold',
+        type=float,
+        default=0.85,
+        help='Punteggio minimo (0-1) per la selezione automatica in modalità batch (default: 0.85)'
+    )
+    
+    parser.add_argument(
+        '--pending-file',
+        metavar='FILE',
+        help='File della coda delle serie da risolvere (default: pending.json nella directory della cache)'
+    )
+    
+    parser.add_argument(
+        '--resolve-pending',
+        action='store_true',
+        help='Risolve interattivamente le serie lasciate in coda dalla modalità batch'
+    )
+    
+    parser.add_argument(
+        '--undo',
+        metavar='JOURNAL',
+        help="Annulla le rinomine registrate in un journal (percorso del file oppure 'last')"
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Resta in ascolto e rinomina i nuovi file appena arrivano (inotify o controllo periodico; implica --batch)'
+    )
+    
+    parser.add_argument(
+        '--settle',
+        type=float,
+        default=5.0,
+        metavar='SECONDI',
+        help='Secondi di dimensione/mtime invariati prima di elaborare un nuovo file in --watch (default: 5)'
+    )
+    
+    parser.add_argument(
+        '--full-rescan',
+        action='store_true',
+        help="Ignora l'indice di stato e rielabora anche i file invariati dall'ultima esecuzione"
+    )
+    
+    parser.add_argument(
+        '--move-to',
+        metavar='DIR',
+        help='Sposta i file rinominati in DIR/<Serie>/ (anche su un altro filesystem: copia verificata, poi rimozione)'
+    )
+    
+    parser.add_argument(
+        '--template',
+        metavar='MODELLO',
+        help='Modello del nome file al posto di --format, es. "{series} - S{season:02d}E{episode:02d} - '
+             '{title} [{resolution} {codec}]{ext}"; campi: series, season, episode, title, ext, '
+             'resolution, codec, width, height, duration (minuti)'
+    )
+    
+    parser.add_argument(
+        '--organize',
+        metavar='DIR',
+        help='Crea in DIR una libreria Serie/Season NN/ con collegamenti ai file, lasciando gli originali al loro posto'
+    )
+    
+    parser.add_argument(
+        '--link',
+        choices=[m.value for m in LinkMode],
+        default=LinkMode.AUTO.value,
+        help='Collegamenti per --organize: hardlink, reflink o symlink; auto sceglie per filesystem (default: auto)'
+    )
+    
+    parser.add_argument(
+        '--rename-workers',
+        type=int,
+        default=4,
+        metavar='N',
+        help='Rinomine e spostamenti in parallelo per filesystem (utile su NAS, default: 4)'
+    )
+    
+    parser.add_argument(
+        '--plan-out',
+        metavar='FILE',
+        help='Salva le rinomine risolte (con inode, dimensione e mtime dei file) senza eseguirle'
+    )
+    
+    parser.add_argument(
+        '--apply-plan',
+        metavar='FILE',
+        help='Esegue un piano salvato con --plan-out senza ricerche online; '
+             'i file cambiati nel frattempo vengono saltati (preview senza --execute)'
+    )
+    
+    parser.add_argument(
+        '--output',
+        choices=[f.value for f in OutputFormat],
+        default=OutputFormat.TABLE.value,
+        help='Formato dei risultati su stdout: table, json, ndjson o csv; con i formati '
+             'per programmi i messaggi vanno su stderr (default: table)'
+    )
+    
+    parser.add_argument(
+        '--trace-out',
+        metavar='FILE',
+        help='Registra fasi e chiamate HTTP in un trace JSON (chrome://tracing, Perfetto)'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Esegue con cProfile e mostra il riepilogo dei tempi per fase'
+    )
+    
     parser.add_argument(
         '--version', 
         action='version', 
@@ -1334,25 +5733,81 @@ def validate_directory(directory_path: str) -> Path:
         raise ConfigurationException(f"Il percorso non è una directory: {directory_path}")
     return directory
 
+def _write_profiling_report(args: argparse.Namespace, profiler: Optional[cProfile.Profile]):
+    """Mostra il riepilogo dei tempi e salva trace/profilo se richiesti"""
+    if not TRACER.enabled:
+        return
+    
+    TRACER.print_summary()
+    
+    if args.trace_out:
+        TRACER.write_chrome_trace(args.trace_out)
+        print(f"📄 Trace salvato in: {args.trace_out} (apri con chrome://tracing o ui.perfetto.dev)")
+    
+    if profiler:
+        # cProfile misura solo il thread principale: i worker compaiono nel trace
+        print("\n🔬 cProfile (prime 25 funzioni per tempo cumulativo)")
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(25)
+
 def main():
     """Funzione principale dell'applicazione"""
     parser = create_argument_parser()
     args = parser.parse_args()
+    if not args.directory and not (args.resolve_pending or args.undo or args.apply_plan):
+        parser.error("specificare la directory (oppure --resolve-pending / --undo / --apply-plan)")
+    if args.template:
+        error = FilenameBuilder.validate_template(args.template)
+        if error:
+            parser.error(f"--template: {error}")
+    if args.organize and args.move_to:
+        parser.error("--organize e --move-to sono alternativi")
+    if args.plan_out and (args.execute or args.watch or args.apply_plan):
+        parser.error("--plan-out salva solo il piano: non si combina con --execute, --watch o --apply-plan")
     
     # Configura logging
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logger = Logger(level=log_level)
     
+    # Tracciamento e profilazione (disattivati per default)
+    TRACER.enabled = bool(args.trace_out or args.profile)
+    profiler = cProfile.Profile() if args.profile else None
+    
     try:
         # Valida directory
-        directory = validate_directory(args.directory)
+        directory = validate_directory(args.directory) if args.directory else None
         
         # Crea configurazione
         config = Config.from_args(args)
         
-        # Crea e esegui rinominatore
-        renamer = RenamerFactory.create_renamer(config)
-        renamer.process_directory(directory)
+        # Con --output json/ndjson/csv stdout contiene solo i record: il resto va su stderr
+        output = sys.stdout
+        streams = contextlib.ExitStack()
+        if config.output != OutputFormat.TABLE:
+            streams.enter_context(contextlib.redirect_stdout(sys.stderr))
+        
+        with streams:
+            # Crea e esegui rinominatore
+            renamer = RenamerFactory.create_renamer(config, output)
+            if profiler:
+                profiler.enable()
+            try:
+                if args.undo:
+                    renamer.undo(args.undo)
+                elif args.apply_plan:
+                    renamer.apply_plan(Path(args.apply_plan).expanduser())
+                elif args.resolve_pending:
+                    renamer.process_pending()
+                elif config.watch:
+                    renamer.watch(directory)
+                elif config.library:
+                    renamer.process_library(directory)
+                else:
+                    renamer.process_directory(directory)
+            finally:
+                renamer.close()
+                if profiler:
+                    profiler.disable()
+                _write_profiling_report(args, profiler)
         
         logger.info("Elaborazione completata con successo")
         